@@ -12,6 +12,8 @@ from app.db.session import get_session
 from app.models.user import User
 from app.schemas.auth import AdminLoginRequest, AdminUserOut, AdminUserUpdate, TokenResponse, UserOut
 from app.services.auth_service import create_access_token, get_current_admin, verify_password
+from app.services.news_sentiment_service import rebuild_news_sentiment
+from app.services.sentiment_service import lexicon_version, rescore_news
 
 router = APIRouter(prefix="/admin", tags=["admin"])
 
@@ -93,6 +95,19 @@ def get_roles(current_user: User = Depends(get_current_admin)):
     return {"roles": [{"key": role, "label": role_labels.get(role, role)} for role in ALL_ROLES]}
 
 
+@router.post("/news/rescore")
+def rescore_news_sentiment(
+    force: bool = False,
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_admin),
+):
+    """Re-score stored news with the current sentiment lexicon (admin only)."""
+    updated = rescore_news(session, force=force)
+    if updated:
+        rebuild_news_sentiment(session)
+    return {"model": lexicon_version(), "updated": updated}
+
+
 @router.get("", response_class=HTMLResponse)
 def admin_page():
     """Simple backend placeholder page. Main admin UI lives in Next.js (/admin)."""
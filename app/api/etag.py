@@ -0,0 +1,43 @@
+"""
+Strong ETags and conditional GET helpers for read endpoints.
+
+An ETag hashes the endpoint's version markers together with the request's query
+parameters, so each representation (days, format, fields, ...) gets its own tag.
+"""
+
+from __future__ import annotations
+
+import hashlib
+
+from fastapi import Request, Response, status
+
+CACHE_CONTROL = "no-cache"  # clients may store responses but must revalidate
+
+
+def make_etag(request: Request, *markers: object) -> str:
+    params = sorted(request.query_params.multi_items())
+    raw = repr((request.url.path, params, markers)).encode()
+    return '"' + hashlib.sha256(raw).hexdigest()[:32] + '"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # Weak comparison per RFC 9110 for If-None-Match.
+    candidates = {t.strip().removeprefix("W/") for t in header.split(",")}
+    return etag in candidates
+
+
+def not_modified(etag: str) -> Response:
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED,
+        headers={"ETag": etag, "Cache-Control": CACHE_CONTROL},
+    )
+
+
+def set_etag(response: Response, etag: str) -> None:
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
@@ -2,26 +2,59 @@ from __future__ import annotations
 
 from datetime import datetime, timedelta, timezone
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import Response, StreamingResponse
 from sqlmodel import Session
 from sqlmodel import select
 
+from app.api.etag import etag_matches, make_etag, not_modified, set_etag
+from app.db.engine import get_engine
 from app.db.session import get_session
 from app.schemas.analysis import AnalysisRunRequest, AnalysisRunResponse
 from app.schemas.markets import MarketsOverview
-from app.schemas.stock import ChartResponse, HistoryResponse, NewsListResponse, StockOverview
+from app.schemas.stock import (
+    ChartBatchResponse,
+    ChartResponse,
+    HistoryBatchRequest,
+    HistoryBatchResponse,
+    HistoryResponse,
+    NewsBatchRequest,
+    NewsBatchResponse,
+    NewsListResponse,
+    NewsSearchResponse,
+    SeriesBatchRequest,
+    StockOverview,
+)
 from app.models.user import User
 from app.models.instrument import Instrument
 from app.models.user_bias_selection import UserBiasSelection
 from app.services.analysis_service import get_latest_report, get_run_response, run_analysis_sync
-from app.services.instrument_service import get_or_create_instrument
+from app.services.instrument_resolver import InstrumentRef, instrument_resolver
 from app.services.markets_service import get_markets_overview
-from app.services.stock_service import get_chart_data, get_history, get_news_list, get_stock_overview
+from app.services.quote_hub import quote_hub
+from app.services.quote_priority import quote_demand
+from app.services.quote_service import get_quote_snapshot
+from app.services.series_repository import BAR_COLUMNS, CHART_COLUMNS, FEATURE_COLUMNS, project_columns
+from app.services.stock_service import (
+    get_chart_json,
+    get_history_json,
+    get_news_batch,
+    get_news_list,
+    get_series_batch_json,
+    get_stock_overview_cached,
+    search_news,
+    series_window,
+)
 from app.services.auth_service import get_current_intermediate
+from app.services.data_versions import news_marker, report_marker, series_marker
 
 
 router = APIRouter()
 
+STREAM_MAX_TICKERS = 100
+STREAM_HEARTBEAT_S = 15.0
+
 
 @router.get("/health")
 def health():
@@ -39,8 +72,13 @@ def analysis_run_get(run_id: str, session: Session = Depends(get_session)):
 
 
 @router.get("/v1/report/latest", response_model=AnalysisRunResponse)
-def report_latest(ticker: str, session: Session = Depends(get_session)):
-    return get_latest_report(session, ticker)
+def report_latest(request: Request, response: Response, ticker: str, session: Session = Depends(get_session)):
+    inst = _resolve_or_404(session, ticker)
+    etag = make_etag(request, inst.id, report_marker(session, instrument_id=inst.id))
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
+    return get_latest_report(session, instrument_id=inst.id)
 
 
 @router.get("/v1/report/long-term", response_model=AnalysisRunResponse)
@@ -75,44 +113,235 @@ def report_long_term(
     return run_analysis_sync(session, req)
 
 
+def _resolve_or_404(session: Session, ticker: str) -> InstrumentRef:
+    # Read endpoints never create instruments; unknown symbols are a 404.
+    ref = instrument_resolver.resolve(session, ticker)
+    if ref is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Unknown ticker: {ticker.strip().upper()}")
+    return ref
+
+
+def _record_demand(session: Session, ticker: str) -> None:
+    # Only known instruments enter the hot quote tier; arbitrary input must not cost fetches.
+    ref = instrument_resolver.resolve(session, ticker)
+    if ref is not None:
+        quote_demand.record(ref.ticker)
+
+
+def _projected_columns(fields: str | None, available: tuple[str, ...]) -> tuple[str, ...]:
+    try:
+        return project_columns(fields, available)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
 @router.get("/v1/stock/overview", response_model=StockOverview)
-def stock_overview(ticker: str = Query(..., min_length=1, max_length=16)):
-    return get_stock_overview(ticker)
+def stock_overview(
+    ticker: str = Query(..., min_length=1, max_length=16),
+    session: Session = Depends(get_session),
+):
+    _record_demand(session, ticker)
+    return get_stock_overview_cached(session, ticker)
 
 
 @router.get("/v1/stock/history", response_model=HistoryResponse)
 def stock_history(
+    request: Request,
     ticker: str = Query(..., min_length=1, max_length=16),
     days: int = Query(60, ge=1, le=365),
     timeframe: str = Query("1d"),
+    format: str = Query("rows", pattern="^(rows|columnar)$", description="columnar: one array per field"),
+    fields: str | None = Query(None, description="Comma-separated subset of fields (ts is always included)"),
+    max_points: int | None = Query(
+        None, ge=10, le=10000, description="Downsample to at most this many points (OHLC buckets or LTTB)"
+    ),
     session: Session = Depends(get_session),
 ):
-    inst = get_or_create_instrument(session, ticker)
-    return get_history(session, instrument=inst, days=days, timeframe=timeframe)
+    columns = _projected_columns(fields, BAR_COLUMNS)
+    inst = _resolve_or_404(session, ticker)
+    window = series_window(days)
+    marker = series_marker(
+        session, instrument_id=inst.id, timeframe=timeframe, start=window[0], end=window[1], include_features=False
+    )
+    etag = make_etag(request, inst.id, marker)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    body = get_history_json(
+        session,
+        instrument=inst,
+        days=days,
+        timeframe=timeframe,
+        columns=columns,
+        columnar=format == "columnar",
+        max_points=max_points,
+        window=window,
+    )
+    response = Response(content=body, media_type="application/json")
+    set_etag(response, etag)
+    return response
 
 
 @router.get("/v1/stock/news", response_model=NewsListResponse)
 def stock_news(
+    request: Request,
+    response: Response,
     ticker: str = Query(..., min_length=1, max_length=16),
     limit: int = Query(20, ge=1, le=100),
     session: Session = Depends(get_session),
 ):
-    inst = get_or_create_instrument(session, ticker)
+    inst = _resolve_or_404(session, ticker)
+    etag = make_etag(request, inst.id, news_marker(session, instrument_id=inst.id))
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
     return get_news_list(session, instrument=inst, limit=limit)
 
 
 @router.get("/v1/stock/chart", response_model=ChartResponse)
 def stock_chart(
+    request: Request,
     ticker: str = Query(..., min_length=1, max_length=16),
     days: int = Query(120, ge=1, le=730),
     timeframe: str = Query("1d"),
+    format: str = Query("rows", pattern="^(rows|columnar)$", description="columnar: one array per field"),
+    fields: str | None = Query(None, description="Comma-separated subset of fields (ts is always included)"),
+    max_points: int | None = Query(
+        None, ge=10, le=10000, description="Downsample to at most this many points (OHLC buckets or LTTB)"
+    ),
+    session: Session = Depends(get_session),
+):
+    columns = _projected_columns(fields, CHART_COLUMNS)
+    inst = _resolve_or_404(session, ticker)
+    quote_demand.record(inst.ticker)
+    window = series_window(days)
+    marker = series_marker(
+        session,
+        instrument_id=inst.id,
+        timeframe=timeframe,
+        start=window[0],
+        end=window[1],
+        include_features=any(c in FEATURE_COLUMNS for c in columns),
+    )
+    etag = make_etag(request, inst.id, marker)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    # Encoded directly from row tuples; response_model only documents the default (rows) shape.
+    body = get_chart_json(
+        session,
+        instrument=inst,
+        days=days,
+        timeframe=timeframe,
+        columns=columns,
+        columnar=format == "columnar",
+        max_points=max_points,
+        window=window,
+    )
+    response = Response(content=body, media_type="application/json")
+    set_etag(response, etag)
+    return response
+
+
+@router.post("/v1/stock/chart:batch", response_model=ChartBatchResponse)
+def stock_chart_batch(req: SeriesBatchRequest, session: Session = Depends(get_session)):
+    columns = _projected_columns(req.fields, CHART_COLUMNS)
+    for t in req.tickers:
+        _record_demand(session, t)
+    body = get_series_batch_json(
+        session,
+        tickers=req.tickers,
+        days=req.days,
+        timeframe=req.timeframe,
+        columns=columns,
+        columnar=req.format == "columnar",
+        max_points=req.max_points,
+    )
+    return Response(content=body, media_type="application/json")
+
+
+@router.post("/v1/stock/history:batch", response_model=HistoryBatchResponse)
+def stock_history_batch(req: HistoryBatchRequest, session: Session = Depends(get_session)):
+    columns = _projected_columns(req.fields, BAR_COLUMNS)
+    body = get_series_batch_json(
+        session,
+        tickers=req.tickers,
+        days=req.days,
+        timeframe=req.timeframe,
+        columns=columns,
+        columnar=req.format == "columnar",
+        max_points=req.max_points,
+    )
+    return Response(content=body, media_type="application/json")
+
+
+@router.get("/v1/news/search", response_model=NewsSearchResponse)
+def news_search(
+    q: str = Query(..., min_length=1, max_length=200),
+    start: datetime | None = Query(None),
+    end: datetime | None = Query(None),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0, le=10000),
     session: Session = Depends(get_session),
 ):
-    inst = get_or_create_instrument(session, ticker)
-    return get_chart_data(session, instrument=inst, days=days, timeframe=timeframe)
+    """Search stored headlines: terms are ANDed, "quoted phrases" and prefix* terms are supported."""
+    try:
+        return search_news(session, q, start=start, end=end, limit=limit, offset=offset)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+@router.post("/v1/stock/news:batch", response_model=NewsBatchResponse)
+def stock_news_batch(req: NewsBatchRequest, session: Session = Depends(get_session)):
+    return get_news_batch(session, tickers=req.tickers, limit=req.limit)
 
 
 @router.get("/v1/markets/overview", response_model=MarketsOverview)
 def markets_overview():
     return get_markets_overview()
 
+
+def _load_quote_snapshot(tickers: list[str]):
+    with Session(get_engine()) as session:
+        return get_quote_snapshot(session, tickers)
+
+
+@router.get("/v1/stream/quotes")
+async def stream_quotes(
+    request: Request,
+    tickers: str = Query(..., min_length=1, max_length=2048, description="Comma-separated tickers"),
+):
+    """
+    Server-sent events: one `quote` event per stored quote on connect, then one per change.
+    Comment lines are sent as heartbeats while nothing changes.
+    """
+    wanted = sorted({t.strip().upper() for t in tickers.split(",") if t.strip()})
+    if not wanted:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No tickers given")
+    if len(wanted) > STREAM_MAX_TICKERS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {STREAM_MAX_TICKERS} tickers per stream",
+        )
+
+    async def events():
+        # Subscribe before reading the snapshot so no change slips in between.
+        sub = quote_hub.subscribe(wanted)
+        try:
+            for q in await run_in_threadpool(_load_quote_snapshot, wanted):
+                yield f"event: quote\ndata: {q.model_dump_json()}\n\n"
+            while not await request.is_disconnected():
+                batch = await sub.next_batch(STREAM_HEARTBEAT_S)
+                if not batch:
+                    yield ": keepalive\n\n"
+                    continue
+                for q in batch:
+                    yield f"event: quote\ndata: {q.model_dump_json()}\n\n"
+        finally:
+            quote_hub.unsubscribe(sub)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        # Content-Encoding keeps GZipMiddleware from buffering the stream on Starlette
+        # versions that don't exclude text/event-stream themselves.
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no", "Content-Encoding": "identity"},
+    )
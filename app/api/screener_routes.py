@@ -2,7 +2,9 @@ from __future__ import annotations
 
 from datetime import datetime, timedelta, timezone
 
-from fastapi import APIRouter, Depends, Query
+import math
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlmodel import Session, distinct, func, select
 
 from app.db.session import get_session
@@ -11,10 +13,21 @@ from app.models.instrument import Instrument
 from app.models.user import User
 from app.models.user_bias_selection import UserBiasSelection
 from app.schemas.analysis import AnalysisRunRequest, AnalysisRunResponse
-from app.schemas.universe import InstrumentOut, InstrumentsPage, ShortTermRow, ShortTermPage
+from app.schemas.universe import (
+    FundamentalRankPage,
+    FundamentalRankRow,
+    InstrumentOut,
+    InstrumentsPage,
+    ScreenerMatch,
+    ScreenerQueryPage,
+    ShortTermRow,
+    ShortTermPage,
+)
 from app.services.analysis_service import run_analysis_sync
 from app.services.auth_service import get_current_advanced, get_current_intermediate, get_current_user
+from app.services.fundamentals_service import rank_fundamentals
 from app.services.instrument_service import get_or_create_instrument
+from app.services.screener_service import ScreenerExpressionError, run_screener_query
 
 
 router = APIRouter(prefix="/v1/screener", tags=["screener"])
@@ -60,6 +73,77 @@ def screener_stocks(
     )
 
 
+@router.get("/query", response_model=ScreenerQueryPage)
+def screener_query(
+    expr: str = Query(..., min_length=1, max_length=512, description="e.g. rsi14 < 30 AND close > ma200"),
+    sort: str | None = Query(None, description="Field to rank matches by, e.g. vol20_ratio"),
+    desc: bool = Query(False),
+    limit: int = Query(50, ge=1, le=200),
+    offset: int = Query(0, ge=0),
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_advanced),
+):
+    """
+    Filter the whole universe by technical/quote conditions on the latest daily data.
+    Fields: open, high, low, close, volume, ma20, ma200, rsi14, macd, macd_signal,
+    atr14, vol20_mean, vol20_ratio, last, change, change_percent, market_cap, news_sentiment.
+    """
+    try:
+        page, fields, total = run_screener_query(
+            session, expr, sort=sort, descending=desc, limit=limit, offset=offset
+        )
+    except ScreenerExpressionError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    items = [
+        ScreenerMatch(
+            ticker=row["ticker"],
+            name=row["name"],
+            values={f: (None if math.isnan(row[f]) else float(row[f])) for f in fields},
+        )
+        for row in page.to_dict("records")
+    ]
+    return ScreenerQueryPage(expr=expr, items=items, total=total)
+
+
+@router.get("/fundamentals", response_model=FundamentalRankPage)
+def screener_fundamentals(
+    concept: str = Query(..., min_length=1, max_length=160, description="e.g. Total Revenue, StockholdersEquity"),
+    metric: str = Query("value", pattern="^(value|growth|ratio)$"),
+    denominator: str | None = Query(None, max_length=160, description="Concept to divide by when metric=ratio"),
+    statement: str | None = Query(
+        None, pattern="^(balance_sheet|income_statement|cash_flow|shareholders_equity)$"
+    ),
+    period: str = Query("annual", pattern="^(annual|quarterly)$"),
+    desc: bool = Query(True),
+    limit: int = Query(50, ge=1, le=200),
+    offset: int = Query(0, ge=0),
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_advanced),
+):
+    """
+    Rank the universe by the latest reported value of a financial concept, its
+    year-over-year growth (percent), or its ratio to another concept for the same period.
+    """
+    try:
+        rows, total = rank_fundamentals(
+            session,
+            concept,
+            metric=metric,
+            denominator=denominator,
+            statement=statement,
+            annual=period == "annual",
+            descending=desc,
+            limit=limit,
+            offset=offset,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return FundamentalRankPage(
+        concept=concept, metric=metric, items=[FundamentalRankRow(**r) for r in rows], total=total
+    )
+
+
 @router.post("/add", response_model=AnalysisRunResponse)
 def screener_add(
     ticker: str,
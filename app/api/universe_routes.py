@@ -7,6 +7,7 @@ from app.db.session import get_session
 from app.models.instrument import Instrument
 from app.models.market import StockQuote
 from app.schemas.universe import InstrumentOut, InstrumentsPage, StockSummary, StockSummaryPage, UniverseSyncResponse
+from app.services.search_index import instrument_search_index
 from app.services.universe_service import sync_universe
 
 
@@ -45,19 +46,9 @@ def stocks_search(
     limit: int = Query(10, ge=1, le=20),
     session: Session = Depends(get_session),
 ):
-    query_raw = q.strip()
-    query = query_raw.upper()
-    name_like = f"%{query_raw.lower()}%"
-    items = session.exec(
-        select(Instrument)
-        .where(Instrument.is_etf == False)  # noqa: E712
-        .where(
-            (func.upper(Instrument.ticker).like(f"{query}%"))
-            | (func.lower(Instrument.name).like(name_like))
-        )
-        .order_by(Instrument.ticker.asc())
-        .limit(limit)
-    ).all()
+    # Typeahead is served from the in-memory index; the DB is only read once to build it.
+    instrument_search_index.ensure_loaded(session)
+    items = instrument_search_index.search(q, limit=limit)
     return [InstrumentOut(ticker=i.ticker, exchange=i.exchange, name=i.name, created_at=i.created_at) for i in items]
 
 
@@ -69,16 +60,27 @@ def stocks_summary(
     session: Session = Depends(get_session),
 ):
     filters = [Instrument.is_etf == False]  # noqa: E712
+    total: int | None = None
+    sql_offset = offset
     if q:
         query_raw = q.strip()
         if query_raw:
-            up = query_raw.upper()
-            filters.append(
-                (func.upper(Instrument.ticker).like(f"{up}%"))
-                | (func.lower(Instrument.name).like(f"%{query_raw.lower()}%"))
-            )
-    base = select(Instrument).where(*filters)
-    total = session.exec(select(func.count()).select_from(base.subquery())).one()
+            ids = instrument_search_index.match_ids(query_raw)
+            if ids is not None:
+                # The index returns matches in ticker order: page there and fetch only
+                # this page by primary key instead of an IN (...) over every match.
+                total = len(ids)
+                filters.append(Instrument.id.in_(ids[offset : offset + limit]))
+                sql_offset = 0
+            else:
+                up = query_raw.upper()
+                filters.append(
+                    (func.upper(Instrument.ticker).like(f"{up}%"))
+                    | (func.lower(Instrument.name).like(f"%{query_raw.lower()}%"))
+                )
+    if total is None:
+        base = select(Instrument).where(*filters)
+        total = session.exec(select(func.count()).select_from(base.subquery())).one()
 
     rows = session.exec(
         select(Instrument, StockQuote)
@@ -86,7 +88,7 @@ def stocks_summary(
         .outerjoin(StockQuote, StockQuote.instrument_id == Instrument.id)
         .where(*filters)
         .order_by(Instrument.ticker.asc())
-        .offset(offset)
+        .offset(sql_offset)
         .limit(limit)
     ).all()
 
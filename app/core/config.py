@@ -32,6 +32,52 @@ class Settings(BaseSettings):
     news_update_minutes: int = Field(default=30, alias="NEWS_UPDATE_MINUTES")
     report_lookback_days: int = Field(default=365, alias="REPORT_LOOKBACK_DAYS")
 
+    # Market-hours gating: quote/report jobs pause outside exchange sessions (one settle
+    # run after the close); the news job slows down to NEWS_OFFHOURS_MINUTES instead
+    market_hours_gating: bool = Field(default=True, alias="MARKET_HOURS_GATING")
+    market_settle_delay_minutes: int = Field(default=10, alias="MARKET_SETTLE_DELAY_MINUTES")
+    news_offhours_minutes: int = Field(default=120, alias="NEWS_OFFHOURS_MINUTES")
+
+    # News RSS ingestion: feed endpoint (override to point at a local fixture server),
+    # concurrent requests across tickers and per-request timeout
+    news_rss_base_url: str = Field(default="https://news.google.com/rss/search", alias="NEWS_RSS_BASE_URL")
+    news_fetch_concurrency: int = Field(default=8, alias="NEWS_FETCH_CONCURRENCY")
+    news_fetch_timeout_seconds: float = Field(default=10.0, alias="NEWS_FETCH_TIMEOUT_SECONDS")
+    # Tickers are packed into OR-grouped queries: at most this many per query / URL-encoded query length
+    news_query_max_tickers: int = Field(default=8, alias="NEWS_QUERY_MAX_TICKERS")
+    news_query_max_chars: int = Field(default=480, alias="NEWS_QUERY_MAX_CHARS")
+
+    # Quote refresh: concurrent yfinance fetches and per-ticker timeout
+    quote_refresh_workers: int = Field(default=8, alias="QUOTE_REFRESH_WORKERS")
+    quote_fetch_timeout_seconds: float = Field(default=10.0, alias="QUOTE_FETCH_TIMEOUT_SECONDS")
+
+    # Quote refresh scheduling: tier intervals (hot = watchlist + recently viewed,
+    # warm = user selections, cold = rest of universe) and per-cycle request budget
+    quote_cycle_seconds: int = Field(default=60, alias="QUOTE_CYCLE_SECONDS")
+    quote_refresh_budget: int = Field(default=300, alias="QUOTE_REFRESH_BUDGET")
+    quote_hot_window_minutes: int = Field(default=30, alias="QUOTE_HOT_WINDOW_MINUTES")
+    quote_hot_interval_seconds: int = Field(default=60, alias="QUOTE_HOT_INTERVAL_SECONDS")
+    quote_warm_interval_seconds: int = Field(default=300, alias="QUOTE_WARM_INTERVAL_SECONDS")
+    quote_cold_interval_seconds: int = Field(default=3600, alias="QUOTE_COLD_INTERVAL_SECONDS")
+
+    # /v1/stock/overview cache (per ticker, LRU-bounded)
+    overview_cache_ttl_seconds: float = Field(default=30.0, alias="OVERVIEW_CACHE_TTL_SECONDS")
+    overview_cache_size: int = Field(default=2048, alias="OVERVIEW_CACHE_SIZE")
+
+    # Markets overview snapshot (index strip): served from memory, refreshed after this TTL
+    markets_overview_ttl_seconds: int = Field(default=60, alias="MARKETS_OVERVIEW_TTL_SECONDS")
+
+    # Response compression: bodies at least this large are gzipped when the client accepts it
+    gzip_minimum_size: int = Field(default=1024, alias="GZIP_MINIMUM_SIZE")
+
+    # Screener: how long the in-memory latest-features panel is reused before a rebuild
+    screener_panel_ttl_seconds: int = Field(default=60, alias="SCREENER_PANEL_TTL_SECONDS")
+
+    # Headline sentiment: optional JSON file extending the built-in lexicon (changes its version)
+    sentiment_lexicon_path: str | None = Field(default=None, alias="SENTIMENT_LEXICON_PATH")
+    # Half-life of the decayed per-instrument news sentiment score
+    news_sentiment_half_life_hours: float = Field(default=48.0, alias="NEWS_SENTIMENT_HALF_LIFE_HOURS")
+
     jwt_secret: str = Field(default="change_me", alias="JWT_SECRET")
     jwt_algorithm: str = Field(default="HS256", alias="JWT_ALGORITHM")
     jwt_expire_minutes: int = Field(default=60 * 24, alias="JWT_EXPIRE_MINUTES")
@@ -46,6 +92,10 @@ class Settings(BaseSettings):
         default="StockGo contact@example.com",
         alias="SEC_USER_AGENT",
     )
+    # SEC fair-access limit is 10 requests/second; responses are cached gzipped on disk
+    sec_max_requests_per_second: float = Field(default=10.0, alias="SEC_MAX_REQUESTS_PER_SECOND")
+    sec_cache_dir: str = Field(default=".cache/sec", alias="SEC_CACHE_DIR")
+    sec_cik_max_age_days: int = Field(default=7, alias="SEC_CIK_MAX_AGE_DAYS")
 
     # Alpha Vantage (used for stock quotes on homepage and elsewhere)
     alpha_vantage_api_key: str | None = Field(default=None, alias="ALPHA_VANTAGE_API_KEY")
@@ -6,9 +6,19 @@ from sqlmodel import Session, select
 from app.core.config import get_settings
 from app.core.roles import ROLE_ADMIN
 from app.db.engine import get_engine
-from app.db.migrate import ensure_instruments_is_etf_column, ensure_users_role_column
+from app.db.migrate import (
+    backfill_news_instruments,
+    ensure_financials_content_hash_columns,
+    ensure_instruments_is_etf_column,
+    ensure_news_dedup_columns,
+    ensure_sec_ciks_facts_etag_column,
+    ensure_users_role_column,
+)
 from app.models.user import User
 from app.services.auth_service import hash_password, verify_password
+from app.services.fundamentals_service import backfill_financial_facts
+from app.services.news_dedup import backfill_news_hashes
+from app.services.news_sentiment_service import backfill_news_sentiment
 
 
 def ensure_seed_admin(engine) -> None:
@@ -65,5 +75,13 @@ def init_db() -> None:
     SQLModel.metadata.create_all(engine)
     ensure_instruments_is_etf_column(engine)
     ensure_users_role_column(engine)
+    ensure_news_dedup_columns(engine)
+    ensure_financials_content_hash_columns(engine)
+    ensure_sec_ciks_facts_etag_column(engine)
+    backfill_news_instruments(engine)
+    with Session(engine) as session:
+        backfill_news_hashes(session)
+        backfill_news_sentiment(session)
+        backfill_financial_facts(session)
     ensure_seed_admin(engine)
 
@@ -69,3 +69,74 @@ def ensure_users_role_column(engine) -> None:
             if "role" not in cols:
                 conn.execute(text("ALTER TABLE users ADD COLUMN role VARCHAR(32) NOT NULL DEFAULT 'member'"))
 
+
+def _column_exists(conn, dialect: str, table: str, column: str) -> bool:
+    if dialect == "mysql":
+        exists = conn.execute(
+            text(
+                """
+                SELECT COUNT(*)
+                FROM information_schema.COLUMNS
+                WHERE TABLE_SCHEMA = DATABASE()
+                  AND TABLE_NAME = :table
+                  AND COLUMN_NAME = :column
+                """
+            ),
+            {"table": table, "column": column},
+        ).scalar()
+        return int(exists or 0) > 0
+    cols = [r[1] for r in conn.execute(text(f"PRAGMA table_info('{table}')")).fetchall()]
+    return column in cols
+
+
+def ensure_news_dedup_columns(engine) -> None:
+    """Add news_items.title_hash / news_items.simhash (near-duplicate detection) for existing DBs."""
+    dialect = engine.dialect.name
+    if dialect not in ("mysql", "sqlite"):
+        return
+    with engine.begin() as conn:
+        if not _column_exists(conn, dialect, "news_items", "title_hash"):
+            conn.execute(text("ALTER TABLE news_items ADD COLUMN title_hash VARCHAR(40) NULL"))
+            conn.execute(text("CREATE INDEX ix_news_items_title_hash ON news_items (title_hash)"))
+        if not _column_exists(conn, dialect, "news_items", "simhash"):
+            conn.execute(text("ALTER TABLE news_items ADD COLUMN simhash BIGINT NULL"))
+
+
+def ensure_financials_content_hash_columns(engine) -> None:
+    """Add content_hash to the yfinance statement tables; NULL rows are rewritten once on next sync."""
+    dialect = engine.dialect.name
+    if dialect not in ("mysql", "sqlite"):
+        return
+    with engine.begin() as conn:
+        for table in ("balance_sheets", "income_statements", "cash_flow_statements"):
+            if not _column_exists(conn, dialect, table, "content_hash"):
+                conn.execute(text(f"ALTER TABLE {table} ADD COLUMN content_hash VARCHAR(40) NULL"))
+
+
+def ensure_sec_ciks_facts_etag_column(engine) -> None:
+    """Add sec_ciks.facts_etag; NULL means the next SEC sync ingests the cached filing once."""
+    dialect = engine.dialect.name
+    if dialect not in ("mysql", "sqlite"):
+        return
+    with engine.begin() as conn:
+        if not _column_exists(conn, dialect, "sec_ciks", "facts_etag"):
+            conn.execute(text("ALTER TABLE sec_ciks ADD COLUMN facts_etag VARCHAR(128) NULL"))
+
+
+def backfill_news_instruments(engine) -> None:
+    """Link pre-existing news_items rows to their instrument in news_instruments (idempotent)."""
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                """
+                INSERT INTO news_instruments (news_id, instrument_id, published_at, created_at)
+                SELECT n.id, n.instrument_id, n.published_at, n.created_at
+                FROM news_items n
+                WHERE n.instrument_id IS NOT NULL
+                  AND NOT EXISTS (
+                    SELECT 1 FROM news_instruments l
+                    WHERE l.news_id = n.id AND l.instrument_id = n.instrument_id
+                  )
+                """
+            )
+        )
@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+from typing import Any, Iterable
+
+from sqlalchemy import insert
+from sqlmodel import Session, SQLModel, select
+
+
+def bulk_upsert(
+    session: Session,
+    model: type[SQLModel],
+    rows: list[dict[str, Any]],
+    *,
+    conflict_cols: Iterable[str],
+    update_cols: Iterable[str],
+    increment_cols: Iterable[str] = (),
+    chunk_size: int = 500,
+) -> int:
+    """
+    Insert-or-update many rows keyed by a unique constraint, in as few statements as possible.
+    Uses INSERT ... ON DUPLICATE KEY UPDATE on MySQL and ON CONFLICT DO UPDATE on SQLite/Postgres.
+    `update_cols` are overwritten; `increment_cols` are added to the stored value in the same
+    statement (col = col + new), so concurrent writers never lose each other's counts.
+    Does not commit; returns the number of rows submitted.
+    """
+    if not rows:
+        return 0
+    table = model.__table__
+    conflict_cols = list(conflict_cols)
+    update_cols = list(update_cols)
+    increment_cols = list(increment_cols)
+    dialect = session.get_bind().dialect.name
+
+    for i in range(0, len(rows), chunk_size):
+        chunk = rows[i : i + chunk_size]
+        if dialect == "mysql":
+            from sqlalchemy.dialects.mysql import insert as mysql_insert
+
+            stmt = mysql_insert(table).values(chunk)
+            stmt = stmt.on_duplicate_key_update(
+                {
+                    **{c: stmt.inserted[c] for c in update_cols},
+                    **{c: table.c[c] + stmt.inserted[c] for c in increment_cols},
+                }
+            )
+        elif dialect in ("sqlite", "postgresql"):
+            if dialect == "sqlite":
+                from sqlalchemy.dialects.sqlite import insert as dialect_insert
+            else:
+                from sqlalchemy.dialects.postgresql import insert as dialect_insert
+
+            stmt = dialect_insert(table).values(chunk)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=conflict_cols,
+                set_={
+                    **{c: stmt.excluded[c] for c in update_cols},
+                    **{c: table.c[c] + stmt.excluded[c] for c in increment_cols},
+                },
+            )
+        else:
+            _upsert_fallback(
+                session,
+                model,
+                chunk,
+                conflict_cols=conflict_cols,
+                update_cols=update_cols,
+                increment_cols=increment_cols,
+            )
+            continue
+        session.execute(stmt)
+    return len(rows)
+
+
+def _upsert_fallback(
+    session: Session,
+    model: type[SQLModel],
+    rows: list[dict[str, Any]],
+    *,
+    conflict_cols: list[str],
+    update_cols: list[str],
+    increment_cols: list[str],
+) -> None:
+    # Generic path for other dialects: one lookup per row, still a single transaction.
+    for row in rows:
+        existing = session.exec(
+            select(model).where(*[getattr(model, c) == row[c] for c in conflict_cols]).with_for_update()
+        ).first()
+        if existing is None:
+            session.execute(insert(model.__table__).values(**row))
+            continue
+        for c in update_cols:
+            setattr(existing, c, row[c])
+        for c in increment_cols:
+            setattr(existing, c, getattr(existing, c) + row[c])
+        session.add(existing)
@@ -2,6 +2,8 @@ from __future__ import annotations
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from sqlmodel import Session
 
 from app.api.admin_routes import router as admin_router
 from app.api.auth_routes import router as auth_router
@@ -9,8 +11,12 @@ from app.api.routes import router
 from app.api.universe_routes import router as universe_router
 from app.api.screener_routes import router as screener_router
 from app.core.config import get_settings
+from app.db.engine import get_engine
 from app.db.init_db import init_db
+from app.services.instrument_resolver import instrument_resolver
+from app.services.news_search_index import news_search_index
 from app.services.scheduler_service import scheduler_service
+from app.services.search_index import instrument_search_index
 
 
 def create_app() -> FastAPI:
@@ -29,9 +35,16 @@ def create_app() -> FastAPI:
         allow_headers=["*"],
     )
 
+    # Chart/history payloads are large and highly repetitive; compress them on the wire.
+    app.add_middleware(GZipMiddleware, minimum_size=settings.gzip_minimum_size)
+
     @app.on_event("startup")
     def _startup():
         init_db()
+        with Session(get_engine()) as session:
+            instrument_search_index.refresh(session)
+            instrument_resolver.refresh(session)
+            news_search_index.refresh(session)
         scheduler_service.start()
 
     @app.on_event("shutdown")
@@ -3,7 +3,7 @@ from __future__ import annotations
 from datetime import date, datetime, timezone
 from typing import Any, Optional
 
-from sqlalchemy import Column, Index
+from sqlalchemy import Column, Index, UniqueConstraint
 from sqlalchemy import JSON as SA_JSON
 from sqlmodel import Field, SQLModel
 
@@ -81,6 +81,7 @@ class BalanceSheet(SQLModel, table=True):
     currency: Optional[str] = Field(default="USD", max_length=8)
     filed_at: Optional[datetime] = Field(default=None, index=True)
     data: dict[str, Any] = Field(default_factory=dict, sa_column=Column(SA_JSON))
+    content_hash: Optional[str] = Field(default=None, max_length=40)  # sha1 of canonical data JSON
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
 
@@ -104,6 +105,7 @@ class IncomeStatement(SQLModel, table=True):
     currency: Optional[str] = Field(default="USD", max_length=8)
     filed_at: Optional[datetime] = Field(default=None, index=True)
     data: dict[str, Any] = Field(default_factory=dict, sa_column=Column(SA_JSON))
+    content_hash: Optional[str] = Field(default=None, max_length=40)  # sha1 of canonical data JSON
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
 
@@ -127,6 +129,7 @@ class CashFlowStatement(SQLModel, table=True):
     currency: Optional[str] = Field(default="USD", max_length=8)
     filed_at: Optional[datetime] = Field(default=None, index=True)
     data: dict[str, Any] = Field(default_factory=dict, sa_column=Column(SA_JSON))
+    content_hash: Optional[str] = Field(default=None, max_length=40)  # sha1 of canonical data JSON
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
 
@@ -175,3 +178,50 @@ class FinancialNote(SQLModel, table=True):
     data: dict[str, Any] = Field(default_factory=dict, sa_column=Column(SA_JSON))
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
+
+class FinancialFact(SQLModel, table=True):
+    """
+    One numeric value per (instrument, statement, concept, period), flattened out of the
+    statement JSON blobs so cross-sectional queries (rank the universe by a concept)
+    run in SQL. Written by the yfinance and SEC sync paths.
+    """
+
+    __tablename__ = "financial_facts"
+    __table_args__ = (
+        UniqueConstraint(
+            "instrument_id",
+            "statement",
+            "concept",
+            "period_end",
+            "is_annual",
+            name="uq_financialfact_instrument_statement_concept_period",
+        ),
+        Index("ix_financialfact_concept_period", "concept", "period_end"),
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    instrument_id: int = Field(foreign_key="instruments.id")
+    statement: str = Field(max_length=32)  # balance_sheet / income_statement / cash_flow / shareholders_equity / us_gaap
+    concept: str = Field(max_length=160)  # e.g. 'Total Revenue' (yahoo), 'StockholdersEquity' (us-gaap)
+    period_end: date
+    fiscal_year: Optional[int] = None
+    fiscal_quarter: Optional[int] = None  # 1-4, None for annual
+    is_annual: bool = True
+    value: float
+    source: Optional[str] = Field(default=None, max_length=16)  # 'yahoo' / 'sec'
+    updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+
+class SecCik(SQLModel, table=True):
+    """Persistent ticker -> CIK map from SEC company_tickers.json (refreshed at most weekly)."""
+
+    __tablename__ = "sec_ciks"
+    __table_args__ = (UniqueConstraint("ticker", name="uq_secciks_ticker"),)
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    ticker: str = Field(max_length=32)
+    cik: str = Field(max_length=10, index=True)  # 10-digit zero-padded
+    title: Optional[str] = Field(default=None, max_length=255)
+    # ETag (or Last-Modified) of the companyfacts response last ingested and committed for this ticker.
+    facts_etag: Optional[str] = Field(default=None, max_length=128)
+    updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
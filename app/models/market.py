@@ -72,3 +72,31 @@ class StockQuote(SQLModel, table=True):
 
     updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc), index=True)
 
+
+class InstrumentStats(SQLModel, table=True):
+    """
+    Rolling per-instrument statistics derived from stored bars, refreshed on bar ingest.
+    Lets the overview endpoint skip yfinance `.info` for 52-week range, prev close, etc.
+    """
+
+    __tablename__ = "instrument_stats"
+    __table_args__ = (
+        UniqueConstraint("instrument_id", "timeframe", name="uq_instrumentstats_instrument_timeframe"),
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    instrument_id: int = Field(index=True, foreign_key="instruments.id")
+    timeframe: str = Field(max_length=16, default="1d")
+    as_of: datetime  # ts of the latest bar included
+
+    last_close: Optional[float] = None
+    prev_close: Optional[float] = None
+    high_52w: Optional[float] = None
+    low_52w: Optional[float] = None
+    avg_volume_3m: Optional[float] = None
+    return_1w: Optional[float] = None  # percent
+    return_1m: Optional[float] = None
+    return_3m: Optional[float] = None
+    return_ytd: Optional[float] = None
+
+    updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
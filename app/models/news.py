@@ -1,9 +1,9 @@
 from __future__ import annotations
 
-from datetime import datetime, timezone
+from datetime import date, datetime, timezone
 from typing import Optional
 
-from sqlalchemy import UniqueConstraint
+from sqlalchemy import BigInteger, Column, Index, UniqueConstraint
 from sqlmodel import Field, SQLModel
 
 
@@ -26,5 +26,90 @@ class NewsItem(SQLModel, table=True):
     sentiment_score: Optional[float] = None  # -1..1
     sentiment_model: Optional[str] = Field(default=None, max_length=64)
 
+    # Near-duplicate detection (syndicated copies under different URLs):
+    # sha1 of the normalized headline, and a 64-bit SimHash stored as a signed BIGINT.
+    title_hash: Optional[str] = Field(default=None, max_length=40, index=True)
+    simhash: Optional[int] = Field(default=None, sa_column=Column(BigInteger, nullable=True))
+
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
+
+class NewsInstrument(SQLModel, table=True):
+    """
+    Links an article to every ticker it was found for. news_items.instrument_id keeps
+    the first ticker only; readers go through this table.
+    """
+
+    __tablename__ = "news_instruments"
+    __table_args__ = (
+        UniqueConstraint("news_id", "instrument_id", name="uq_newsinstrument_news_instrument"),
+        Index("ix_newsinstrument_instrument_published", "instrument_id", "published_at"),
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    news_id: int = Field(index=True, foreign_key="news_items.id")
+    instrument_id: int = Field(foreign_key="instruments.id")
+    # Copied from the article so per-ticker "latest news" is a single index range scan.
+    published_at: Optional[datetime] = None
+
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+
+class NewsFeedState(SQLModel, table=True):
+    """
+    HTTP validators per news feed query, so unchanged feeds are answered with 304
+    and skipped without downloading or parsing.
+    """
+
+    __tablename__ = "news_feed_states"
+    __table_args__ = (UniqueConstraint("query", name="uq_newsfeed_query"),)
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    query: str = Field(max_length=255)
+    etag: Optional[str] = Field(default=None, max_length=255)
+    last_modified: Optional[str] = Field(default=None, max_length=64)
+    last_status: Optional[int] = None
+    fetched_at: Optional[datetime] = None
+    changed_at: Optional[datetime] = None  # last 200 response
+
+
+class NewsSentimentDaily(SQLModel, table=True):
+    """
+    Per-instrument, per-day sentiment aggregates, maintained incrementally as articles are
+    linked. Mean and spread over any window come from summing a few rows.
+    """
+
+    __tablename__ = "news_sentiment_daily"
+    __table_args__ = (UniqueConstraint("instrument_id", "day", name="uq_newssentimentdaily_instrument_day"),)
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    instrument_id: int = Field(index=True, foreign_key="instruments.id")
+    day: date  # UTC date of published_at
+
+    count: int = 0
+    score_sum: float = 0.0
+    score_sumsq: float = 0.0
+    pos_count: int = 0
+    neg_count: int = 0
+    neu_count: int = 0
+
+    updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+
+class NewsSentimentState(SQLModel, table=True):
+    """
+    Exponentially decayed running sentiment per instrument. Sums are decayed to `as_of`
+    (the newest article seen); `score` = decayed_sum / decayed_weight.
+    """
+
+    __tablename__ = "news_sentiment_state"
+    __table_args__ = (UniqueConstraint("instrument_id", name="uq_newssentimentstate_instrument"),)
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    instrument_id: int = Field(foreign_key="instruments.id")
+    as_of: datetime
+    decayed_sum: float = 0.0
+    decayed_weight: float = 0.0
+    score: float = 0.0
+
+    updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
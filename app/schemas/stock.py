@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from datetime import datetime
-from typing import Optional
+from typing import Literal, Optional
 
 from pydantic import BaseModel, Field
 
@@ -22,6 +22,22 @@ class StockOverview(BaseModel):
     fifty_two_week_high: Optional[float] = None
     fifty_two_week_low: Optional[float] = None
 
+    avg_volume: Optional[float] = Field(default=None, description="Average daily volume over ~3 months")
+    return_1w: Optional[float] = None
+    return_1m: Optional[float] = None
+    return_3m: Optional[float] = None
+    return_ytd: Optional[float] = None
+
+    updated_at: Optional[datetime] = None
+
+
+class QuoteUpdate(BaseModel):
+    ticker: str
+    last: Optional[float] = None
+    change: Optional[float] = None
+    change_percent: Optional[float] = None
+    market_cap: Optional[float] = None
+    currency: Optional[str] = None
     updated_at: Optional[datetime] = None
 
 
@@ -74,3 +90,41 @@ class ChartResponse(BaseModel):
     timeframe: str
     points: list[ChartPoint]
 
+
+class SeriesBatchRequest(BaseModel):
+    tickers: list[str] = Field(min_length=1, max_length=100)
+    days: int = Field(default=120, ge=1, le=730)
+    timeframe: str = "1d"
+    format: Literal["rows", "columnar"] = "rows"
+    fields: Optional[str] = Field(default=None, description="Comma-separated subset of fields (ts is always included)")
+    max_points: Optional[int] = Field(default=None, ge=10, le=10000)
+
+
+class HistoryBatchRequest(SeriesBatchRequest):
+    days: int = Field(default=60, ge=1, le=365)
+
+
+class ChartBatchResponse(BaseModel):
+    items: list[ChartResponse]
+    missing: list[str] = Field(default_factory=list, description="Requested tickers that are not known instruments")
+
+
+class HistoryBatchResponse(BaseModel):
+    items: list[HistoryResponse]
+    missing: list[str] = Field(default_factory=list)
+
+
+class NewsSearchResponse(BaseModel):
+    query: str
+    total: int
+    items: list[NewsItemOut]
+
+
+class NewsBatchRequest(BaseModel):
+    tickers: list[str] = Field(min_length=1, max_length=100)
+    limit: int = Field(default=20, ge=1, le=100)
+
+
+class NewsBatchResponse(BaseModel):
+    items: list[NewsListResponse]
+    missing: list[str] = Field(default_factory=list)
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from datetime import datetime
+from datetime import date, datetime
 from typing import Literal, Optional
 
 from pydantic import BaseModel
@@ -50,6 +50,34 @@ class ShortTermPage(BaseModel):
     total: int
 
 
+class ScreenerMatch(BaseModel):
+    ticker: str
+    name: Optional[str] = None
+    values: dict[str, Optional[float]]
+
+
+class ScreenerQueryPage(BaseModel):
+    expr: str
+    items: list[ScreenerMatch]
+    total: int
+
+
+class FundamentalRankRow(BaseModel):
+    ticker: str
+    name: Optional[str] = None
+    period_end: date
+    value: float  # the ranked metric
+    current: float  # latest value of the concept
+    base: Optional[float] = None  # prior-period value (growth) or denominator (ratio)
+
+
+class FundamentalRankPage(BaseModel):
+    concept: str
+    metric: str
+    items: list[FundamentalRankRow]
+    total: int
+
+
 class UniverseSyncResponse(BaseModel):
     inserted: int
     updated: int
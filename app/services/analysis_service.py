@@ -10,7 +10,7 @@ from app.models.analysis import AnalysisOutput, AnalysisRun
 from app.schemas.analysis import AnalysisReport, AnalysisRunRequest, AnalysisRunResponse
 from app.services.instrument_service import get_or_create_instrument
 from app.services.market_service import fetch_history_df, get_last_bar_ts, upsert_market_bars
-from app.services.news_service import fetch_google_news_entries, get_last_news_published_at, upsert_news_items
+from app.services.news_service import refresh_news_for_tickers
 from app.services.report_service import generate_report, load_latest_snapshot
 from app.services.technical_service import upsert_technical_features
 from app.services.timeutil import as_utc_dt
@@ -137,16 +137,9 @@ def run_analysis_sync(session: Session, req: AnalysisRunRequest) -> AnalysisRunR
         feature_start = max(start, market_fetch_start - timedelta(days=warmup_days))
         upsert_technical_features(session, instrument_id=inst.id, timeframe=req.timeframe, start=feature_start, end=end)
 
-        # 3) News (free): Google News RSS query
+        # 3) News (free): Google News RSS query, conditional GET against the stored feed validators
         if req.include_news:
-            last_news = get_last_news_published_at(session, instrument_id=inst.id)
-            news_start = start
-            if last_news:
-                # RSS is usually recent-only; still filter by range, and allow small backfill.
-                news_start = max(start, last_news - timedelta(days=3))
-            q = f"{inst.ticker} stock"
-            entries = fetch_google_news_entries(q)
-            upsert_news_items(session, instrument_id=inst.id, entries=entries, start=news_start, end=end)
+            refresh_news_for_tickers(session, [inst.ticker], start=start, end=end)
 
         # 4) Snapshot + report (rule by default; LLM if configured)
         snapshot = load_latest_snapshot(
@@ -202,11 +195,10 @@ def get_run_response(session: Session, run_id: str) -> AnalysisRunResponse:
     return AnalysisRunResponse(run_id=run.run_id, status="completed", report=report)
 
 
-def get_latest_report(session: Session, ticker: str) -> AnalysisRunResponse:
-    inst = get_or_create_instrument(session, ticker)
+def get_latest_report(session: Session, *, instrument_id: int) -> AnalysisRunResponse:
     run = session.exec(
         select(AnalysisRun)
-        .where(AnalysisRun.instrument_id == inst.id, AnalysisRun.status == "completed")
+        .where(AnalysisRun.instrument_id == instrument_id, AnalysisRun.status == "completed")
         .order_by(AnalysisRun.created_at.desc())
         .limit(1)
     ).first()
@@ -0,0 +1,75 @@
+"""
+Cheap version markers for read endpoints, used to build ETags.
+
+Bars and features are insert-only, so (count, min ts, max ts) over a window changes
+whenever the served payload would. News links are insert-only too, but stored sentiment
+is rewritten by a rescore, which also rebuilds the instrument's news_sentiment_state
+row; its updated_at therefore joins link count and max article id in the news marker.
+Each marker is a single aggregate over an indexed range.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime
+
+from sqlalchemy import func
+from sqlmodel import Session, select
+
+from app.models.analysis import AnalysisRun
+from app.models.market import MarketBar, TechnicalFeature
+from app.models.news import NewsInstrument, NewsSentimentState
+
+
+def series_marker(
+    session: Session,
+    *,
+    instrument_id: int,
+    timeframe: str,
+    start: datetime,
+    end: datetime,
+    include_features: bool,
+) -> tuple:
+    bars = session.exec(
+        select(func.count(), func.min(MarketBar.ts), func.max(MarketBar.ts)).where(
+            MarketBar.instrument_id == instrument_id,
+            MarketBar.timeframe == timeframe,
+            MarketBar.ts >= start,
+            MarketBar.ts <= end,
+        )
+    ).one()
+    if not include_features:
+        return tuple(bars)
+    feats = session.exec(
+        select(func.count(), func.max(TechnicalFeature.ts)).where(
+            TechnicalFeature.instrument_id == instrument_id,
+            TechnicalFeature.timeframe == timeframe,
+            TechnicalFeature.ts >= start,
+            TechnicalFeature.ts <= end,
+        )
+    ).one()
+    return tuple(bars) + tuple(feats)
+
+
+def news_marker(session: Session, *, instrument_id: int) -> tuple:
+    sentiment_at = (
+        select(NewsSentimentState.updated_at)
+        .where(NewsSentimentState.instrument_id == instrument_id)
+        .scalar_subquery()
+    )
+    return tuple(
+        session.exec(
+            select(func.count(), func.max(NewsInstrument.news_id), sentiment_at).where(
+                NewsInstrument.instrument_id == instrument_id
+            )
+        ).one()
+    )
+
+
+def report_marker(session: Session, *, instrument_id: int) -> tuple:
+    run = session.exec(
+        select(AnalysisRun.run_id, AnalysisRun.updated_at)
+        .where(AnalysisRun.instrument_id == instrument_id, AnalysisRun.status == "completed")
+        .order_by(AnalysisRun.created_at.desc())
+        .limit(1)
+    ).first()
+    return tuple(run) if run is not None else ()
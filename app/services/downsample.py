@@ -0,0 +1,101 @@
+"""
+Server-side downsampling of chart series to a bounded number of points.
+
+- Line series (closes, indicators): Largest-Triangle-Three-Buckets picks, per
+  bucket, the row forming the largest triangle with the previous pick and the
+  next bucket's mean, so peaks and troughs survive.
+- Candles: fixed-width OHLC bucketing (first open, max high, min low, last
+  close, summed volume); indicators take the bucket's last value.
+
+Both operate on numpy column arrays; LTTB loops over buckets only.
+"""
+
+from __future__ import annotations
+
+from typing import Sequence
+
+import numpy as np
+
+CANDLE_COLUMNS = frozenset({"open", "high", "low"})
+
+
+def _to_seconds(ts: Sequence) -> np.ndarray:
+    return np.array([t.timestamp() for t in ts], dtype=float)
+
+
+def _fill_nan(y: np.ndarray) -> np.ndarray:
+    # Indicator warm-up gaps would otherwise poison the triangle areas.
+    finite = np.isfinite(y)
+    if finite.all():
+        return y
+    return np.where(finite, y, y[finite].mean() if finite.any() else 0.0)
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """Indices of the rows kept by LTTB (always includes the first and last row)."""
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    every = (n - 2) / (n_out - 2)
+    picked = np.empty(n_out, dtype=np.int64)
+    picked[0] = 0
+    a = 0
+    for i in range(n_out - 2):
+        nxt_lo = int(np.floor((i + 1) * every)) + 1
+        nxt_hi = min(int(np.floor((i + 2) * every)) + 1, n)
+        avg_x = x[nxt_lo:nxt_hi].mean()
+        avg_y = y[nxt_lo:nxt_hi].mean()
+
+        lo = int(np.floor(i * every)) + 1
+        hi = int(np.floor((i + 1) * every)) + 1
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(np.argmax(area))
+        picked[i + 1] = a
+    picked[-1] = n - 1
+    return picked
+
+
+def _bucket_ohlc(columns: Sequence[str], arrays: dict[str, np.ndarray], n_out: int) -> dict[str, np.ndarray]:
+    n = len(arrays["ts"])
+    edges = np.unique(np.linspace(0, n, n_out + 1).astype(np.int64))
+    starts = edges[:-1]
+    lasts = edges[1:] - 1
+
+    out: dict[str, np.ndarray] = {}
+    for name in columns:
+        col = arrays[name]
+        if name == "ts" or name == "open":
+            out[name] = col[starts]
+        elif name == "high":
+            out[name] = np.fmax.reduceat(col, starts)
+        elif name == "low":
+            out[name] = np.fmin.reduceat(col, starts)
+        elif name == "volume":
+            out[name] = np.add.reduceat(np.nan_to_num(col), starts)
+        else:
+            out[name] = col[lasts]
+    return out
+
+
+def downsample_rows(columns: Sequence[str], rows: Sequence[tuple], max_points: int | None) -> Sequence[tuple]:
+    """
+    Reduce `rows` (tuples of `columns`, ts first, ordered by ts) to at most `max_points`.
+    Uses OHLC bucketing when candle columns are present, otherwise LTTB on close
+    (or on the first numeric column when close isn't projected).
+    """
+    if not max_points or len(rows) <= max_points or len(columns) < 2:
+        return rows
+
+    arrays: dict[str, np.ndarray] = {}
+    for name, values in zip(columns, zip(*rows)):
+        arrays[name] = np.array(values, dtype=object if name == "ts" else float)
+
+    if CANDLE_COLUMNS.intersection(columns):
+        out = _bucket_ohlc(columns, arrays, max_points)
+    else:
+        y_name = "close" if "close" in arrays else next(c for c in columns if c != "ts")
+        keep = lttb_indices(_to_seconds(arrays["ts"]), _fill_nan(arrays[y_name]), max_points)
+        out = {name: col[keep] for name, col in arrays.items()}
+
+    return list(zip(*(out[name].tolist() for name in columns)))
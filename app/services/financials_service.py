@@ -1,17 +1,23 @@
 from __future__ import annotations
 
-from datetime import date
-from typing import Optional
+import hashlib
+import json
+from datetime import date, datetime, timezone
+from typing import Optional, Union
 
 import numpy as np
 import pandas as pd
 import yfinance as yf
+from sqlalchemy import insert, update
 from sqlmodel import Session, select
 
 from app.models.financials import BalanceSheet, CashFlowStatement, IncomeStatement
 from app.models.instrument import Instrument
+from app.services.fundamentals_service import STATEMENT_NAMES, statement_facts, upsert_facts
 from app.services.instrument_service import get_or_create_instrument
 
+StatementModel = Union[BalanceSheet, IncomeStatement, CashFlowStatement]
+
 
 def _df_to_records(
     df: Optional[pd.DataFrame],
@@ -34,133 +40,104 @@ def _df_to_records(
     return out
 
 
-def _upsert_balance_sheets(session: Session, inst: Instrument, df: Optional[pd.DataFrame], *, is_quarterly: bool) -> int:
-    records = _df_to_records(df, is_quarterly=is_quarterly)
-    if not records:
-        return 0
-    inserted = 0
-    for period_end, data in records:
-        fy = period_end.year
-        fq = None if not is_quarterly else (period_end.month - 1) // 3 + 1
-        existing = session.exec(
-            select(BalanceSheet).where(
-                BalanceSheet.instrument_id == inst.id,
-                BalanceSheet.period_end == period_end,
-                BalanceSheet.fiscal_year == fy,
-                BalanceSheet.fiscal_quarter == fq,
-            )
-        ).first()
-        if existing:
-            existing.data = data
-            session.add(existing)
-        else:
-            bs = BalanceSheet(
-                instrument_id=inst.id,
-                period_start=None,
-                period_end=period_end,
-                fiscal_year=fy,
-                fiscal_quarter=fq,
-                currency=None,
-                filed_at=None,
-                data=data,
-            )
-            session.add(bs)
-            inserted += 1
-    session.commit()
-    return inserted
-
-
-def _upsert_income_statements(
-    session: Session, inst: Instrument, df: Optional[pd.DataFrame], *, is_quarterly: bool
-) -> int:
-    records = _df_to_records(df, is_quarterly=is_quarterly)
-    if not records:
-        return 0
-    inserted = 0
-    for period_end, data in records:
-        fy = period_end.year
-        fq = None if not is_quarterly else (period_end.month - 1) // 3 + 1
-        existing = session.exec(
-            select(IncomeStatement).where(
-                IncomeStatement.instrument_id == inst.id,
-                IncomeStatement.period_end == period_end,
-                IncomeStatement.fiscal_year == fy,
-                IncomeStatement.fiscal_quarter == fq,
-            )
-        ).first()
-        if existing:
-            existing.data = data
-            session.add(existing)
-        else:
-            row = IncomeStatement(
-                instrument_id=inst.id,
-                period_start=None,
-                period_end=period_end,
-                fiscal_year=fy,
-                fiscal_quarter=fq,
-                currency=None,
-                filed_at=None,
-                data=data,
-            )
-            session.add(row)
-            inserted += 1
-    session.commit()
-    return inserted
-
-
-def _upsert_cash_flows(
-    session: Session, inst: Instrument, df: Optional[pd.DataFrame], *, is_quarterly: bool
-) -> int:
-    records = _df_to_records(df, is_quarterly=is_quarterly)
-    if not records:
-        return 0
-    inserted = 0
-    for period_end, data in records:
-        fy = period_end.year
-        fq = None if not is_quarterly else (period_end.month - 1) // 3 + 1
-        existing = session.exec(
-            select(CashFlowStatement).where(
-                CashFlowStatement.instrument_id == inst.id,
-                CashFlowStatement.period_end == period_end,
-                CashFlowStatement.fiscal_year == fy,
-                CashFlowStatement.fiscal_quarter == fq,
+def content_hash(data: dict) -> str:
+    """sha1 of the canonical JSON of a statement's data (key order independent)."""
+    raw = json.dumps(data, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def _upsert_statements(
+    session: Session,
+    model: type[StatementModel],
+    inst: Instrument,
+    frames: list[tuple[Optional[pd.DataFrame], bool]],
+) -> tuple[int, int]:
+    """
+    Write one statement table for an instrument from (frame, is_quarterly) pairs.
+    Existing periods are prefetched in one query with their content hashes; unchanged
+    periods are skipped, changed ones are bulk-updated by primary key and new ones
+    bulk-inserted, and their values are flattened into financial_facts.
+    Does not commit; returns (inserted, updated).
+    """
+    incoming: dict[tuple[date, Optional[int]], dict] = {}
+    for df, is_quarterly in frames:
+        for period_end, data in _df_to_records(df, is_quarterly=is_quarterly):
+            fq = None if not is_quarterly else (period_end.month - 1) // 3 + 1
+            incoming[(period_end, fq)] = data
+    if not incoming:
+        return 0, 0
+
+    existing: dict[tuple[date, Optional[int]], tuple[int, Optional[str]]] = {}
+    for row_id, period_end, fq, digest in session.exec(
+        select(model.id, model.period_end, model.fiscal_quarter, model.content_hash).where(
+            model.instrument_id == inst.id
+        )
+    ).all():
+        existing.setdefault((period_end, fq), (row_id, digest))
+
+    inserts: list[dict] = []
+    updates: list[dict] = []
+    facts: list[dict] = []
+    for (period_end, fq), data in incoming.items():
+        digest = content_hash(data)
+        prev = existing.get((period_end, fq))
+        if prev is None or prev[1] != digest:
+            facts.extend(
+                statement_facts(
+                    instrument_id=inst.id,
+                    statement=STATEMENT_NAMES[model],
+                    period_end=period_end,
+                    fiscal_year=period_end.year,
+                    fiscal_quarter=fq,
+                    data=data,
+                    source="yahoo",
+                )
             )
-        ).first()
-        if existing:
-            existing.data = data
-            session.add(existing)
-        else:
-            row = CashFlowStatement(
-                instrument_id=inst.id,
-                period_start=None,
-                period_end=period_end,
-                fiscal_year=fy,
-                fiscal_quarter=fq,
-                currency=None,
-                filed_at=None,
-                data=data,
+        if prev is None:
+            inserts.append(
+                {
+                    "instrument_id": inst.id,
+                    "period_start": None,
+                    "period_end": period_end,
+                    "fiscal_year": period_end.year,
+                    "fiscal_quarter": fq,
+                    "currency": None,
+                    "filed_at": None,
+                    "data": data,
+                    "content_hash": digest,
+                    "created_at": datetime.now(timezone.utc),
+                }
             )
-            session.add(row)
-            inserted += 1
-    session.commit()
-    return inserted
+        elif prev[1] != digest:
+            updates.append({"id": prev[0], "data": data, "content_hash": digest})
 
+    if inserts:
+        session.execute(insert(model), inserts)
+    if updates:
+        session.execute(update(model), updates)
+    upsert_facts(session, facts)
+    return len(inserts), len(updates)
 
-def sync_financials_for_ticker(session: Session, ticker: str) -> None:
+
+def sync_financials_for_ticker(session: Session, ticker: str) -> dict[str, tuple[int, int]]:
     """
     Fetches financial statements from yfinance and upserts into dedicated tables
-    for a single ticker. Intended to be called from scheduler or manually.
+    for a single ticker, in one transaction. Intended to be called from scheduler or manually.
+    Returns {table: (inserted, updated)}; periods whose data is unchanged are not written.
     """
     inst = get_or_create_instrument(session, ticker)
     t = yf.Ticker(inst.ticker)
 
-    # Annual
-    _upsert_balance_sheets(session, inst, t.balance_sheet, is_quarterly=False)
-    _upsert_income_statements(session, inst, t.financials, is_quarterly=False)
-    _upsert_cash_flows(session, inst, t.cashflow, is_quarterly=False)
-
-    # Quarterly
-    _upsert_balance_sheets(session, inst, t.quarterly_balance_sheet, is_quarterly=True)
-    _upsert_income_statements(session, inst, t.quarterly_financials, is_quarterly=True)
-    _upsert_cash_flows(session, inst, t.quarterly_cashflow, is_quarterly=True)
-
+    counts = {
+        BalanceSheet.__tablename__: _upsert_statements(
+            session, BalanceSheet, inst, [(t.balance_sheet, False), (t.quarterly_balance_sheet, True)]
+        ),
+        IncomeStatement.__tablename__: _upsert_statements(
+            session, IncomeStatement, inst, [(t.financials, False), (t.quarterly_financials, True)]
+        ),
+        CashFlowStatement.__tablename__: _upsert_statements(
+            session, CashFlowStatement, inst, [(t.cashflow, False), (t.quarterly_cashflow, True)]
+        ),
+    }
+    session.commit()
+    return counts
@@ -0,0 +1,221 @@
+"""
+Long-format financial facts and cross-sectional fundamental queries.
+
+Statement sync paths flatten each period's JSON blob into `financial_facts`
+rows (one numeric value per concept) as they write it. `rank_fundamentals`
+then ranks the universe by a concept's latest value, its growth versus the
+period a year earlier, or its ratio to another concept for the same period, all in one
+SQL statement over the (concept, period_end) index.
+"""
+
+from __future__ import annotations
+
+import math
+from datetime import date, datetime, timezone
+from typing import Any, Literal, Optional
+
+from sqlalchemy import and_, func, null
+from sqlmodel import Session, select
+
+from app.db.upsert import bulk_upsert
+from app.models.financials import (
+    BalanceSheet,
+    CashFlowStatement,
+    FinancialFact,
+    IncomeStatement,
+    ShareholdersEquity,
+)
+from app.models.instrument import Instrument
+
+Metric = Literal["value", "growth", "ratio"]
+
+# How far the year-ago period may sit from 365 days back (52/53-week fiscal years, shifted quarter ends).
+YOY_TOLERANCE_DAYS = 20
+
+STATEMENT_NAMES: dict[type, str] = {
+    BalanceSheet: "balance_sheet",
+    IncomeStatement: "income_statement",
+    CashFlowStatement: "cash_flow",
+    ShareholdersEquity: "shareholders_equity",
+}
+
+
+def statement_facts(
+    *,
+    instrument_id: int,
+    statement: str,
+    period_end: date,
+    fiscal_year: Optional[int],
+    fiscal_quarter: Optional[int],
+    data: dict[str, Any],
+    source: str,
+) -> list[dict[str, Any]]:
+    """Fact rows for the finite numeric entries of one statement period."""
+    now = datetime.now(timezone.utc)
+    rows: list[dict[str, Any]] = []
+    for concept, value in data.items():
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+            continue
+        rows.append(
+            {
+                "instrument_id": instrument_id,
+                "statement": statement,
+                "concept": str(concept)[:160],
+                "period_end": period_end,
+                "fiscal_year": fiscal_year,
+                "fiscal_quarter": fiscal_quarter,
+                "is_annual": fiscal_quarter is None,
+                "value": float(value),
+                "source": source,
+                "updated_at": now,
+            }
+        )
+    return rows
+
+
+def upsert_facts(session: Session, rows: list[dict[str, Any]]) -> int:
+    """Insert-or-update fact rows (does not commit)."""
+    return bulk_upsert(
+        session,
+        FinancialFact,
+        rows,
+        conflict_cols=["instrument_id", "statement", "concept", "period_end", "is_annual"],
+        update_cols=["fiscal_year", "fiscal_quarter", "value", "source", "updated_at"],
+    )
+
+
+def backfill_financial_facts(session: Session) -> int:
+    """Flatten existing statement rows once for databases that predate financial_facts (commits)."""
+    if session.exec(select(FinancialFact.id).limit(1)).first() is not None:
+        return 0
+    total = 0
+    for model, statement in STATEMENT_NAMES.items():
+        for inst_id, period_end, fy, fq, data in session.exec(
+            select(model.instrument_id, model.period_end, model.fiscal_year, model.fiscal_quarter, model.data)
+        ).all():
+            if period_end is None or not data:
+                continue
+            if model is ShareholdersEquity:
+                # SEC rows hold a single {"concept", "value"} pair.
+                if not data.get("concept"):
+                    continue
+                data, source = {data["concept"]: data.get("value")}, "sec"
+            else:
+                source = "yahoo"
+            rows = statement_facts(
+                instrument_id=inst_id,
+                statement=statement,
+                period_end=period_end,
+                fiscal_year=fy,
+                fiscal_quarter=fq,
+                data=data,
+                source=source,
+            )
+            total += upsert_facts(session, rows)
+    session.commit()
+    return total
+
+
+def _period_values(concept: str, *, annual: bool, statement: Optional[str]):
+    """One value per (instrument, period_end); a concept reported in several statements is collapsed."""
+    q = select(
+        FinancialFact.instrument_id, FinancialFact.period_end, func.max(FinancialFact.value).label("value")
+    ).where(FinancialFact.concept == concept, FinancialFact.is_annual == annual)
+    if statement:
+        q = q.where(FinancialFact.statement == statement)
+    return q.group_by(FinancialFact.instrument_id, FinancialFact.period_end)
+
+
+def _day_number(session: Session, col):
+    """Dialect-specific day count for date arithmetic inside SQL."""
+    dialect = session.get_bind().dialect.name
+    if dialect == "mysql":
+        return func.to_days(col)
+    if dialect == "sqlite":
+        return func.julianday(col)
+    return func.extract("epoch", col) / 86400
+
+
+def rank_fundamentals(
+    session: Session,
+    concept: str,
+    *,
+    metric: Metric = "value",
+    denominator: Optional[str] = None,
+    statement: Optional[str] = None,
+    annual: bool = True,
+    descending: bool = True,
+    limit: int = 50,
+    offset: int = 0,
+) -> tuple[list[dict[str, Any]], int]:
+    """
+    Rank non-ETF instruments by their latest `concept` fact:
+    - value:  the latest value;
+    - growth: percent change vs the period ending closest to a year earlier
+              (within YOY_TOLERANCE_DAYS; instruments without one are skipped);
+    - ratio:  latest value / `denominator` for the same period.
+    Returns (page of {ticker, name, period_end, value, current, base}, total).
+    """
+    if metric == "ratio" and not denominator:
+        raise ValueError("metric=ratio requires a denominator concept")
+
+    facts = _period_values(concept, annual=annual, statement=statement).subquery("facts")
+    ranked = select(
+        facts.c.instrument_id,
+        facts.c.period_end,
+        facts.c.value,
+        func.row_number().over(partition_by=facts.c.instrument_id, order_by=facts.c.period_end.desc()).label("rn"),
+    ).subquery()
+    cur = ranked.alias("cur")
+    stmt = (
+        select(Instrument.ticker, Instrument.name, cur.c.period_end, cur.c.value.label("current"))
+        .join(cur, cur.c.instrument_id == Instrument.id)
+        .where(cur.c.rn == 1, Instrument.is_etf == False)  # noqa: E712
+    )
+    if metric == "value":
+        stmt = stmt.add_columns(cur.c.value.label("metric"), null().label("base"))
+    elif metric == "growth":
+        # Match on dates rather than row offsets so gaps and restated periods can't misalign.
+        prev = _period_values(concept, annual=annual, statement=statement).subquery("prev")
+        gap = _day_number(session, cur.c.period_end) - _day_number(session, prev.c.period_end)
+        base = (
+            select(
+                cur.c.instrument_id,
+                prev.c.value,
+                func.row_number()
+                .over(partition_by=cur.c.instrument_id, order_by=func.abs(gap - 365))
+                .label("pick"),
+            )
+            .select_from(cur)
+            .join(
+                prev,
+                and_(
+                    prev.c.instrument_id == cur.c.instrument_id,
+                    gap.between(365 - YOY_TOLERANCE_DAYS, 365 + YOY_TOLERANCE_DAYS),
+                ),
+            )
+            .where(cur.c.rn == 1)
+            .subquery("base")
+        )
+        growth = 100.0 * (cur.c.value - base.c.value) / func.abs(base.c.value)
+        stmt = (
+            stmt.join(base, and_(base.c.instrument_id == cur.c.instrument_id, base.c.pick == 1))
+            .where(base.c.value != 0)
+            .add_columns(growth.label("metric"), base.c.value.label("base"))
+        )
+    else:
+        den = _period_values(denominator, annual=annual, statement=statement).subquery("den")
+        stmt = (
+            stmt.join(den, and_(den.c.instrument_id == cur.c.instrument_id, den.c.period_end == cur.c.period_end))
+            .where(den.c.value != 0)
+            .add_columns((cur.c.value / den.c.value).label("metric"), den.c.value.label("base"))
+        )
+
+    page = stmt.subquery("page")
+    total = session.exec(select(func.count()).select_from(page)).one()
+    order = page.c.metric.desc() if descending else page.c.metric.asc()
+    rows = session.exec(select(*page.c).order_by(order, page.c.ticker).limit(limit).offset(offset)).all()
+    return [
+        {"ticker": r[0], "name": r[1], "period_end": r[2], "current": r[3], "value": r[4], "base": r[5]}
+        for r in rows
+    ], int(total)
@@ -0,0 +1,73 @@
+"""
+Process-wide, read-only ticker -> instrument map for GET endpoints.
+
+Read paths resolve tickers from memory and never create instruments, so typos
+and scanners hitting random symbols cost no database writes. The map is loaded
+at startup and refreshed after `sync_universe`; instruments created through
+write paths are added as they are created. A miss reloads the map at most once
+per `MISS_RELOAD_S`, which picks up rows inserted by other processes; concurrent
+misses share that single reload.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from sqlmodel import Session, select
+
+from app.models.instrument import Instrument
+
+MISS_RELOAD_S = 60.0
+
+
+@dataclass(frozen=True)
+class InstrumentRef:
+    id: int
+    ticker: str
+    exchange: Optional[str]
+
+
+class InstrumentResolver:
+    def __init__(self) -> None:
+        self._by_ticker: dict[str, InstrumentRef] | None = None
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+        self._reload_lock = threading.Lock()
+
+    def refresh(self, session: Session) -> int:
+        rows = session.exec(select(Instrument.id, Instrument.ticker, Instrument.exchange)).all()
+        by_ticker = {ticker: InstrumentRef(inst_id, ticker, exchange) for inst_id, ticker, exchange in rows}
+        with self._lock:
+            self._by_ticker = by_ticker
+            self._loaded_at = time.monotonic()
+        return len(by_ticker)
+
+    def add(self, inst: Instrument) -> None:
+        with self._lock:
+            if self._by_ticker is None or inst.id is None:
+                return  # not loaded yet; the first load will include it
+            # Copy-on-write so concurrent readers never see a dict being mutated.
+            self._by_ticker = {**self._by_ticker, inst.ticker: InstrumentRef(inst.id, inst.ticker, inst.exchange)}
+
+    def _lookup(self, session: Session, ticker: str) -> dict[str, InstrumentRef]:
+        by_ticker = self._by_ticker
+        if by_ticker is not None and (ticker in by_ticker or time.monotonic() - self._loaded_at < MISS_RELOAD_S):
+            return by_ticker
+        with self._reload_lock:
+            # Concurrent misses queue here; only the first reloads, the rest see its result.
+            by_ticker = self._by_ticker
+            if by_ticker is None or (
+                ticker not in by_ticker and time.monotonic() - self._loaded_at >= MISS_RELOAD_S
+            ):
+                self.refresh(session)
+            return self._by_ticker or {}
+
+    def resolve(self, session: Session, ticker: str) -> InstrumentRef | None:
+        norm = ticker.strip().upper()
+        return self._lookup(session, norm).get(norm)
+
+
+instrument_resolver = InstrumentResolver()
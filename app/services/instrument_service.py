@@ -3,6 +3,8 @@ from __future__ import annotations
 from sqlmodel import Session, select
 
 from app.models.instrument import Instrument
+from app.services.instrument_resolver import instrument_resolver
+from app.services.search_index import instrument_search_index
 
 
 def get_or_create_instrument(session: Session, ticker: str) -> Instrument:
@@ -14,5 +16,21 @@ def get_or_create_instrument(session: Session, ticker: str) -> Instrument:
     session.add(inst)
     session.commit()
     session.refresh(inst)
+    instrument_resolver.add(inst)
+    instrument_search_index.add(inst)
     return inst
 
+
+def resolve_instrument_ids(session: Session, tickers: list[str]) -> tuple[list[tuple[int, str]], list[str]]:
+    """
+    Look up many tickers in one query without creating anything.
+    Returns ([(instrument_id, ticker), ...] in request order, [unknown tickers]).
+    """
+    norm = list(dict.fromkeys(t.strip().upper() for t in tickers if t and t.strip()))
+    if not norm:
+        return [], []
+    rows = session.exec(select(Instrument.id, Instrument.ticker).where(Instrument.ticker.in_(norm))).all()
+    by_ticker = {ticker: inst_id for inst_id, ticker in rows}
+    found = [(by_ticker[t], t) for t in norm if t in by_ticker]
+    missing = [t for t in norm if t not in by_ticker]
+    return found, missing
@@ -0,0 +1,142 @@
+"""
+Local US equity session calendar (NYSE/Nasdaq rules) and refresh gating.
+
+Covers regular hours (09:30-16:00 America/New_York), exchange holidays with
+weekend observance and the 13:00 early closes. No network or data files needed.
+"""
+
+from __future__ import annotations
+
+from datetime import date, datetime, time, timedelta, timezone
+from functools import lru_cache
+from zoneinfo import ZoneInfo
+
+EXCHANGE_TZ = ZoneInfo("America/New_York")
+REGULAR_OPEN = time(9, 30)
+REGULAR_CLOSE = time(16, 0)
+EARLY_CLOSE = time(13, 0)
+
+
+def _nth_weekday(year: int, month: int, weekday: int, n: int) -> date:
+    first = date(year, month, 1)
+    offset = (weekday - first.weekday()) % 7
+    return first + timedelta(days=offset + 7 * (n - 1))
+
+
+def _last_weekday(year: int, month: int, weekday: int) -> date:
+    nxt = date(year + (month == 12), month % 12 + 1, 1)
+    last = nxt - timedelta(days=1)
+    return last - timedelta(days=(last.weekday() - weekday) % 7)
+
+
+def _easter(year: int) -> date:
+    # Anonymous Gregorian algorithm
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+
+def _observed(d: date) -> date:
+    if d.weekday() == 5:
+        return d - timedelta(days=1)
+    if d.weekday() == 6:
+        return d + timedelta(days=1)
+    return d
+
+
+@lru_cache(maxsize=64)
+def exchange_holidays(year: int) -> frozenset[date]:
+    days = {
+        _nth_weekday(year, 1, 0, 3),  # Martin Luther King Jr. Day
+        _nth_weekday(year, 2, 0, 3),  # Washington's Birthday
+        _easter(year) - timedelta(days=2),  # Good Friday
+        _last_weekday(year, 5, 0),  # Memorial Day
+        _observed(date(year, 7, 4)),  # Independence Day
+        _nth_weekday(year, 9, 0, 1),  # Labor Day
+        _nth_weekday(year, 11, 3, 4),  # Thanksgiving
+        _observed(date(year, 12, 25)),  # Christmas
+    }
+    # New Year's Day: a Saturday holiday is not observed on the prior Friday (Dec 31).
+    new_year = date(year, 1, 1)
+    if new_year.weekday() != 5:
+        days.add(_observed(new_year))
+    if year >= 2022:
+        days.add(_observed(date(year, 6, 19)))  # Juneteenth
+    return frozenset(days)
+
+
+@lru_cache(maxsize=64)
+def early_closes(year: int) -> frozenset[date]:
+    holidays = exchange_holidays(year)
+    candidates = [
+        date(year, 7, 3),  # day before Independence Day
+        _nth_weekday(year, 11, 3, 4) + timedelta(days=1),  # day after Thanksgiving
+        date(year, 12, 24),  # Christmas Eve
+    ]
+    return frozenset(d for d in candidates if d.weekday() < 5 and d not in holidays)
+
+
+def is_trading_day(d: date) -> bool:
+    return d.weekday() < 5 and d not in exchange_holidays(d.year)
+
+
+def session_bounds(d: date) -> tuple[datetime, datetime] | None:
+    """(open, close) in UTC for the exchange session on local date `d`, or None if closed."""
+    if not is_trading_day(d):
+        return None
+    close_t = EARLY_CLOSE if d in early_closes(d.year) else REGULAR_CLOSE
+    opened = datetime.combine(d, REGULAR_OPEN, tzinfo=EXCHANGE_TZ)
+    closed = datetime.combine(d, close_t, tzinfo=EXCHANGE_TZ)
+    return opened.astimezone(timezone.utc), closed.astimezone(timezone.utc)
+
+
+def is_market_open(now: datetime) -> bool:
+    bounds = session_bounds(now.astimezone(EXCHANGE_TZ).date())
+    return bounds is not None and bounds[0] <= now < bounds[1]
+
+
+def last_session_close(now: datetime) -> datetime | None:
+    """Most recent session close at or before `now` (searches back two weeks)."""
+    local = now.astimezone(EXCHANGE_TZ).date()
+    for back in range(15):
+        bounds = session_bounds(local - timedelta(days=back))
+        if bounds is not None and bounds[1] <= now:
+            return bounds[1]
+    return None
+
+
+class RefreshGate:
+    """
+    Decides whether a periodic market-data job should run at a given tick.
+
+    During a session every tick runs. Outside sessions the job pauses, except for
+    one settle run once `settle_delay` has passed after the close, and (when
+    `offhours_interval` is set) a slowed-down cadence instead of a full pause.
+    """
+
+    def __init__(self, *, settle_delay: timedelta, offhours_interval: timedelta | None = None) -> None:
+        self.settle_delay = settle_delay
+        self.offhours_interval = offhours_interval
+        self.last_run: datetime | None = None
+
+    def should_run(self, now: datetime) -> bool:
+        if is_market_open(now):
+            return True
+        close = last_session_close(now)
+        if close is not None and now >= close + self.settle_delay:
+            if self.last_run is None or self.last_run < close + self.settle_delay:
+                return True
+        if self.offhours_interval is not None:
+            return self.last_run is None or now - self.last_run >= self.offhours_interval
+        return False
+
+    def mark_ran(self, now: datetime) -> None:
+        self.last_run = now
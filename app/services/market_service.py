@@ -7,6 +7,7 @@ import yfinance as yf
 from sqlmodel import Session, select
 
 from app.models.market import MarketBar
+from app.services.stats_service import STATS_TIMEFRAME, update_instrument_stats
 
 
 def get_last_bar_ts(session: Session, *, instrument_id: int, timeframe: str) -> datetime | None:
@@ -102,5 +103,7 @@ def upsert_market_bars(
         return 0
     session.add_all(to_add)
     session.commit()
+    if timeframe == STATS_TIMEFRAME:
+        update_instrument_stats(session, instrument_id=instrument_id)
     return len(to_add)
 
@@ -1,11 +1,19 @@
 from __future__ import annotations
 
+import logging
+import threading
+import time
+from dataclasses import dataclass
 from datetime import datetime, timezone
-from typing import Any
 
+import pandas as pd
 import yfinance as yf
 
+from app.core.config import get_settings
 from app.schemas.markets import MarketItem, MarketMiniPoint, MarketsOverview
+from app.services.market_calendar import EXCHANGE_TZ
+
+logger = logging.getLogger(__name__)
 
 
 INDEXES: list[tuple[str, str]] = [
@@ -17,55 +25,128 @@ INDEXES: list[tuple[str, str]] = [
     ("GC=F", "Gold"),
 ]
 
+MINI_POINTS = 24
+
 
 def _now_utc() -> datetime:
     return datetime.now(timezone.utc)
 
 
-def get_markets_overview() -> MarketsOverview:
-    items: list[MarketItem] = []
-
-    for symbol, name in INDEXES:
-        last = None
-        change = None
-        change_pct = None
-        mini: list[MarketMiniPoint] = []
-
+def _closes_by_symbol(df: pd.DataFrame | None) -> dict[str, pd.Series]:
+    """Split a batched yfinance download (group_by='ticker') into one UTC-indexed close series per symbol."""
+    out: dict[str, pd.Series] = {}
+    if df is None or df.empty:
+        return out
+    idx = pd.DatetimeIndex(df.index)
+    idx = idx.tz_localize(timezone.utc) if idx.tz is None else idx.tz_convert(timezone.utc)
+    for symbol, _ in INDEXES:
+        try:
+            closes = df[symbol]["Close"]
+        except KeyError:
+            continue
+        closes = pd.Series(closes.to_numpy(dtype=float), index=idx).dropna()
+        closes = closes[closes != 0.0]
+        if not closes.empty:
+            out[symbol] = closes
+    return out
+
+
+def _item_from_closes(symbol: str, name: str, closes: pd.Series | None) -> MarketItem:
+    if closes is None or closes.empty:
+        return MarketItem(symbol=symbol, name=name)
+
+    last = float(closes.iloc[-1])
+    # Previous close = last hourly close of the prior exchange session date.
+    session_dates = closes.index.tz_convert(EXCHANGE_TZ).date
+    prior = closes[session_dates < session_dates[-1]]
+    change = None
+    change_pct = None
+    if not prior.empty:
+        prev = float(prior.iloc[-1])
+        change = last - prev
+        change_pct = 100.0 * change / prev
+
+    tail = closes.tail(MINI_POINTS)
+    mini = [
+        MarketMiniPoint(ts=ts.to_pydatetime(), value=float(v))
+        for ts, v in zip(tail.index, tail.to_numpy())
+    ]
+    return MarketItem(symbol=symbol, name=name, last=last, change=change, change_percent=change_pct, mini=mini)
+
+
+def build_markets_overview() -> MarketsOverview:
+    """Fetch every index in one batched yfinance download (5 days of hourly bars)."""
+    df = yf.download(
+        [symbol for symbol, _ in INDEXES],
+        period="5d",
+        interval="1h",
+        group_by="ticker",
+        auto_adjust=False,
+        progress=False,
+        threads=True,
+    )
+    closes = _closes_by_symbol(df)
+    return MarketsOverview(items=[_item_from_closes(symbol, name, closes.get(symbol)) for symbol, name in INDEXES])
+
+
+@dataclass(frozen=True)
+class _Snapshot:
+    overview: MarketsOverview
+    built_at: float
+
+
+class MarketsOverviewCache:
+    """
+    Immutable snapshot with a TTL and stale-while-revalidate: a stale snapshot is
+    served immediately while a single background refresh runs.
+    """
+
+    def __init__(self) -> None:
+        self._snap: _Snapshot | None = None
+        self._refresh_lock = threading.Lock()
+
+    def refresh(self) -> MarketsOverview | None:
         try:
-            t = yf.Ticker(symbol)
-            fast: dict[str, Any] = getattr(t, "fast_info", None) or {}
-
-            last = fast.get("last_price") or fast.get("lastPrice")
-            prev = fast.get("previous_close") or fast.get("previousClose")
-            if last is not None and prev:
-                change = float(last) - float(prev)
-                change_pct = 100.0 * change / float(prev)
-
-            hist = t.history(period="5d", interval="1h")
-            if hist is not None and not hist.empty:
-                hist = hist.tail(24)
-                for ts, row in hist.iterrows():
-                    v = float(row.get("Close") or row.get("close") or row.get("Adj Close") or 0.0)
-                    if v:
-                        if ts.tzinfo is None:
-                            ts = ts.tz_localize(timezone.utc)
-                        else:
-                            ts = ts.tz_convert(timezone.utc)
-                        mini.append(MarketMiniPoint(ts=ts, value=v))
-        except Exception:
-            # Keep empty/partial item on error
-            pass
-
-        items.append(
-            MarketItem(
-                symbol=symbol,
-                name=name,
-                last=float(last) if last is not None else None,
-                change=change,
-                change_percent=change_pct,
-                mini=mini,
-            )
-        )
-
-    return MarketsOverview(items=items)
+            overview = build_markets_overview()
+        except Exception as e:
+            logger.warning("markets overview refresh failed: %s", e)
+            return None
+        # Don't replace a good snapshot with an all-empty one from a provider hiccup.
+        if self._snap is None or any(i.last is not None for i in overview.items):
+            self._snap = _Snapshot(overview=overview, built_at=time.monotonic())
+        return overview
+
+    def _refresh_in_background(self) -> None:
+        if not self._refresh_lock.acquire(blocking=False):
+            return  # a refresh is already running
+
+        def _run() -> None:
+            try:
+                self.refresh()
+            finally:
+                self._refresh_lock.release()
+
+        threading.Thread(target=_run, name="markets-overview-refresh", daemon=True).start()
+
+    def get(self) -> MarketsOverview:
+        ttl = get_settings().markets_overview_ttl_seconds
+        snap = self._snap
+        if snap is not None:
+            if time.monotonic() - snap.built_at >= ttl:
+                self._refresh_in_background()
+            return snap.overview
+
+        with self._refresh_lock:
+            if self._snap is None:
+                self.refresh()
+        snap = self._snap
+        if snap is None:
+            return MarketsOverview(items=[MarketItem(symbol=s, name=n) for s, n in INDEXES])
+        return snap.overview
+
+
+markets_overview_cache = MarketsOverviewCache()
 
+
+def get_markets_overview() -> MarketsOverview:
+    return markets_overview_cache.get()
@@ -0,0 +1,176 @@
+"""
+Headline normalization and near-duplicate detection for news articles.
+
+Exact duplicates share a normalized-title hash. Syndicated rewrites ("Tesla shares
+jump after deliveries" vs "Tesla stock jumps after deliveries beat") are caught by a
+64-bit SimHash over character 4-grams of a canonical form of the headline: stopwords
+and attributions ("analysts say") dropped, common market verbs and "shares"/"stock"
+folded together, plural -s stripped. Hashes within NEAR_DUP_MAX_DISTANCE bits are
+candidates; a candidate is only accepted when one headline's key terms (first word,
+capitalized words, numbers) are a subset of the other's, so templated headlines about
+different tickers ("AAPL stock hits 52-week high" / "MSFT stock hits 52-week high")
+never merge.
+
+    >>> is_near_duplicate("Tesla shares jump after deliveries", "Tesla stock jumps after deliveries beat")
+    True
+    >>> is_near_duplicate("AAPL stock hits 52-week high", "MSFT stock hits 52-week high")
+    False
+"""
+
+from __future__ import annotations
+
+import hashlib
+import re
+from typing import Callable, Optional, Sequence
+
+import numpy as np
+from sqlmodel import Session, select
+
+from app.models.news import NewsItem
+
+# Calibrated on rewrite pairs (word swaps, added attributions, synonym verbs: 0-7 bits)
+# against templated cross-ticker headlines, which the key-term check rejects.
+NEAR_DUP_MAX_DISTANCE = 8
+
+_WORD = re.compile(r"[a-z0-9]+")
+_RAW_WORD = re.compile(r"[A-Za-z0-9]+")
+_SHINGLE = 4
+_BIT_WEIGHTS = np.array([1 << i for i in range(64)], dtype=np.uint64)
+
+_STOPWORDS = frozenset(
+    {
+        "a", "an", "the", "of", "from", "to", "in", "on", "at", "for", "and", "as", "by", "with",
+        "its", "after", "amid", "over", "is", "are", "be", "says", "say", "said", "analysts",
+        "analyst", "report", "reports", "reportedly",
+    }
+)
+_SYNONYMS: dict[str, str] = {
+    w: canon
+    for canon, words in {
+        "rise": "rise rises rising rose jump jumps jumped jumping surge surges surged surging soar soars soared "
+        "soaring rally rallies rallied rallying climb climbs climbed climbing gain gains gained gaining "
+        "spike spikes spiked",
+        "fall": "fall falls fell falling drop drops dropped dropping slide slides slid sliding sink sinks sank "
+        "sinking tumble tumbles tumbled tumbling plunge plunges plunged plunging slump slumps slumped "
+        "decline declines declined dive dives dived",
+        "stock": "stock stocks share shares",
+    }.items()
+    for w in words.split()
+}
+
+
+def normalize_title(title: str) -> str:
+    return " ".join(_WORD.findall(title.lower()))
+
+
+def title_hash(normalized: str) -> str:
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+
+
+def _canonical(normalized: str) -> str:
+    words: list[str] = []
+    for w in normalized.split():
+        if w in _STOPWORDS:
+            continue
+        w = _SYNONYMS.get(w, w)
+        if len(w) > 3 and w.endswith("s") and not w.endswith("ss"):
+            w = w[:-1]
+        words.append(w)
+    return " ".join(words)
+
+
+def _feature_hashes(normalized: str) -> np.ndarray:
+    text = f" {_canonical(normalized)} "
+    features = {text[i : i + _SHINGLE] for i in range(len(text) - _SHINGLE + 1)} if text.strip() else set()
+    return np.array(
+        [int.from_bytes(hashlib.blake2b(f.encode("utf-8"), digest_size=8).digest(), "little") for f in features],
+        dtype=np.uint64,
+    )
+
+
+def simhash64(normalized: str) -> int:
+    """64-bit SimHash as a signed int (fits a BIGINT column)."""
+    hashes = _feature_hashes(normalized)
+    if hashes.size == 0:
+        return 0
+    bits = (hashes[:, None] & _BIT_WEIGHTS[None, :]) != 0
+    votes = bits.sum(axis=0) * 2 - hashes.size
+    value = int(_BIT_WEIGHTS[votes > 0].sum(dtype=np.uint64))
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+def hamming_distances(pool: np.ndarray, value: int) -> np.ndarray:
+    """Bit distance from `value` to each entry of an int64 SimHash array."""
+    x = np.bitwise_xor(pool.astype(np.int64).view(np.uint64), np.int64(value).view(np.uint64))
+    return np.unpackbits(x.view(np.uint8).reshape(-1, 8), axis=1).sum(axis=1)
+
+
+def key_terms(title: str) -> frozenset[str]:
+    """Lowercased first word, capitalized words and numbers: what a headline is about."""
+    words = _RAW_WORD.findall(title)
+    keys = {w.lower() for w in words[1:] if not w.islower()}
+    if words:
+        keys.add(words[0].lower())
+    return frozenset(keys)
+
+
+def same_subject(a: frozenset[str], b: frozenset[str]) -> bool:
+    return a <= b or b <= a
+
+
+def is_near_duplicate(a: str, b: str) -> bool:
+    """Whether two headlines would be merged as copies of one article."""
+    distance = hamming_distances(as_pool([simhash64(normalize_title(a))]), simhash64(normalize_title(b)))[0]
+    return bool(distance <= NEAR_DUP_MAX_DISTANCE) and same_subject(key_terms(a), key_terms(b))
+
+
+def nearest_duplicate(
+    pool: np.ndarray,
+    value: int,
+    max_distance: int = NEAR_DUP_MAX_DISTANCE,
+    accept: Optional[Callable[[int], bool]] = None,
+) -> int | None:
+    """Index of the closest entry in `pool` within `max_distance` that `accept` allows, or None."""
+    if pool.size == 0:
+        return None
+    d = hamming_distances(pool, value)
+    for i in np.flatnonzero(d <= max_distance)[np.argsort(d[d <= max_distance], kind="stable")]:
+        if accept is None or accept(int(i)):
+            return int(i)
+    return None
+
+
+def backfill_news_hashes(session: Session, *, chunk_size: int = 1000) -> int:
+    """
+    Fill title_hash/simhash for articles stored before dedup columns existed, and
+    recompute every simhash once when the hashing scheme has changed (detected by
+    re-hashing the newest article).
+    """
+    newest = session.exec(
+        select(NewsItem.title, NewsItem.simhash)
+        .where(NewsItem.title_hash.is_not(None), NewsItem.simhash.is_not(None))
+        .order_by(NewsItem.id.desc())
+        .limit(1)
+    ).first()
+    rehash_all = newest is not None and newest[1] != simhash64(normalize_title(newest[0]))
+    updated = 0
+    last_id = 0
+    while True:
+        stmt = select(NewsItem).where(NewsItem.id > last_id).order_by(NewsItem.id).limit(chunk_size)
+        if not rehash_all:
+            stmt = stmt.where(NewsItem.title_hash.is_(None))
+        rows = session.exec(stmt).all()
+        if not rows:
+            return updated
+        for n in rows:
+            norm = normalize_title(n.title)
+            n.title_hash = title_hash(norm)
+            n.simhash = simhash64(norm)
+            session.add(n)
+        session.commit()
+        last_id = rows[-1].id
+        updated += len(rows)
+
+
+def as_pool(values: Sequence[int]) -> np.ndarray:
+    return np.array(values, dtype=np.int64)
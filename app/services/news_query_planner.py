@@ -0,0 +1,200 @@
+"""
+Grouped Google News queries for many tickers.
+
+Instead of one `"{ticker} stock"` feed per ticker, `plan_news_queries` packs
+several tickers (symbol plus cleaned company name) into one OR-grouped query,
+bounded by NEWS_QUERY_MAX_TICKERS, the URL-encoded length NEWS_QUERY_MAX_CHARS and
+QUERY_MAX_LEN raw characters (the width of news_feed_states.query).
+Groups are formed over tickers in sorted order so the same query strings (and
+their stored ETags) recur from cycle to cycle.
+
+Entries returned for a group are routed back to its tickers by `EntityIndex`,
+which matches symbols and the distinctive leading words of company names in
+headlines ("JPMorgan Chase & Co." matches "JPMorgan ...", "Bank of America Corp"
+needs "Bank of America"). Entries that match no ticker are counted and logged.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from typing import Iterable, Optional
+from urllib.parse import quote_plus
+
+from app.models.instrument import Instrument
+
+QUERY_SUFFIX = "stock"
+# news_feed_states.query is VARCHAR(255); a longer query could not store its validators.
+QUERY_MAX_LEN = 255
+
+# Legal-form and share-class noise stripped from company names before matching.
+_NAME_NOISE = frozenset(
+    {
+        "inc", "incorporated", "corp", "corporation", "co", "company", "ltd", "limited", "plc",
+        "holdings", "holding", "group", "sa", "nv", "ag", "se", "lp", "llc", "the", "class",
+        "com", "adr", "ads", "shares", "common", "stock", "ordinary",
+    }
+)
+# Words of a name or headline; "at&t" and "mcdonald's" stay single tokens, a standalone "&" is "and".
+# Listing descriptions after a dash: "ASML Holding N.V. - New York Registry Shares".
+_LISTING_SUFFIX = re.compile(r"\s+[-\u2013\u2014]\s+.*$")
+_WORD = re.compile(r"[a-z0-9]+(?:[&'][a-z0-9]+)*|&")
+_CONNECTORS = frozenset({"and", "of", "the", "for", "de"})
+# Leading name words too common to identify a company on their own.
+_GENERIC = frozenset(
+    {
+        "american", "america", "first", "united", "national", "international", "global", "general",
+        "new", "bank", "royal", "southern", "northern", "western", "eastern", "central", "pacific",
+        "energy", "financial", "capital", "health", "digital", "advanced", "applied", "universal",
+        "world", "one", "life", "mutual", "federal", "public", "private", "great", "north", "south",
+        "east", "west", "best", "big", "home",
+    }
+)
+# Symbols written as $AAPL, (AAPL), NASDAQ:AAPL / NYSE: AAPL.
+_TAGGED_SYMBOL = re.compile(r"(?:\$|\(|\b(?:NASDAQ|NYSE|AMEX|NYSEARCA|OTC)\s*:\s*)([A-Z][A-Z0-9.\-]{0,9})\b")
+_BARE_SYMBOL = re.compile(r"\b[A-Z][A-Z0-9]{1,9}(?:[.\-][A-Z])?\b")
+
+
+def name_words(text: str) -> list[str]:
+    """Lowercased tokens, normalized the same way for company names and headlines."""
+    return ["and" if w == "&" else w for w in _WORD.findall(text.lower().replace("\u2019", "'"))]
+
+
+def company_terms(name: Optional[str]) -> tuple[str, ...]:
+    """
+    Lowercased name tokens with listing descriptions, legal suffixes and trailing connectors
+    removed: 'Apple Inc.' -> ('apple',), 'JPMorgan Chase & Co.' -> ('jpmorgan', 'chase'),
+    'AT&T Inc.' -> ('at&t',), 'ASML Holding N.V. - New York Registry Shares' -> ('asml',).
+    """
+    if not name:
+        return ()
+    words = name_words(_LISTING_SUFFIX.sub("", name))
+    while words and (
+        words[-1] in _NAME_NOISE or words[-1] in _CONNECTORS or (len(words) > 1 and len(words[-1]) == 1)
+    ):
+        words.pop()
+    if words and words[0] == "the":
+        words = words[1:]
+    return tuple(words)
+
+
+def distinctive_terms(name_terms: tuple[str, ...]) -> tuple[str, ...]:
+    """
+    Shortest leading run of `name_terms` ending in a distinctive word, which is what
+    headlines actually use: ('meta', 'platforms') -> ('meta',),
+    ('bank', 'of', 'america') -> ('bank', 'of', 'america').
+    """
+    for i, w in enumerate(name_terms):
+        if w not in _GENERIC and w not in _CONNECTORS and len(w) >= 3:
+            return name_terms[: i + 1]
+    return name_terms
+
+
+@dataclass(frozen=True)
+class TickerAlias:
+    ticker: str
+    name_terms: tuple[str, ...]
+
+    def query_terms(self) -> list[str]:
+        terms = [self.ticker]
+        if self.name_terms and " ".join(self.name_terms).upper() != self.ticker:
+            terms.append(f'"{" ".join(self.name_terms)}"')
+        return terms
+
+
+@dataclass(frozen=True)
+class QueryGroup:
+    query: str
+    tickers: tuple[str, ...]
+
+
+def aliases_for(instruments: Iterable[Instrument]) -> list[TickerAlias]:
+    return [TickerAlias(inst.ticker, company_terms(inst.name)) for inst in instruments]
+
+
+def _group_query(aliases: list[TickerAlias]) -> str:
+    terms = [t for a in aliases for t in a.query_terms()]
+    inner = " OR ".join(terms)
+    return f"({inner}) {QUERY_SUFFIX}" if len(terms) > 1 else f"{inner} {QUERY_SUFFIX}"
+
+
+def plan_news_queries(aliases: list[TickerAlias], *, max_tickers: int, max_chars: int) -> list[QueryGroup]:
+    """
+    Greedily pack tickers (sorted) into OR-grouped queries. A ticker whose own terms exceed
+    `max_chars` still gets a query of its own; one longer than QUERY_MAX_LEN is searched by
+    symbol only.
+    """
+
+    def too_long(group: list[TickerAlias]) -> bool:
+        query = _group_query(group)
+        return len(query) > QUERY_MAX_LEN or len(quote_plus(query)) > max_chars
+
+    groups: list[QueryGroup] = []
+    current: list[TickerAlias] = []
+    for alias in sorted({a.ticker: a for a in aliases}.values(), key=lambda a: a.ticker):
+        if len(_group_query([alias])) > QUERY_MAX_LEN:
+            alias = TickerAlias(alias.ticker, ())
+        trial = current + [alias]
+        if current and (len(trial) > max(1, max_tickers) or too_long(trial)):
+            groups.append(QueryGroup(_group_query(current), tuple(a.ticker for a in current)))
+            trial = [alias]
+        current = trial
+    if current:
+        groups.append(QueryGroup(_group_query(current), tuple(a.ticker for a in current)))
+    return groups
+
+
+class EntityIndex:
+    """
+    Symbol and company-name lookup over a set of instruments. Symbols match when tagged
+    ($AAPL, (AAPL), NASDAQ: AAPL) or, for two or more characters, as an uppercase word;
+    names match as whole-token sequences, case-insensitively.
+    """
+
+    def __init__(self, aliases: Iterable[TickerAlias]) -> None:
+        self._symbols: dict[str, str] = {}
+        self._names: dict[str, list[tuple[tuple[str, ...], str]]] = {}
+        for a in aliases:
+            self._symbols[a.ticker] = a.ticker
+            # Dotted share classes are often written with a dash (BRK.B / BRK-B).
+            self._symbols[a.ticker.replace(".", "-")] = a.ticker
+            terms = distinctive_terms(a.name_terms)
+            if terms:
+                self._names.setdefault(terms[0], []).append((terms, a.ticker))
+
+    def match(self, text: str, *, within: Optional[set[str]] = None) -> set[str]:
+        found: set[str] = set()
+        for sym in _TAGGED_SYMBOL.findall(text):
+            t = self._symbols.get(sym)
+            if t:
+                found.add(t)
+        for sym in _BARE_SYMBOL.findall(text):
+            t = self._symbols.get(sym)
+            if t:
+                found.add(t)
+        words = name_words(text)
+        for i, w in enumerate(words):
+            for terms, ticker in self._names.get(w, ()):
+                if tuple(words[i : i + len(terms)]) == terms:
+                    found.add(ticker)
+        return found & within if within is not None else found
+
+    def route(self, group: QueryGroup, entries: list[dict]) -> tuple[dict[str, list[dict]], list[dict]]:
+        """
+        Assign a group's feed entries to the tickers they mention; returns (routed, unmatched).
+        Entries from a single-ticker query belong to that ticker. Unmatched entries of larger
+        groups (the hit was in text we don't see) are returned for the caller to report.
+        """
+        out: dict[str, list[dict]] = {t: [] for t in group.tickers}
+        if len(group.tickers) == 1:
+            out[group.tickers[0]] = list(entries)
+            return out, []
+        members = set(group.tickers)
+        unmatched: list[dict] = []
+        for e in entries:
+            hits = self.match(e["title"], within=members)
+            for t in hits:
+                out[t].append(e)
+            if not hits:
+                unmatched.append(e)
+        return out, unmatched
@@ -0,0 +1,246 @@
+"""
+In-process full-text index over stored news headlines and sources.
+
+An inverted index maps each term to the articles containing it as (publish time,
+id) pairs kept in time order, so a time range is cut out of each posting list by
+bisection before clauses are intersected. Each article's token sequence is kept
+alongside. Queries support
+plain terms (all must match), "quoted phrases" and `prefix*` terms, plus a
+publish-time range. Results are ranked by BM25 over the query terms each
+article actually contains (for a prefix, the expansions it contains), newest
+first on ties.
+
+The index is loaded on first use, extended as ingested articles are committed in
+this process, and catches up on rows written elsewhere at most once per CATCH_UP_S.
+Search returns ids only; callers fetch the rows by primary key.
+"""
+
+from __future__ import annotations
+
+import math
+import re
+import threading
+import time
+from bisect import bisect_left, bisect_right, insort
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Iterable, Optional
+
+from sqlmodel import Session, select
+
+from app.models.news import NewsItem
+from app.services.timeutil import as_utc_dt
+
+CATCH_UP_S = 30.0
+# BM25 term-frequency saturation and length normalization.
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+_WORD = re.compile(r"[a-z0-9]+")
+_QUERY_PART = re.compile(r'"([^"]*)"|(\S+)')
+# Separates title and source tokens so phrases never span the two.
+_FIELD_BREAK = "\x00"
+
+
+def _tokens(text: Optional[str]) -> list[str]:
+    return _WORD.findall((text or "").lower())
+
+
+@dataclass(frozen=True)
+class _Clause:
+    kind: str  # "term" | "prefix" | "phrase"
+    tokens: tuple[str, ...]
+
+
+def parse_query(query: str) -> list[_Clause]:
+    """Split a query into clauses; raises ValueError when nothing searchable remains."""
+    clauses: list[_Clause] = []
+    for phrase, word in _QUERY_PART.findall(query):
+        if phrase:
+            toks = tuple(_tokens(phrase))
+            if len(toks) > 1:
+                clauses.append(_Clause("phrase", toks))
+            elif toks:
+                clauses.append(_Clause("term", toks))
+            continue
+        prefix = word.endswith("*")
+        for i, tok in enumerate(toks := _tokens(word)):
+            last = i == len(toks) - 1
+            clauses.append(_Clause("prefix" if prefix and last else "term", (tok,)))
+    if not clauses:
+        raise ValueError("Query has no searchable terms")
+    return clauses
+
+
+class NewsSearchIndex:
+    def __init__(self) -> None:
+        self._docs: dict[int, tuple[float, tuple[str, ...]]] = {}
+        self._postings: dict[str, list[tuple[float, int]]] = {}  # term -> sorted (ts, id)
+        self._sorted_terms: list[str] | None = None
+        self._total_len = 0
+        self._max_loaded_id = 0
+        self._loaded = False
+        self._caught_up_at = 0.0
+        self._lock = threading.RLock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def _add(self, news_id: int, title: str, source: Optional[str], published_at: Optional[datetime]) -> None:
+        if news_id in self._docs:
+            return
+        toks = tuple(_tokens(title) + [_FIELD_BREAK] + _tokens(source))
+        ts = as_utc_dt(published_at).timestamp() if published_at else 0.0
+        self._docs[news_id] = (ts, toks)
+        self._total_len += len(toks)
+        key = (ts, news_id)
+        for term in set(toks):
+            if term == _FIELD_BREAK:
+                continue
+            posting = self._postings.get(term)
+            if posting is None:
+                self._postings[term] = [key]
+                if self._sorted_terms is not None:
+                    insort(self._sorted_terms, term)
+            elif posting[-1] <= key:
+                posting.append(key)  # the usual case: newest article
+            else:
+                insort(posting, key)
+
+    def add_items(self, rows: Iterable[tuple[int, str, Optional[str], Optional[datetime]]]) -> None:
+        """
+        Index committed articles given as (id, title, source, published_at)
+        (no-op until the index has been loaded).
+        """
+        with self._lock:
+            if not self._loaded:
+                return  # the first load will include them
+            for news_id, title, source, published_at in rows:
+                self._add(news_id, title, source, published_at)
+
+    def _load_since(self, session: Session, after_id: int) -> int:
+        # Publish-time order keeps posting inserts at the tail.
+        rows = session.exec(
+            select(NewsItem.id, NewsItem.title, NewsItem.source, NewsItem.published_at)
+            .where(NewsItem.id > after_id)
+            .order_by(NewsItem.published_at, NewsItem.id)
+        ).all()
+        for news_id, title, source, published_at in rows:
+            self._add(news_id, title, source, published_at)
+        if rows:
+            self._max_loaded_id = max(self._max_loaded_id, max(r[0] for r in rows))
+        return len(rows)
+
+    def refresh(self, session: Session) -> int:
+        """Rebuild from news_items."""
+        with self._lock:
+            self._docs.clear()
+            self._postings.clear()
+            self._sorted_terms = None
+            self._total_len = 0
+            self._max_loaded_id = 0
+            self._load_since(session, 0)
+            self._sorted_terms = sorted(self._postings)
+            self._loaded = True
+            self._caught_up_at = time.monotonic()
+            return len(self._docs)
+
+    def ensure_fresh(self, session: Session) -> None:
+        if self._loaded and time.monotonic() - self._caught_up_at < CATCH_UP_S:
+            return
+        with self._lock:
+            if not self._loaded:
+                self.refresh(session)
+            elif time.monotonic() - self._caught_up_at >= CATCH_UP_S:
+                self._load_since(session, self._max_loaded_id)
+                self._caught_up_at = time.monotonic()
+
+    def _prefix_terms(self, prefix: str) -> list[str]:
+        if self._sorted_terms is None:
+            self._sorted_terms = sorted(self._postings)
+        terms = self._sorted_terms
+        out: list[str] = []
+        for i in range(bisect_left(terms, prefix), len(terms)):
+            if not terms[i].startswith(prefix):
+                break
+            out.append(terms[i])
+        return out
+
+    @staticmethod
+    def _window(posting: list[tuple[float, int]], lo: float, hi: float) -> list[tuple[float, int]]:
+        return posting[bisect_left(posting, (lo, -math.inf)) : bisect_right(posting, (hi, math.inf))]
+
+    def _idf(self, df: int) -> float:
+        return math.log(1.0 + len(self._docs) / max(1, df))
+
+    @staticmethod
+    def _has_phrase(toks: tuple[str, ...], phrase: tuple[str, ...]) -> bool:
+        n = len(phrase)
+        return any(toks[i : i + n] == phrase for i in range(len(toks) - n + 1))
+
+    def search(
+        self,
+        query: str,
+        *,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        limit: int = 20,
+        offset: int = 0,
+    ) -> tuple[list[int], int]:
+        """([news ids ranked], total matches)."""
+        clauses = parse_query(query)
+        lo = as_utc_dt(start).timestamp() if start else -math.inf
+        hi = as_utc_dt(end).timestamp() if end else math.inf
+
+        with self._lock:
+            # Per clause: candidate ids inside [lo, hi]. `weights` holds the IDF of every term
+            # that can score (prefix expansions included); each article is scored on its own terms.
+            matched: list[set[int]] = []
+            weights: dict[str, float] = {}
+            for c in clauses:
+                if c.kind == "prefix":
+                    ids: set[int] = set()
+                    for term in self._prefix_terms(c.tokens[0]):
+                        posting = self._postings[term]
+                        ids.update(news_id for _, news_id in self._window(posting, lo, hi))
+                        weights[term] = self._idf(len(posting))
+                else:
+                    postings = [self._postings.get(t, []) for t in c.tokens]
+                    windows = [self._window(p, lo, hi) for p in postings]
+                    ids = {news_id for _, news_id in min(windows, key=len)}
+                    for w in windows:
+                        ids.intersection_update(news_id for _, news_id in w)
+                    for t, p in zip(c.tokens, postings):
+                        weights[t] = self._idf(len(p))
+                if not ids:
+                    return [], 0
+                matched.append(ids)
+
+            matched.sort(key=len)
+            candidates = set(matched[0])
+            for ids in matched[1:]:
+                candidates.intersection_update(ids)
+
+            phrases = [c.tokens for c in clauses if c.kind == "phrase"]
+            avg_len = self._total_len / max(1, len(self._docs))
+            hits: list[tuple[float, float, int]] = []
+            for news_id in candidates:
+                ts, toks = self._docs[news_id]
+                if phrases and not all(self._has_phrase(toks, p) for p in phrases):
+                    continue
+                norm = BM25_K1 * (1.0 - BM25_B + BM25_B * len(toks) / avg_len)
+                score = 0.0
+                for term, tf in Counter(t for t in toks if t in weights).items():
+                    score += weights[term] * tf * (BM25_K1 + 1.0) / (tf + norm)
+                hits.append((score, ts, news_id))
+
+        hits.sort(reverse=True)
+        return [news_id for _, _, news_id in hits[offset : offset + limit]], len(hits)
+
+
+news_search_index = NewsSearchIndex()
@@ -0,0 +1,188 @@
+"""
+Incrementally maintained news sentiment rollups per instrument.
+
+`record_news_sentiment` is called when articles are linked to an instrument and
+folds their scores into:
+- news_sentiment_daily: count / sum / sum of squares / label counts per UTC day;
+- news_sentiment_state: an exponentially decayed running score (half-life
+  NEWS_SENTIMENT_HALF_LIFE_HOURS).
+
+Reports and the screener read these rows instead of scanning news_items.
+`rebuild_news_sentiment` recomputes both tables from scratch (after a rescore).
+"""
+
+from __future__ import annotations
+
+import math
+from datetime import date, datetime, time, timezone
+from typing import Iterable
+
+from sqlalchemy import delete
+from sqlmodel import Session, select
+
+from app.core.config import get_settings
+from app.db.upsert import bulk_upsert
+from app.models.news import NewsInstrument, NewsItem, NewsSentimentDaily, NewsSentimentState
+from app.services.timeutil import as_utc_dt
+
+# (instrument_id, published_at, sentiment_label, sentiment_score)
+SentimentEntry = tuple[int, datetime | None, str | None, float | None]
+
+_DAILY_FIELDS = ("count", "score_sum", "score_sumsq", "pos_count", "neg_count", "neu_count")
+_LABEL_FIELD = {"POS": "pos_count", "NEG": "neg_count"}
+
+
+def _decay_rate() -> float:
+    """Per-second decay constant from the configured half-life."""
+    return math.log(2.0) / (get_settings().news_sentiment_half_life_hours * 3600.0)
+
+
+def record_news_sentiment(session: Session, entries: Iterable[SentimentEntry]) -> int:
+    """
+    Fold newly linked articles into the daily rollups and decayed state (does not commit).
+    Articles without a publish time count as published now. Returns the number of entries.
+    """
+    now = datetime.now(timezone.utc)
+    daily: dict[tuple[int, date], dict[str, float]] = {}
+    points: dict[int, list[tuple[datetime, float]]] = {}
+    n = 0
+    for instrument_id, published_at, label, score in entries:
+        ts = as_utc_dt(published_at) if published_at else now
+        s = float(score or 0.0)
+        agg = daily.setdefault((instrument_id, ts.date()), dict.fromkeys(_DAILY_FIELDS, 0))
+        agg["count"] += 1
+        agg["score_sum"] += s
+        agg["score_sumsq"] += s * s
+        agg[_LABEL_FIELD.get(label or "", "neu_count")] += 1
+        points.setdefault(instrument_id, []).append((ts, s))
+        n += 1
+    if not n:
+        return 0
+
+    # Counts and sums are added in the upsert itself, so concurrent ingests of the same
+    # instrument/day (news job and an analysis run) both land.
+    bulk_upsert(
+        session,
+        NewsSentimentDaily,
+        [{"instrument_id": i, "day": d, **agg, "updated_at": now} for (i, d), agg in daily.items()],
+        conflict_cols=["instrument_id", "day"],
+        update_cols=["updated_at"],
+        increment_cols=_DAILY_FIELDS,
+    )
+
+    # The decayed state is not additive: make sure each row exists, then lock it
+    # (SELECT ... FOR UPDATE) for the read-modify-write.
+    instrument_ids = sorted(points)
+    bulk_upsert(
+        session,
+        NewsSentimentState,
+        [
+            {"instrument_id": i, "as_of": min(ts for ts, _ in points[i]), "updated_at": now}
+            for i in instrument_ids
+        ],
+        conflict_cols=["instrument_id"],
+        update_cols=["instrument_id"],  # no-op on conflict
+    )
+    states = {
+        s.instrument_id: s
+        for s in session.exec(
+            select(NewsSentimentState)
+            .where(NewsSentimentState.instrument_id.in_(instrument_ids))
+            .order_by(NewsSentimentState.instrument_id)
+            .with_for_update()
+            .execution_options(populate_existing=True)
+        ).all()
+    }
+    rate = _decay_rate()
+    for instrument_id, pts in points.items():
+        state = states[instrument_id]
+        prev_as_of = as_utc_dt(state.as_of)
+        as_of = max([ts for ts, _ in pts] + [prev_as_of])
+        k = math.exp(-rate * (as_of - prev_as_of).total_seconds())
+        total, weight = state.decayed_sum * k, state.decayed_weight * k
+        for ts, s in pts:
+            k = math.exp(-rate * (as_of - ts).total_seconds())
+            total += s * k
+            weight += k
+        state.as_of = as_of
+        state.decayed_sum = total
+        state.decayed_weight = weight
+        state.score = total / weight if weight > 0 else 0.0
+        state.updated_at = now
+        session.add(state)
+    return n
+
+
+def rebuild_news_sentiment(session: Session) -> int:
+    """Recompute both rollup tables from news_instruments + news_items (commits)."""
+    session.execute(delete(NewsSentimentDaily))
+    session.execute(delete(NewsSentimentState))
+    rows = session.exec(
+        select(
+            NewsInstrument.instrument_id,
+            NewsInstrument.published_at,
+            NewsItem.sentiment_label,
+            NewsItem.sentiment_score,
+        )
+        .join(NewsItem, NewsItem.id == NewsInstrument.news_id)
+        .order_by(NewsInstrument.instrument_id)
+    ).all()
+    n = record_news_sentiment(session, rows)
+    session.commit()
+    return n
+
+
+def backfill_news_sentiment(session: Session) -> int:
+    """Build the rollups once for databases that predate them (no-op when already populated)."""
+    if session.exec(select(NewsSentimentState.id).limit(1)).first() is not None:
+        return 0
+    if session.exec(select(NewsInstrument.id).limit(1)).first() is None:
+        return 0
+    return rebuild_news_sentiment(session)
+
+
+def get_news_sentiment(session: Session, *, instrument_id: int, start: datetime, end: datetime) -> dict | None:
+    """
+    Aggregate sentiment for articles published in [start, end] (whole UTC days), plus a
+    decayed score as of `end`: the running state when it is not newer than `end`, else one
+    derived from the window's daily rows. None when no article falls in the window.
+    """
+    rows = session.exec(
+        select(NewsSentimentDaily).where(
+            NewsSentimentDaily.instrument_id == instrument_id,
+            NewsSentimentDaily.day >= as_utc_dt(start).date(),
+            NewsSentimentDaily.day <= as_utc_dt(end).date(),
+        )
+    ).all()
+    count = sum(r.count for r in rows)
+    if not count:
+        return None
+    mean = sum(r.score_sum for r in rows) / count
+    var = max(0.0, sum(r.score_sumsq for r in rows) / count - mean * mean)
+    state = session.exec(
+        select(NewsSentimentState).where(NewsSentimentState.instrument_id == instrument_id)
+    ).first()
+    end_utc = as_utc_dt(end)
+    if state is not None and end_utc >= as_utc_dt(state.as_of):
+        decayed, as_of = state.score, as_utc_dt(state.as_of)
+    else:
+        # The running state includes articles published after `end`; decay the window's own
+        # days to `end` instead (each day taken at noon UTC, or at `end` on its last day).
+        rate = _decay_rate()
+        total = weight = 0.0
+        for r in rows:
+            t = min(datetime.combine(r.day, time(12), tzinfo=timezone.utc), end_utc)
+            k = math.exp(-rate * (end_utc - t).total_seconds())
+            total += r.score_sum * k
+            weight += r.count * k
+        decayed, as_of = (total / weight if weight > 0 else mean), end_utc
+    return {
+        "count": count,
+        "mean": mean,
+        "std": math.sqrt(var),
+        "pos": sum(r.pos_count for r in rows),
+        "neg": sum(r.neg_count for r in rows),
+        "neu": sum(r.neu_count for r in rows),
+        "decayed_score": decayed,
+        "as_of": as_of.isoformat(),
+    }
@@ -1,21 +1,56 @@
 from __future__ import annotations
 
-from datetime import datetime, timezone
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
 from typing import Optional
 from urllib.parse import quote_plus
 
 import feedparser
 import httpx
+import numpy as np
 from dateutil import parser as dtparser
+from sqlalchemy import and_, func, or_
 from sqlmodel import Session, select
 
-from app.models.news import NewsItem
-from app.services.sentiment_service import score_sentiment
+from app.core.config import get_settings
+from app.models.news import NewsFeedState, NewsInstrument, NewsItem
+from app.services.instrument_service import get_or_create_instrument
+from app.services.news_dedup import (
+    as_pool,
+    key_terms,
+    nearest_duplicate,
+    normalize_title,
+    same_subject,
+    simhash64,
+    title_hash,
+)
+from app.services.news_query_planner import EntityIndex, aliases_for, plan_news_queries
+from app.services.news_search_index import news_search_index
+from app.services.news_sentiment_service import record_news_sentiment
+from app.services.sentiment_service import score_sentiment_batch
+
+logger = logging.getLogger(__name__)
+
+USER_AGENT = "StockGo/0.1"
+NEAR_DUP_WINDOW = timedelta(days=2)
+# Upper bound on stored articles compared per ingest call (newest first).
+NEAR_DUP_POOL_MAX = 5000
+
+
+def _now_utc() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _as_utc(dt: datetime) -> datetime:
+    return dt.astimezone(timezone.utc) if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
 
 
 def google_news_rss_url(query: str) -> str:
     # US English, US region
-    return f"https://news.google.com/rss/search?q={quote_plus(query)}&hl=en-US&gl=US&ceid=US:en"
+    base = get_settings().news_rss_base_url
+    return f"{base}?q={quote_plus(query)}&hl=en-US&gl=US&ceid=US:en"
 
 
 def _parse_published(entry) -> Optional[datetime]:
@@ -33,13 +68,8 @@ def _parse_published(entry) -> Optional[datetime]:
     return None
 
 
-def fetch_google_news_entries(query: str, *, timeout_s: float = 10.0) -> list[dict]:
-    url = google_news_rss_url(query)
-    with httpx.Client(timeout=timeout_s, headers={"User-Agent": "StockGo/0.1"}) as client:
-        resp = client.get(url)
-        resp.raise_for_status()
-        feed = feedparser.parse(resp.text)
-
+def parse_feed_entries(text: str) -> list[dict]:
+    feed = feedparser.parse(text)
     out: list[dict] = []
     for e in getattr(feed, "entries", []) or []:
         title = (getattr(e, "title", "") or "").strip()
@@ -57,17 +87,179 @@ def fetch_google_news_entries(query: str, *, timeout_s: float = 10.0) -> list[di
     return out
 
 
-def get_last_news_published_at(session: Session, *, instrument_id: int) -> Optional[datetime]:
-    item = session.exec(
-        select(NewsItem)
-        .where(NewsItem.instrument_id == instrument_id, NewsItem.published_at.is_not(None))
-        .order_by(NewsItem.published_at.desc())
-        .limit(1)
-    ).first()
-    if not item or not item.published_at:
-        return None
-    dt = item.published_at
-    return dt.astimezone(timezone.utc) if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+@dataclass
+class FeedResult:
+    query: str
+    status: Optional[int]  # HTTP status; None on transport errors
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    entries: list[dict] = field(default_factory=list)
+    error: Optional[str] = None
+
+
+async def _fetch_feed(
+    client: httpx.AsyncClient,
+    limit: asyncio.Semaphore,
+    query: str,
+    etag: Optional[str],
+    last_modified: Optional[str],
+) -> FeedResult:
+    headers = {}
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
+    async with limit:
+        try:
+            resp = await client.get(google_news_rss_url(query), headers=headers)
+        except httpx.HTTPError as e:
+            return FeedResult(query=query, status=None, etag=etag, last_modified=last_modified, error=str(e))
+
+    if resp.status_code == 304:
+        return FeedResult(query=query, status=304, etag=etag, last_modified=last_modified)
+    if resp.status_code >= 400:
+        return FeedResult(
+            query=query,
+            status=resp.status_code,
+            etag=etag,
+            last_modified=last_modified,
+            error=f"HTTP {resp.status_code}",
+        )
+    return FeedResult(
+        query=query,
+        status=resp.status_code,
+        etag=resp.headers.get("etag"),
+        last_modified=resp.headers.get("last-modified"),
+        entries=parse_feed_entries(resp.text),
+    )
+
+
+async def fetch_feeds(
+    queries: list[str],
+    validators: dict[str, tuple[Optional[str], Optional[str]]],
+    *,
+    concurrency: int,
+    timeout_s: float,
+) -> list[FeedResult]:
+    """
+    Fetch many feeds over one pooled client with at most `concurrency` requests in flight.
+    `validators` maps query -> (etag, last_modified) from the previous fetch; feeds that
+    answer 304 come back with no entries. Results are in `queries` order.
+    """
+    concurrency = max(1, concurrency)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(
+        timeout=timeout_s,
+        headers={"User-Agent": USER_AGENT},
+        limits=limits,
+        follow_redirects=True,
+    ) as client:
+        limit = asyncio.Semaphore(concurrency)
+        return await asyncio.gather(
+            *[_fetch_feed(client, limit, q, *validators.get(q, (None, None))) for q in queries]
+        )
+
+
+def refresh_news_for_tickers(
+    session: Session,
+    tickers: list[str],
+    *,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    lookback_days: int = 7,
+) -> dict[str, int]:
+    """
+    Pull Google News RSS for many tickers and upsert new items.
+    Tickers are packed into OR-grouped queries (see news_query_planner) that are fetched
+    concurrently; entries are routed back to tickers by symbol/name. Stored ETag and
+    Last-Modified per query make unchanged feeds cost a 304 and no parsing.
+    Returns {ticker: inserted}. Runs its own event loop: call from sync code only.
+    """
+    settings = get_settings()
+    end = end or _now_utc()
+    start = start or end - timedelta(days=max(1, lookback_days))
+
+    norm = list(dict.fromkeys(t.strip().upper() for t in tickers if t and t.strip()))
+    if not norm:
+        return {}
+    insts = {t: get_or_create_instrument(session, t) for t in norm}
+    aliases = aliases_for(insts.values())
+    groups = plan_news_queries(
+        aliases,
+        max_tickers=settings.news_query_max_tickers,
+        max_chars=settings.news_query_max_chars,
+    )
+    index = EntityIndex(aliases)
+    queries = [g.query for g in groups]
+
+    states = {
+        st.query: st for st in session.exec(select(NewsFeedState).where(NewsFeedState.query.in_(queries))).all()
+    }
+    last_published = dict(
+        session.exec(
+            select(NewsInstrument.instrument_id, func.max(NewsInstrument.published_at))
+            .where(NewsInstrument.instrument_id.in_([inst.id for inst in insts.values()]))
+            .group_by(NewsInstrument.instrument_id)
+        ).all()
+    )
+
+    results = asyncio.run(
+        fetch_feeds(
+            queries,
+            {q: (st.etag, st.last_modified) for q, st in states.items()},
+            concurrency=settings.news_fetch_concurrency,
+            timeout_s=settings.news_fetch_timeout_seconds,
+        )
+    )
+
+    now = _now_utc()
+    inserted: dict[str, int] = {t: 0 for t in norm}
+    for group, res in zip(groups, results):
+        state = states.get(res.query) or NewsFeedState(query=res.query)
+        state.last_status = res.status
+        state.fetched_at = now
+        if res.status is not None and 200 <= res.status < 300:
+            state.etag = res.etag
+            state.last_modified = res.last_modified
+            state.changed_at = now
+        session.add(state)
+        if res.error:
+            logger.warning("news feed %r failed: %s", res.query, res.error)
+        if not res.entries:
+            continue
+
+        routed, unmatched = index.route(group, res.entries)
+        if unmatched:
+            logger.info(
+                "news feed %r: %d of %d entries matched no ticker in %s",
+                res.query,
+                len(unmatched),
+                len(res.entries),
+                ",".join(group.tickers),
+            )
+        for ticker, entries in routed.items():
+            if not entries:
+                continue
+            inst = insts[ticker]
+            news_start = start
+            last = last_published.get(inst.id)
+            if last is not None:
+                # RSS is usually recent-only; still filter by range, and allow small backfill.
+                news_start = max(start, _as_utc(last) - timedelta(days=3))
+            inserted[ticker] = upsert_news_items(
+                session, instrument_id=inst.id, entries=entries, start=news_start, end=end
+            )
+    session.commit()
+    return inserted
+
+
+def _split_source(title: str) -> tuple[str, Optional[str]]:
+    # Common pattern: "Headline - Source"
+    if " - " in title:
+        maybe_head, maybe_src = title.rsplit(" - ", 1)
+        if len(maybe_src) <= 40:
+            return maybe_head.strip(), maybe_src.strip()
+    return title, None
 
 
 def upsert_news_items(
@@ -78,52 +270,143 @@ def upsert_news_items(
     start: datetime,
     end: datetime,
 ) -> int:
-    if not entries:
-        return 0
-
-    entry_urls = [e["url"] for e in entries if e.get("url")]
-    existing_urls = set()
-    if entry_urls:
-        existing_urls = set(session.exec(select(NewsItem.url).where(NewsItem.url.in_(entry_urls))).all())
-    to_add: list[NewsItem] = []
+    """
+    Store each article once and link it to `instrument_id`.
 
+    An entry matches an existing article by URL, by normalized-title hash, or by SimHash
+    within NEAR_DUP_MAX_DISTANCE bits of an article about the same subject published within
+    NEAR_DUP_WINDOW of it (syndicated copies). Only new articles are sentiment-scored.
+    Returns the number of new instrument links.
+    """
+    candidates: list[dict] = []
     for e in entries:
-        url = e["url"]
-        if url in existing_urls:
-            continue
         published_at: Optional[datetime] = e.get("published_at")
         if published_at and (published_at < start or published_at > end):
             continue
+        title, source = _split_source(e["title"])
+        norm = normalize_title(title)
+        candidates.append(
+            {
+                # Column is VARCHAR(512); enforce hard limit when inserting.
+                "url": e["url"][:512],
+                "title": title[:512],
+                "source": source,
+                "published_at": published_at,
+                "title_hash": title_hash(norm),
+                "simhash": simhash64(norm),
+            }
+        )
+    if not candidates:
+        return 0
+
+    urls = [c["url"] for c in candidates]
+    hashes = [c["title_hash"] for c in candidates]
+    by_url: dict[str, int] = {}
+    by_hash: dict[str, int] = {}
+    for news_id, url, th in session.exec(
+        select(NewsItem.id, NewsItem.url, NewsItem.title_hash).where(
+            or_(NewsItem.url.in_(urls), NewsItem.title_hash.in_(hashes))
+        )
+    ).all():
+        by_url[url] = news_id
+        if th:
+            by_hash.setdefault(th, news_id)
 
-        title = e["title"]
-        source = None
-        # Common pattern: "Headline - Source"
-        if " - " in title:
-            maybe_head, maybe_src = title.rsplit(" - ", 1)
-            if len(maybe_src) <= 40:
-                title = maybe_head.strip()
-                source = maybe_src.strip()
-
-        label, score, model = score_sentiment(title)
-        to_add.append(
-            NewsItem(
+    # Only articles within NEAR_DUP_WINDOW of some candidate are compared, so a long
+    # lookback with sparse entries doesn't pull in everything between them.
+    windows: list[list[datetime]] = []
+    for t in sorted(c["published_at"] or end for c in candidates):
+        if windows and t - NEAR_DUP_WINDOW <= windows[-1][1]:
+            windows[-1][1] = t + NEAR_DUP_WINDOW
+        else:
+            windows.append([t - NEAR_DUP_WINDOW, t + NEAR_DUP_WINDOW])
+    pool_rows = session.exec(
+        select(NewsItem.id, NewsItem.simhash, NewsItem.title, NewsItem.published_at)
+        .where(
+            NewsItem.simhash.is_not(None),
+            or_(*[and_(NewsItem.published_at >= lo, NewsItem.published_at <= hi) for lo, hi in windows]),
+        )
+        .order_by(NewsItem.published_at.desc())
+        .limit(NEAR_DUP_POOL_MAX)
+    ).all()
+    pool_ids = [r[0] for r in pool_rows]
+    pool = as_pool([r[1] for r in pool_rows])
+    pool_titles = [r[2] for r in pool_rows]
+    pool_ts = np.array([_as_utc(r[3]).timestamp() for r in pool_rows], dtype=float)
+    window_s = NEAR_DUP_WINDOW.total_seconds()
+
+    new_items: list[NewsItem] = []
+    new_hashes: list[int] = []
+    targets: list[NewsItem | int] = []
+    for c in candidates:
+        keys = key_terms(c["title"])
+        match: NewsItem | int | None = by_url.get(c["url"]) or by_hash.get(c["title_hash"])
+        if match is None and pool_ids:
+            near = np.flatnonzero(np.abs(pool_ts - _as_utc(c["published_at"] or end).timestamp()) <= window_s)
+            i = nearest_duplicate(
+                pool[near], c["simhash"], accept=lambda j: same_subject(keys, key_terms(pool_titles[near[j]]))
+            )
+            match = pool_ids[near[i]] if i is not None else None
+        if match is None:
+            # Duplicates within this batch (same article listed twice in one feed).
+            i = nearest_duplicate(
+                as_pool(new_hashes), c["simhash"], accept=lambda j: same_subject(keys, key_terms(new_items[j].title))
+            )
+            match = new_items[i] if i is not None else None
+        if match is None:
+            match = NewsItem(
                 instrument_id=instrument_id,
-                published_at=published_at,
-                source=source,
-                title=title[:512],
+                published_at=c["published_at"],
+                source=c["source"],
+                title=c["title"],
                 summary=None,
-                # Column is VARCHAR(512); enforce hard limit when inserting.
-                url=url[:512],
+                url=c["url"],
                 lang="en",
-                sentiment_label=label,
-                sentiment_score=score,
-                sentiment_model=model,
+                title_hash=c["title_hash"],
+                simhash=c["simhash"],
             )
-        )
+            new_items.append(match)
+            new_hashes.append(c["simhash"])
+            by_url[c["url"]] = match
+            by_hash[c["title_hash"]] = match
+        targets.append(match)
 
-    if not to_add:
-        return 0
-    session.add_all(to_add)
-    session.commit()
-    return len(to_add)
+    if new_items:
+        scores = score_sentiment_batch([n.title for n in new_items])
+        for n, (label, score, model) in zip(new_items, scores):
+            n.sentiment_label, n.sentiment_score, n.sentiment_model = label, score, model
+        session.add_all(new_items)
+        session.flush()
+    indexed = [(n.id, n.title, n.source, n.published_at) for n in new_items]
 
+    # news_id -> (published_at, sentiment_label, sentiment_score)
+    known = {n.id: (n.published_at, n.sentiment_label, n.sentiment_score) for n in new_items}
+    news_ids = list(dict.fromkeys(t.id if isinstance(t, NewsItem) else t for t in targets))
+    missing = [i for i in news_ids if i not in known]
+    if missing:
+        rows = session.exec(
+            select(NewsItem.id, NewsItem.published_at, NewsItem.sentiment_label, NewsItem.sentiment_score).where(
+                NewsItem.id.in_(missing)
+            )
+        ).all()
+        known.update((r[0], tuple(r[1:])) for r in rows)
+    linked = set(
+        session.exec(
+            select(NewsInstrument.news_id).where(
+                NewsInstrument.instrument_id == instrument_id, NewsInstrument.news_id.in_(news_ids)
+            )
+        ).all()
+    )
+    links = [
+        NewsInstrument(news_id=i, instrument_id=instrument_id, published_at=known[i][0])
+        for i in news_ids
+        if i not in linked
+    ]
+    if links:
+        session.add_all(links)
+        record_news_sentiment(session, [(instrument_id, *known[link.news_id]) for link in links])
+    if links or new_items:
+        session.commit()
+        # Only committed rows go into the shared index; a rollback must not leave ghosts.
+        news_search_index.add_items(indexed)
+    return len(links)
@@ -0,0 +1,91 @@
+"""
+In-process pub/sub hub fanning quote updates out to streaming subscribers.
+
+Publishers (quote refresh, running in scheduler threads) call `publish` from any
+thread. Each subscriber lives on the event loop serving its HTTP connection and
+holds at most one pending update per ticker: a slow client simply receives the
+latest value instead of a growing backlog, so memory per connection is bounded
+by the number of tickers it watches. Idle subscribers cost one parked coroutine.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+from typing import Iterable
+
+from app.schemas.stock import QuoteUpdate
+
+
+class QuoteSubscriber:
+    def __init__(self, loop: asyncio.AbstractEventLoop, tickers: Iterable[str]) -> None:
+        self.loop = loop
+        self.tickers = frozenset(tickers)
+        self._pending: dict[str, QuoteUpdate] = {}
+        self._event = asyncio.Event()
+
+    def _offer(self, updates: list[QuoteUpdate]) -> None:
+        # Runs on the subscriber's loop; newer values overwrite unsent older ones.
+        for u in updates:
+            self._pending[u.ticker] = u
+        self._event.set()
+
+    async def next_batch(self, timeout: float) -> list[QuoteUpdate]:
+        """Wait up to `timeout` seconds for updates; returns [] on timeout."""
+        try:
+            await asyncio.wait_for(self._event.wait(), timeout)
+        except asyncio.TimeoutError:
+            return []
+        self._event.clear()
+        batch = list(self._pending.values())
+        self._pending.clear()
+        return batch
+
+
+class QuoteHub:
+    def __init__(self) -> None:
+        self._by_ticker: dict[str, set[QuoteSubscriber]] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return len({s for subs in self._by_ticker.values() for s in subs})
+
+    def subscribe(self, tickers: Iterable[str]) -> QuoteSubscriber:
+        """Must be called from the event loop that will consume the subscription."""
+        sub = QuoteSubscriber(asyncio.get_running_loop(), tickers)
+        with self._lock:
+            for t in sub.tickers:
+                self._by_ticker.setdefault(t, set()).add(sub)
+        return sub
+
+    def unsubscribe(self, sub: QuoteSubscriber) -> None:
+        with self._lock:
+            for t in sub.tickers:
+                subs = self._by_ticker.get(t)
+                if subs is None:
+                    continue
+                subs.discard(sub)
+                if not subs:
+                    del self._by_ticker[t]
+
+    def publish(self, updates: Iterable[QuoteUpdate]) -> int:
+        """Thread-safe. Returns the number of subscribers notified."""
+        per_sub: dict[QuoteSubscriber, list[QuoteUpdate]] = {}
+        with self._lock:
+            if not self._by_ticker:
+                return 0
+            for u in updates:
+                for sub in self._by_ticker.get(u.ticker, ()):
+                    per_sub.setdefault(sub, []).append(u)
+        for sub, batch in per_sub.items():
+            try:
+                sub.loop.call_soon_threadsafe(sub._offer, batch)
+            except RuntimeError:
+                # Loop already closed (server shutting down); drop the update.
+                continue
+        return len(per_sub)
+
+
+quote_hub = QuoteHub()
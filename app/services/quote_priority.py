@@ -0,0 +1,137 @@
+"""
+Demand-prioritized quote refresh planning.
+
+Tickers are tiered by how much users care about them right now:
+- hot:  watchlist + tickers whose chart/overview was requested recently
+- warm: tickers in any user's screener selections (user_selections / user_bias_selections)
+- cold: the rest of the non-ETF universe
+
+Each tier has its own refresh interval, and every scheduler cycle refreshes at
+most `quote_refresh_budget` due tickers, hottest and stalest first.
+"""
+
+from __future__ import annotations
+
+import threading
+from datetime import datetime, timedelta, timezone
+
+from sqlmodel import Session, select
+
+from app.core.config import get_settings
+from app.models.instrument import Instrument
+from app.models.market import StockQuote
+from app.models.user_bias_selection import UserBiasSelection
+from app.models.user_selection import UserSelection
+from app.services.search_index import instrument_search_index
+
+TIER_HOT = 0
+TIER_WARM = 1
+TIER_COLD = 2
+
+
+def _now_utc() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _as_utc(dt: datetime) -> datetime:
+    return dt.astimezone(timezone.utc) if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+
+
+class DemandTracker:
+    """Remembers when each ticker was last requested through the read API."""
+
+    def __init__(self) -> None:
+        self._seen: dict[str, datetime] = {}
+        self._lock = threading.Lock()
+
+    def record(self, ticker: str) -> None:
+        norm = ticker.strip().upper()
+        if not norm:
+            return
+        with self._lock:
+            self._seen[norm] = _now_utc()
+
+    def recent(self, window: timedelta) -> set[str]:
+        cutoff = _now_utc() - window
+        with self._lock:
+            # Drop expired entries so scanners hitting random symbols don't grow the map forever.
+            self._seen = {t: ts for t, ts in self._seen.items() if ts >= cutoff}
+            return set(self._seen)
+
+
+class QuoteRefreshPlanner:
+    def __init__(self, demand: DemandTracker) -> None:
+        self._demand = demand
+        self._last_refreshed: dict[str, datetime] | None = None
+        self._lock = threading.Lock()
+
+    def _load_last_refreshed(self, session: Session) -> dict[str, datetime]:
+        rows = session.exec(
+            select(Instrument.ticker, StockQuote.updated_at).join(
+                StockQuote, StockQuote.instrument_id == Instrument.id
+            )
+        ).all()
+        return {ticker: _as_utc(ts) for ticker, ts in rows if ts is not None}
+
+    def _selected_tickers(self, session: Session) -> set[str]:
+        picked = session.exec(
+            select(Instrument.ticker)
+            .join(UserSelection, UserSelection.instrument_id == Instrument.id)
+            .distinct()
+        ).all()
+        biased = session.exec(
+            select(Instrument.ticker)
+            .join(UserBiasSelection, UserBiasSelection.instrument_id == Instrument.id)
+            .distinct()
+        ).all()
+        return set(picked) | set(biased)
+
+    def tiers(self, session: Session) -> dict[str, int]:
+        settings = get_settings()
+        instrument_search_index.ensure_loaded(session)
+        universe = instrument_search_index.tickers(include_etf=False)
+
+        tiers = {t: TIER_COLD for t in universe}
+        for t in self._selected_tickers(session):
+            tiers[t] = TIER_WARM
+        hot = set(settings.watchlist_tickers())
+        hot |= self._demand.recent(timedelta(minutes=settings.quote_hot_window_minutes))
+        for t in hot:
+            # Requested tickers outside the indexed universe are still refreshed if they exist.
+            tiers[t] = TIER_HOT
+        return tiers
+
+    def plan(self, session: Session, *, now: datetime | None = None) -> list[str]:
+        """Return the tickers due for refresh this cycle, capped by the per-cycle budget."""
+        settings = get_settings()
+        now = now or _now_utc()
+        intervals = {
+            TIER_HOT: timedelta(seconds=settings.quote_hot_interval_seconds),
+            TIER_WARM: timedelta(seconds=settings.quote_warm_interval_seconds),
+            TIER_COLD: timedelta(seconds=settings.quote_cold_interval_seconds),
+        }
+        with self._lock:
+            if self._last_refreshed is None:
+                self._last_refreshed = self._load_last_refreshed(session)
+            last = dict(self._last_refreshed)
+
+        never = datetime.min.replace(tzinfo=timezone.utc)
+        due: list[tuple[int, datetime, str]] = []
+        for ticker, tier in self.tiers(session).items():
+            prev = last.get(ticker, never)
+            if now - prev >= intervals[tier]:
+                due.append((tier, prev, ticker))
+        due.sort()
+        return [ticker for _, _, ticker in due[: max(0, settings.quote_refresh_budget)]]
+
+    def mark_refreshed(self, tickers: list[str], *, now: datetime | None = None) -> None:
+        now = now or _now_utc()
+        with self._lock:
+            if self._last_refreshed is None:
+                self._last_refreshed = {}
+            for t in tickers:
+                self._last_refreshed[t] = now
+
+
+quote_demand = DemandTracker()
+quote_refresh_planner = QuoteRefreshPlanner(quote_demand)
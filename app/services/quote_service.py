@@ -1,56 +1,135 @@
 from __future__ import annotations
 
 from datetime import datetime, timezone
+import math
 from typing import Iterable
 
 from sqlmodel import Session, select
 
+from app.core.config import get_settings
+from app.db.upsert import bulk_upsert
 from app.models.instrument import Instrument
 from app.models.market import StockQuote
+from app.schemas.stock import QuoteUpdate
+from app.services.quote_hub import quote_hub
 from app.services.stock_service import get_stock_overviews_batch
 
 
+_PRICE_FIELDS = ("last", "change", "change_percent", "market_cap")
+
+
 def _now_utc() -> datetime:
     return datetime.now(timezone.utc)
 
 
-def refresh_quotes_for_tickers(session: Session, tickers: Iterable[str]) -> int:
+def _same_values(old: tuple | None, new: tuple) -> bool:
+    if old is None:
+        return False
+    for a, b in zip(old, new):
+        if a is None or b is None:
+            if a is not b:
+                return False
+        # MySQL FLOAT columns round-trip with single precision.
+        elif not math.isclose(float(a), float(b), rel_tol=1e-6, abs_tol=1e-9):
+            return False
+    return True
+
+
+def refresh_quotes_for_tickers(session: Session, tickers: Iterable[str], *, include_info: bool = False) -> int:
     """
-    Fetch quotes for given tickers (Alpha Vantage preferred via get_stock_overview)
-    and upsert into stock_quotes. Returns number of updated rows.
+    Fetch quotes for given tickers concurrently and bulk-upsert them into stock_quotes.
+    By default only price fields are fetched (yfinance fast_info). Quotes whose values
+    changed are published to streaming subscribers. Returns number of upserted rows.
     """
     norm = [t.strip().upper() for t in tickers if t and t.strip()]
     if not norm:
         return 0
 
     instruments = session.exec(
-        select(Instrument).where(Instrument.ticker.in_(norm))
+        select(Instrument.id, Instrument.ticker).where(Instrument.ticker.in_(norm))
     ).all()
     if not instruments:
         return 0
 
+    settings = get_settings()
     ordered = sorted(instruments, key=lambda i: i.ticker)
-    ov_list = get_stock_overviews_batch([i.ticker for i in ordered])
+    ov_list = get_stock_overviews_batch(
+        [i.ticker for i in ordered],
+        max_workers=settings.quote_refresh_workers,
+        timeout_s=settings.quote_fetch_timeout_seconds,
+        include_info=include_info,
+    )
 
-    updated = 0
+    previous = {
+        q[0]: tuple(q[1:])
+        for q in session.exec(
+            select(StockQuote.instrument_id, *[getattr(StockQuote, f) for f in _PRICE_FIELDS]).where(
+                StockQuote.instrument_id.in_([i.id for i in ordered])
+            )
+        ).all()
+    }
+
+    now = _now_utc()
+    rows: list[dict] = []
+    changed: list[QuoteUpdate] = []
     for inst, ov in zip(ordered, ov_list):
-        if ov is None:
+        if ov is None or ov.last_price is None:
             continue
-        quote = session.exec(
-            select(StockQuote).where(StockQuote.instrument_id == inst.id)
-        ).first()
-        if quote is None:
-            quote = StockQuote(instrument_id=inst.id)
-        quote.last = ov.last_price
-        quote.change = ov.change
-        quote.change_percent = ov.change_percent
-        quote.market_cap = ov.market_cap
-        quote.currency = ov.currency
-        quote.source = "alpha_vantage"  # or 'yfinance' inside get_stock_overview, but we prefer AV
-        quote.updated_at = _now_utc()
-        session.add(quote)
-        updated += 1
+        values = (ov.last_price, ov.change, ov.change_percent, ov.market_cap)
+        if not _same_values(previous.get(inst.id), values):
+            changed.append(
+                QuoteUpdate(
+                    ticker=inst.ticker,
+                    last=ov.last_price,
+                    change=ov.change,
+                    change_percent=ov.change_percent,
+                    market_cap=ov.market_cap,
+                    currency=ov.currency,
+                    updated_at=now,
+                )
+            )
+        rows.append(
+            {
+                "instrument_id": inst.id,
+                "last": ov.last_price,
+                "change": ov.change,
+                "change_percent": ov.change_percent,
+                "market_cap": ov.market_cap,
+                "currency": ov.currency,
+                "source": "yfinance",
+                "updated_at": now,
+            }
+        )
 
+    bulk_upsert(
+        session,
+        StockQuote,
+        rows,
+        conflict_cols=["instrument_id"],
+        update_cols=["last", "change", "change_percent", "market_cap", "currency", "source", "updated_at"],
+    )
     session.commit()
-    return updated
+    if changed:
+        quote_hub.publish(changed)
+    return len(rows)
+
 
+def get_quote_snapshot(session: Session, tickers: list[str]) -> list[QuoteUpdate]:
+    """Current stored quotes for the given tickers (one query), as stream payloads."""
+    rows = session.exec(
+        select(Instrument.ticker, StockQuote)
+        .join(StockQuote, StockQuote.instrument_id == Instrument.id)
+        .where(Instrument.ticker.in_(tickers))
+    ).all()
+    return [
+        QuoteUpdate(
+            ticker=ticker,
+            last=q.last,
+            change=q.change,
+            change_percent=q.change_percent,
+            market_cap=q.market_cap,
+            currency=q.currency,
+            updated_at=q.updated_at,
+        )
+        for ticker, q in rows
+    ]
@@ -8,9 +8,10 @@ from typing import Any
 from sqlmodel import Session, select
 
 from app.models.market import MarketBar, TechnicalFeature
-from app.models.news import NewsItem
+from app.models.news import NewsInstrument, NewsItem
 from app.schemas.analysis import Bias
 from app.services.llm_service import LlmUnavailable, openai_compatible_chat_json
+from app.services.news_sentiment_service import get_news_sentiment
 
 
 def _sha256(obj: Any) -> str:
@@ -49,13 +50,14 @@ def load_latest_snapshot(
     ).all()
     news = session.exec(
         select(NewsItem)
+        .join(NewsInstrument, NewsInstrument.news_id == NewsItem.id)
         .where(
-            NewsItem.instrument_id == instrument_id,
-            NewsItem.published_at.is_not(None),
-            NewsItem.published_at >= start,
-            NewsItem.published_at <= end,
+            NewsInstrument.instrument_id == instrument_id,
+            NewsInstrument.published_at.is_not(None),
+            NewsInstrument.published_at >= start,
+            NewsInstrument.published_at <= end,
         )
-        .order_by(NewsItem.published_at.desc())
+        .order_by(NewsInstrument.published_at.desc())
         .limit(news_limit)
     ).all()
 
@@ -76,6 +78,7 @@ def load_latest_snapshot(
             }
             for n in news
         ],
+        "news_sentiment": get_news_sentiment(session, instrument_id=instrument_id, start=start, end=end),
     }
 
 
@@ -159,11 +162,17 @@ def rule_bias(snapshot: dict[str, Any]) -> tuple[Bias, float, dict[str, Any]]:
         score += 0.1
         signals.append("volume_expanded")
 
-    # News sentiment: average of recent
+    # News sentiment: decayed running score from the rollups; older snapshots lack it,
+    # so fall back to the average of the most recent headlines.
+    agg = snapshot.get("news_sentiment")
     news = snapshot.get("news") or []
-    if news:
+    news_score: float | None = None
+    if agg:
+        news_score = float(agg["decayed_score"])
+    elif news:
         scores = [float(n.get("sentiment_score") or 0.0) for n in news[:8]]
         news_score = sum(scores) / max(1, len(scores))
+    if news_score is not None:
         score += 0.6 * news_score
         if news_score >= 0.15:
             signals.append("news_positive")
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 from datetime import datetime, timedelta, timezone
+from typing import Callable
 
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.interval import IntervalTrigger
@@ -12,6 +13,10 @@ from app.models.instrument import Instrument
 from app.schemas.analysis import AnalysisRunRequest
 from app.services.analysis_service import run_analysis_sync
 from app.services.financials_service import sync_financials_for_ticker
+from app.services.market_calendar import RefreshGate
+from app.services.markets_service import markets_overview_cache
+from app.services.news_service import refresh_news_for_tickers
+from app.services.quote_priority import quote_refresh_planner
 from app.services.quote_service import refresh_quotes_for_tickers
 from app.services.sec_service import sync_sec_equity_for_ticker
 
@@ -23,6 +28,39 @@ def _now_utc() -> datetime:
 class SchedulerService:
     def __init__(self) -> None:
         self._scheduler: BackgroundScheduler | None = None
+        self._gates: dict[str, RefreshGate] = {}
+
+    def _gated(self, job_id: str, job: Callable[[], None]) -> Callable[[], None]:
+        """Wrap a market-data job so it consults the exchange calendar before running."""
+
+        def _run() -> None:
+            gate = self._gates.get(job_id)
+            now = _now_utc()
+            if gate is not None and not gate.should_run(now):
+                return
+            job()
+            if gate is not None:
+                gate.mark_ran(now)
+
+        return _run
+
+    def _build_gates(self) -> None:
+        settings = get_settings()
+        if not settings.market_hours_gating:
+            self._gates = {}
+            return
+        settle = timedelta(minutes=max(0, settings.market_settle_delay_minutes))
+        self._gates = {
+            # Prices can't change outside sessions: pause, with one settle run after the close.
+            "update_reports": RefreshGate(settle_delay=settle),
+            "update_quotes": RefreshGate(settle_delay=settle),
+            "update_markets": RefreshGate(settle_delay=settle),
+            # Headlines keep coming overnight, just at a slower cadence.
+            "update_news": RefreshGate(
+                settle_delay=settle,
+                offhours_interval=timedelta(minutes=max(1, settings.news_offhours_minutes)),
+            ),
+        }
 
     def start(self) -> None:
         settings = get_settings()
@@ -32,10 +70,11 @@ class SchedulerService:
             return
 
         self._scheduler = BackgroundScheduler(timezone="UTC")
+        self._build_gates()
 
         # Market + indicators + report
         self._scheduler.add_job(
-            self._update_reports_job,
+            self._gated("update_reports", self._update_reports_job),
             trigger=IntervalTrigger(minutes=max(1, settings.market_update_minutes)),
             id="update_reports",
             replace_existing=True,
@@ -46,7 +85,7 @@ class SchedulerService:
 
         # News-only refresh (kept separate so you can tune frequency)
         self._scheduler.add_job(
-            self._update_news_job,
+            self._gated("update_news", self._update_news_job),
             trigger=IntervalTrigger(minutes=max(1, settings.news_update_minutes)),
             id="update_news",
             replace_existing=True,
@@ -77,10 +116,22 @@ class SchedulerService:
             misfire_grace_time=300,
         )
 
-        # Intraday quotes refresh for watchlist (every 5 minutes)
+        # Markets overview snapshot, kept warm so requests never wait on the provider
+        self._scheduler.add_job(
+            self._gated("update_markets", self._update_markets_job),
+            trigger=IntervalTrigger(seconds=max(15, settings.markets_overview_ttl_seconds)),
+            id="update_markets",
+            replace_existing=True,
+            max_instances=1,
+            coalesce=True,
+            misfire_grace_time=60,
+            next_run_time=_now_utc(),
+        )
+
+        # Intraday quotes refresh, demand-prioritized (see quote_priority)
         self._scheduler.add_job(
-            self._update_quotes_job,
-            trigger=IntervalTrigger(minutes=5),
+            self._gated("update_quotes", self._update_quotes_job),
+            trigger=IntervalTrigger(seconds=max(10, settings.quote_cycle_seconds)),
             id="update_quotes",
             replace_existing=True,
             max_instances=1,
@@ -105,39 +156,27 @@ class SchedulerService:
             return
 
         with Session(engine) as session:
+            # One concurrent news pass for the whole watchlist; the reports below then skip news fetches.
+            refresh_news_for_tickers(session, tickers, start=start, end=end)
             for ticker in tickers:
                 req = AnalysisRunRequest(
                     ticker=ticker,
                     start=start,
                     end=end,
                     timeframe="1d",
-                    include_news=True,
+                    include_news=False,
                     include_macro=False,
                 )
                 run_analysis_sync(session, req)
 
     def _update_news_job(self) -> None:
-        # News is already pulled during report updates; this job is a lightweight "keep fresh" option.
-        settings = get_settings()
-        engine = get_engine()
-        end = _now_utc()
-        start = end - timedelta(days=7)
-        tickers = settings.watchlist_tickers()
+        # News-only refresh between report cycles: concurrent, conditional-GET feed fetches.
+        tickers = get_settings().watchlist_tickers()
         if not tickers:
             return
 
-        with Session(engine) as session:
-            for ticker in tickers:
-                req = AnalysisRunRequest(
-                    ticker=ticker,
-                    start=start,
-                    end=end,
-                    timeframe="1d",
-                    include_news=True,
-                    include_macro=False,
-                )
-                # Will incrementally upsert news; also computes report, but with short lookback.
-                run_analysis_sync(session, req)
+        with Session(get_engine()) as session:
+            refresh_news_for_tickers(session, tickers, lookback_days=7)
 
     def _update_financials_job(self) -> None:
         settings = get_settings()
@@ -158,6 +197,7 @@ class SchedulerService:
                     sync_financials_for_ticker(session, ticker)
                 except Exception:
                     # Don't break the whole job if one ticker fails
+                    session.rollback()
                     continue
 
     def _update_sec_job(self) -> None:
@@ -175,20 +215,26 @@ class SchedulerService:
                 except Exception:
                     continue
 
+    def _update_markets_job(self) -> None:
+        markets_overview_cache.refresh()
+
     def _update_quotes_job(self) -> None:
-        """Intraday quotes refresh for all non-ETF instruments (used by homepage preview)."""
+        """
+        Refresh the quotes that are due this cycle: hot names every minute or so,
+        user selections every few minutes, and the long tail within the per-cycle budget.
+        """
         engine = get_engine()
         with Session(engine) as session:
-            tickers = session.exec(
-                select(Instrument.ticker).where(Instrument.is_etf == False)  # noqa: E712
-            ).all()
+            tickers = quote_refresh_planner.plan(session)
             if not tickers:
                 return
 
             # Batch to avoid hammering external quote API in a single call
             batch_size = 100
             for i in range(0, len(tickers), batch_size):
-                refresh_quotes_for_tickers(session, tickers[i : i + batch_size])
+                batch = tickers[i : i + batch_size]
+                refresh_quotes_for_tickers(session, batch)
+                quote_refresh_planner.mark_refreshed(batch)
 
 
 scheduler_service = SchedulerService()
@@ -0,0 +1,351 @@
+"""
+Technical-condition screener over the latest features of the whole universe.
+
+Filter expressions such as `rsi14 < 30 AND close > ma200 AND vol20_ratio > 1.5`
+are parsed once into vectorized predicates and evaluated against an in-memory
+panel holding one row per instrument (latest daily bar + latest technical
+features + stored quote). The panel is rebuilt from the DB at most once per TTL.
+"""
+
+from __future__ import annotations
+
+import re
+import threading
+import time
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+from sqlmodel import Session, func, select
+
+from app.core.config import get_settings
+from app.models.instrument import Instrument
+from app.models.market import MarketBar, StockQuote, TechnicalFeature
+from app.models.news import NewsSentimentState
+
+
+BAR_FIELDS = ("open", "high", "low", "close", "volume")
+FEATURE_FIELDS = ("ma20", "ma200", "rsi14", "macd", "macd_signal", "atr14", "vol20_mean", "vol20_ratio")
+QUOTE_FIELDS = ("last", "change", "change_percent", "market_cap")
+SENTIMENT_FIELDS = ("news_sentiment",)
+SCREENER_FIELDS = BAR_FIELDS + FEATURE_FIELDS + QUOTE_FIELDS + SENTIMENT_FIELDS
+
+
+class ScreenerExpressionError(ValueError):
+    pass
+
+
+# ---------------------------------------------------------------------------
+# Expression compiler
+# ---------------------------------------------------------------------------
+
+_TOKEN_RE = re.compile(
+    r"\s*(?:(?P<num>\d+(?:\.\d*)?|\.\d+)|(?P<ident>[A-Za-z_][A-Za-z0-9_]*)|(?P<op><=|>=|==|!=|<|>|=|[-+*/()]))"
+)
+_KEYWORDS = {"AND", "OR", "NOT"}
+_COMPARE: dict[str, Callable] = {
+    "<": np.less,
+    "<=": np.less_equal,
+    ">": np.greater,
+    ">=": np.greater_equal,
+    "=": np.equal,
+    "==": np.equal,
+    "!=": np.not_equal,
+}
+
+
+def _divide(left, right) -> "np.ndarray | float":
+    """Division where a zero divisor gives NaN (unknown) rather than ±inf."""
+    left, right = np.asarray(left, dtype=float), np.asarray(right, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(right == 0, np.nan, left / right)
+
+
+_ARITH: dict[str, Callable] = {"+": np.add, "-": np.subtract, "*": np.multiply, "/": _divide}
+
+Evaluator = Callable[[pd.DataFrame], "np.ndarray | float"]
+
+
+def _compare_values(op: Callable, left, right) -> "np.ndarray | float":
+    """Comparison as 1.0 / 0.0, or 0.5 (unknown) where either side is missing."""
+    left, right = np.asarray(left, dtype=float), np.asarray(right, dtype=float)
+    return np.where(np.isnan(left) | np.isnan(right), 0.5, op(left, right).astype(float))
+
+
+def _tokenize(expr: str) -> list[tuple[str, str]]:
+    tokens: list[tuple[str, str]] = []
+    pos = 0
+    expr = expr.rstrip()
+    while pos < len(expr):
+        m = _TOKEN_RE.match(expr, pos)
+        if not m or m.end() == pos:
+            raise ScreenerExpressionError(f"Unexpected character at position {pos}: {expr[pos:pos + 10]!r}")
+        pos = m.end()
+        if m.group("num") is not None:
+            tokens.append(("num", m.group("num")))
+        elif m.group("ident") is not None:
+            word = m.group("ident")
+            if word.upper() in _KEYWORDS:
+                tokens.append(("kw", word.upper()))
+            else:
+                tokens.append(("ident", word.lower()))
+        else:
+            tokens.append(("op", m.group("op")))
+    return tokens
+
+
+class _Parser:
+    """
+    Recursive-descent parser producing (kind, evaluator) pairs where kind is
+    "num" or "bool". Conditions use three-valued logic so missing (NaN) values stay
+    unknown through NOT: they evaluate to 1.0 (true), 0.0 (false) or 0.5 (unknown),
+    with AND = min, OR = max and NOT = 1 - x. Only rows that are definitely true match,
+    so `NOT rsi14 > 70` excludes instruments without an RSI.
+    """
+
+    def __init__(self, tokens: list[tuple[str, str]]) -> None:
+        self.tokens = tokens
+        self.pos = 0
+        self.fields: list[str] = []
+
+    def _peek(self) -> tuple[str, str] | None:
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+    def _accept(self, kind: str, value: str | None = None) -> bool:
+        tok = self._peek()
+        if tok and tok[0] == kind and (value is None or tok[1] == value):
+            self.pos += 1
+            return True
+        return False
+
+    def parse(self) -> Evaluator:
+        if not self.tokens:
+            raise ScreenerExpressionError("Empty expression")
+        kind, fn = self._or()
+        if self._peek() is not None:
+            raise ScreenerExpressionError(f"Unexpected token {self._peek()[1]!r}")
+        if kind != "bool":
+            raise ScreenerExpressionError("Expression must be a condition, e.g. rsi14 < 30")
+        return fn
+
+    def _or(self):
+        kind, fn = self._and()
+        while self._accept("kw", "OR"):
+            rkind, rfn = self._and()
+            self._require_bool(kind, rkind)
+            fn = (lambda a, b: lambda df: np.maximum(a(df), b(df)))(fn, rfn)
+        return kind, fn
+
+    def _and(self):
+        kind, fn = self._not()
+        while self._accept("kw", "AND"):
+            rkind, rfn = self._not()
+            self._require_bool(kind, rkind)
+            fn = (lambda a, b: lambda df: np.minimum(a(df), b(df)))(fn, rfn)
+        return kind, fn
+
+    def _not(self):
+        if self._accept("kw", "NOT"):
+            kind, fn = self._not()
+            self._require_bool(kind)
+            return "bool", (lambda a: lambda df: 1.0 - a(df))(fn)
+        return self._compare()
+
+    def _compare(self):
+        kind, fn = self._sum()
+        tok = self._peek()
+        if tok and tok[0] == "op" and tok[1] in _COMPARE:
+            self.pos += 1
+            rkind, rfn = self._sum()
+            if kind != "num" or rkind != "num":
+                raise ScreenerExpressionError(f"Operator {tok[1]!r} needs numeric operands")
+            op = _COMPARE[tok[1]]
+            return "bool", (lambda a, b: lambda df: _compare_values(op, a(df), b(df)))(fn, rfn)
+        return kind, fn
+
+    def _sum(self):
+        kind, fn = self._term()
+        while True:
+            tok = self._peek()
+            if not (tok and tok[0] == "op" and tok[1] in "+-"):
+                return kind, fn
+            self.pos += 1
+            rkind, rfn = self._term()
+            kind, fn = self._arith(tok[1], kind, fn, rkind, rfn)
+
+    def _term(self):
+        kind, fn = self._unary()
+        while True:
+            tok = self._peek()
+            if not (tok and tok[0] == "op" and tok[1] in "*/"):
+                return kind, fn
+            self.pos += 1
+            rkind, rfn = self._unary()
+            kind, fn = self._arith(tok[1], kind, fn, rkind, rfn)
+
+    def _unary(self):
+        if self._accept("op", "-"):
+            kind, fn = self._unary()
+            if kind != "num":
+                raise ScreenerExpressionError("Unary minus needs a numeric operand")
+            return "num", (lambda a: lambda df: np.negative(a(df)))(fn)
+        return self._atom()
+
+    def _atom(self):
+        tok = self._peek()
+        if tok is None:
+            raise ScreenerExpressionError("Unexpected end of expression")
+        self.pos += 1
+        kind, value = tok
+        if kind == "num":
+            num = float(value)
+            return "num", lambda df: num
+        if kind == "ident":
+            if value not in SCREENER_FIELDS:
+                raise ScreenerExpressionError(
+                    f"Unknown field {value!r}. Available: {', '.join(SCREENER_FIELDS)}"
+                )
+            if value not in self.fields:
+                self.fields.append(value)
+            return "num", lambda df: df[value].to_numpy(dtype=float)
+        if kind == "op" and value == "(":
+            inner = self._or()
+            if not self._accept("op", ")"):
+                raise ScreenerExpressionError("Missing closing parenthesis")
+            return inner
+        raise ScreenerExpressionError(f"Unexpected token {value!r}")
+
+    @staticmethod
+    def _require_bool(*kinds: str) -> None:
+        if any(k != "bool" for k in kinds):
+            raise ScreenerExpressionError("AND/OR/NOT need conditions on both sides")
+
+    @staticmethod
+    def _arith(op: str, lkind: str, lfn, rkind: str, rfn):
+        if lkind != "num" or rkind != "num":
+            raise ScreenerExpressionError(f"Operator {op!r} needs numeric operands")
+        ufunc = _ARITH[op]
+        return "num", (lambda a, b: lambda df: ufunc(a(df), b(df)))(lfn, rfn)
+
+
+def compile_expression(expr: str) -> tuple[Evaluator, list[str]]:
+    """Compile a filter expression into (predicate, referenced fields)."""
+    parser = _Parser(_tokenize(expr))
+    fn = parser.parse()
+    return fn, parser.fields
+
+
+# ---------------------------------------------------------------------------
+# Latest-features panel
+# ---------------------------------------------------------------------------
+
+
+def load_latest_panel(session: Session, *, timeframe: str = "1d") -> pd.DataFrame:
+    """One row per non-ETF instrument: latest bar, latest features, stored quote, decayed news sentiment."""
+    last_bar = (
+        select(MarketBar.instrument_id, func.max(MarketBar.ts).label("max_ts"))
+        .where(MarketBar.timeframe == timeframe)
+        .group_by(MarketBar.instrument_id)
+        .subquery()
+    )
+    last_feat = (
+        select(TechnicalFeature.instrument_id, func.max(TechnicalFeature.ts).label("max_ts"))
+        .where(TechnicalFeature.timeframe == timeframe)
+        .group_by(TechnicalFeature.instrument_id)
+        .subquery()
+    )
+    stmt = (
+        select(
+            Instrument.id,
+            Instrument.ticker,
+            Instrument.name,
+            *[getattr(MarketBar, f) for f in BAR_FIELDS],
+            *[getattr(TechnicalFeature, f) for f in FEATURE_FIELDS],
+            *[getattr(StockQuote, f) for f in QUOTE_FIELDS],
+            NewsSentimentState.score,
+        )
+        .select_from(Instrument)
+        .join(last_bar, last_bar.c.instrument_id == Instrument.id)
+        .join(
+            MarketBar,
+            (MarketBar.instrument_id == last_bar.c.instrument_id)
+            & (MarketBar.timeframe == timeframe)
+            & (MarketBar.ts == last_bar.c.max_ts),
+        )
+        .outerjoin(last_feat, last_feat.c.instrument_id == Instrument.id)
+        .outerjoin(
+            TechnicalFeature,
+            (TechnicalFeature.instrument_id == last_feat.c.instrument_id)
+            & (TechnicalFeature.timeframe == timeframe)
+            & (TechnicalFeature.ts == last_feat.c.max_ts),
+        )
+        .outerjoin(StockQuote, StockQuote.instrument_id == Instrument.id)
+        .outerjoin(NewsSentimentState, NewsSentimentState.instrument_id == Instrument.id)
+        .where(Instrument.is_etf == False)  # noqa: E712
+    )
+    rows = session.exec(stmt).all()
+    columns = ["instrument_id", "ticker", "name", *SCREENER_FIELDS]
+    df = pd.DataFrame.from_records(rows, columns=columns)
+    for col in SCREENER_FIELDS:
+        df[col] = pd.to_numeric(df[col], errors="coerce").astype(float)
+    return df
+
+
+class ScreenerPanelCache:
+    def __init__(self) -> None:
+        self._panel: pd.DataFrame | None = None
+        self._built_at = 0.0
+        self._lock = threading.Lock()
+
+    def invalidate(self) -> None:
+        self._panel = None
+
+    def get(self, session: Session) -> pd.DataFrame:
+        ttl = get_settings().screener_panel_ttl_seconds
+        panel = self._panel
+        if panel is not None and time.monotonic() - self._built_at < ttl:
+            return panel
+        with self._lock:
+            if self._panel is None or time.monotonic() - self._built_at >= ttl:
+                self._panel = load_latest_panel(session)
+                self._built_at = time.monotonic()
+            return self._panel
+
+
+screener_panel_cache = ScreenerPanelCache()
+
+
+def run_screener_query(
+    session: Session,
+    expr: str,
+    *,
+    sort: str | None = None,
+    descending: bool = False,
+    limit: int = 50,
+    offset: int = 0,
+) -> tuple[pd.DataFrame, list[str], int]:
+    """
+    Returns (page of matching rows, fields to show, total matches).
+    Raises ScreenerExpressionError on invalid expressions.
+    """
+    predicate, fields = compile_expression(expr)
+    if sort is not None:
+        sort = sort.strip().lower()
+        if sort not in SCREENER_FIELDS:
+            raise ScreenerExpressionError(f"Unknown sort field {sort!r}")
+        if sort not in fields:
+            fields.append(sort)
+
+    panel = screener_panel_cache.get(session)
+    if panel.empty:
+        return panel, fields, 0
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        # Constant expressions (e.g. `1 < 2`) evaluate to a scalar; broadcast to the panel.
+        mask = np.broadcast_to(np.asarray(predicate(panel)) == 1.0, (len(panel),))
+    matches = panel[mask]
+    if sort is not None:
+        matches = matches.sort_values(sort, ascending=not descending, na_position="last", kind="stable")
+    else:
+        matches = matches.sort_values("ticker", kind="stable")
+    return matches.iloc[offset : offset + limit], fields, int(mask.sum())
@@ -0,0 +1,177 @@
+"""
+In-process ticker/name search index over `instruments`.
+
+Typeahead queries are served from memory: a sorted ticker array answers prefix
+lookups with bisect, and a trigram index over lower-cased names answers
+substring lookups. The index is rebuilt as a whole and swapped atomically, so
+readers never see a half-built state; instruments created at runtime are added
+the same way, from the current snapshot's rows.
+"""
+
+from __future__ import annotations
+
+import threading
+from bisect import bisect_left
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
+from sqlmodel import Session, select
+
+from app.models.instrument import Instrument
+
+
+@dataclass(frozen=True)
+class IndexedInstrument:
+    id: int
+    ticker: str
+    exchange: Optional[str]
+    name: Optional[str]
+    is_etf: bool
+    created_at: Optional[datetime]
+
+
+def _trigrams(text: str) -> set[str]:
+    return {text[i : i + 3] for i in range(len(text) - 2)}
+
+
+class _Snapshot:
+    def __init__(self, rows: list[IndexedInstrument]) -> None:
+        self.rows = sorted(rows, key=lambda r: r.ticker)
+        self.tickers = [r.ticker for r in self.rows]
+        self.names = [(r.name or "").lower() for r in self.rows]
+        grams: dict[str, list[int]] = {}
+        for pos, name in enumerate(self.names):
+            for g in _trigrams(name):
+                grams.setdefault(g, []).append(pos)
+        self.grams = grams
+
+
+class InstrumentSearchIndex:
+    def __init__(self) -> None:
+        self._snap: _Snapshot | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._snap is not None
+
+    def refresh(self, session: Session) -> int:
+        rows = session.exec(
+            select(
+                Instrument.id,
+                Instrument.ticker,
+                Instrument.exchange,
+                Instrument.name,
+                Instrument.is_etf,
+                Instrument.created_at,
+            )
+        ).all()
+        snap = _Snapshot([IndexedInstrument(*r) for r in rows])
+        self._snap = snap
+        return len(snap.rows)
+
+    def add(self, inst: Instrument) -> None:
+        """Index a newly committed instrument (no-op until the index has been loaded)."""
+        with self._lock:
+            snap = self._snap
+            if snap is None or inst.id is None:
+                return  # the first load will include it
+            row = IndexedInstrument(
+                inst.id, inst.ticker, inst.exchange, inst.name, bool(inst.is_etf), inst.created_at
+            )
+            self._snap = _Snapshot([r for r in snap.rows if r.id != inst.id] + [row])
+
+    def ensure_loaded(self, session: Session) -> None:
+        if self._snap is not None:
+            return
+        with self._lock:
+            if self._snap is None:
+                self.refresh(session)
+
+    def _name_matches(self, snap: _Snapshot, needle: str) -> list[int]:
+        if len(needle) < 3:
+            # Too short for trigrams; a linear scan over in-memory names is still cheap.
+            return [pos for pos, name in enumerate(snap.names) if needle in name]
+        postings = [snap.grams.get(g) for g in _trigrams(needle)]
+        if any(p is None for p in postings):
+            return []
+        postings.sort(key=len)
+        candidates = set(postings[0])
+        for p in postings[1:]:
+            candidates.intersection_update(p)
+            if not candidates:
+                return []
+        # Trigram hits are candidates only; confirm the full substring.
+        return [pos for pos in candidates if needle in snap.names[pos]]
+
+    def search(self, query: str, *, limit: int = 10, include_etf: bool = False) -> list[IndexedInstrument]:
+        """
+        Rank: exact ticker, ticker prefix (shorter first), name prefix, then name substring.
+        """
+        snap = self._snap
+        q = query.strip()
+        if snap is None or not q:
+            return []
+        up = q.upper()
+        low = q.lower()
+
+        scored: dict[int, tuple[int, int, str]] = {}
+
+        start = bisect_left(snap.tickers, up)
+        for pos in range(start, len(snap.tickers)):
+            ticker = snap.tickers[pos]
+            if not ticker.startswith(up):
+                break
+            rank = 0 if ticker == up else 1
+            scored[pos] = (rank, len(ticker), ticker)
+
+        enough = sum(1 for pos in scored if include_etf or not snap.rows[pos].is_etf) >= limit
+        for pos in [] if enough else self._name_matches(snap, low):
+            if pos in scored:
+                continue
+            name = snap.names[pos]
+            rank = 2 if name.startswith(low) else 3
+            scored[pos] = (rank, name.find(low), snap.tickers[pos])
+
+        ranked = sorted(scored.items(), key=lambda kv: kv[1])
+        out: list[IndexedInstrument] = []
+        for pos, _ in ranked:
+            row = snap.rows[pos]
+            if row.is_etf and not include_etf:
+                continue
+            out.append(row)
+            if len(out) >= limit:
+                break
+        return out
+
+    def tickers(self, *, include_etf: bool = False) -> list[str]:
+        snap = self._snap
+        if snap is None:
+            return []
+        return [r.ticker for r in snap.rows if include_etf or not r.is_etf]
+
+    def match_ids(self, query: str, *, include_etf: bool = False) -> list[int] | None:
+        """
+        All instrument ids whose ticker starts with or name contains `query`, in ticker
+        order (so callers can page by slicing). Returns None when the index is not
+        loaded, so callers can fall back to SQL.
+        """
+        snap = self._snap
+        q = query.strip()
+        if snap is None:
+            return None
+        if not q:
+            return []
+        up = q.upper()
+        hits: set[int] = set()
+        start = bisect_left(snap.tickers, up)
+        for pos in range(start, len(snap.tickers)):
+            if not snap.tickers[pos].startswith(up):
+                break
+            hits.add(pos)
+        hits.update(self._name_matches(snap, q.lower()))
+        return [snap.rows[pos].id for pos in sorted(hits) if include_etf or not snap.rows[pos].is_etf]
+
+
+instrument_search_index = InstrumentSearchIndex()
@@ -0,0 +1,174 @@
+"""
+Offline load of SEC's bulk companyfacts archive.
+
+SEC publishes every filer's companyfacts JSON nightly as a single ZIP
+(companyfacts.zip, one CIK##########.json member per filer). Given a local copy,
+
+    python -m app.services.sec_bulk_service companyfacts.zip --workers 4
+
+loads the requested us-gaap concepts (default: EQUITY_CONCEPTS) for every CIK in
+`sec_ciks` that maps to a known instrument, without any network access.
+
+Members are parsed in a process pool; each worker opens the archive once and streams
+its members through ijson, materialising only the wanted concept objects, so memory is
+bounded by those rather than by the filing. The parent writes each member's records
+through `store_sec_facts`, the same bulk path as the live sync, committing every
+`commit_every` members.
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import re
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, BinaryIO, Iterable, Optional
+
+import ijson
+from sqlmodel import Session, select
+
+from app.db.engine import get_engine
+from app.db.init_db import init_db
+from app.models.financials import SecCik
+from app.models.instrument import Instrument
+from app.services.sec_service import EQUITY_CONCEPTS, extract_concept_facts, store_sec_facts
+
+logger = logging.getLogger(__name__)
+
+_MEMBER_NAME = re.compile(r"(?:^|/)CIK(\d{10})\.json$")
+_US_GAAP = "facts.us-gaap"
+
+# Per-worker state, set by _init_worker.
+_archive: Optional[zipfile.ZipFile] = None
+_concepts: tuple[str, ...] = ()
+
+
+def read_concepts(f: BinaryIO, concepts: Iterable[str]) -> dict[str, Any]:
+    """
+    Stream one companyfacts JSON document and return {concept: object} for the wanted
+    us-gaap concepts; everything else is parsed past without being built.
+    """
+    wanted = set(concepts)
+    out: dict[str, Any] = {}
+    builder: Optional[ijson.ObjectBuilder] = None
+    concept = target = ""
+    for prefix, event, value in ijson.parse(f, use_float=True):
+        if builder is not None:
+            builder.event(event, value)
+            if prefix == target and event == "end_map":
+                out[concept] = builder.value
+                builder = None
+                if len(out) == len(wanted):
+                    break
+        elif prefix == _US_GAAP:
+            if event == "map_key" and value in wanted:
+                concept, target = value, f"{_US_GAAP}.{value}"
+                builder = ijson.ObjectBuilder()
+            elif event == "end_map":
+                break
+    return out
+
+
+def _init_worker(archive_path: str, concepts: tuple[str, ...]) -> None:
+    global _archive, _concepts
+    _archive = zipfile.ZipFile(archive_path)
+    _concepts = concepts
+
+
+def _parse_member(member: str) -> tuple[list[dict[str, Any]], Optional[str]]:
+    """(records, error) for one archive member; runs in a worker process."""
+    try:
+        with _archive.open(member) as f:
+            return extract_concept_facts(read_concepts(f, _concepts), _concepts), None
+    except Exception as e:  # one corrupt member must not abort the load
+        return [], f"{type(e).__name__}: {e}"
+
+
+def ingest_companyfacts_zip(
+    session: Session,
+    archive_path: Path,
+    *,
+    concepts: tuple[str, ...] = EQUITY_CONCEPTS,
+    workers: Optional[int] = None,
+    commit_every: int = 200,
+) -> dict[str, int]:
+    """
+    Load `concepts` for every mapped CIK in a local companyfacts.zip (commits).
+    Returns counts: members read, failed, facts records, equity rows inserted.
+    """
+    instruments_by_cik: dict[str, list[int]] = {}
+    for cik, inst_id in session.exec(
+        select(SecCik.cik, Instrument.id).join(Instrument, Instrument.ticker == SecCik.ticker)
+    ).all():
+        instruments_by_cik.setdefault(cik, []).append(inst_id)
+    if not instruments_by_cik:
+        raise ValueError("No sec_ciks rows match known instruments; run an online SEC sync once first")
+
+    with zipfile.ZipFile(archive_path) as zf:
+        members: list[tuple[str, str]] = []
+        for name in zf.namelist():
+            m = _MEMBER_NAME.search(name)
+            if m and m.group(1) in instruments_by_cik:
+                members.append((name, m.group(1)))
+    logger.info("SEC bulk: %d of the archive's members map to known instruments", len(members))
+
+    stats = {"members": 0, "failed": 0, "records": 0, "inserted": 0}
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_worker, initargs=(str(archive_path), concepts)
+    ) as pool:
+        results = pool.map(_parse_member, [name for name, _ in members], chunksize=16)
+        for (name, cik), (records, error) in zip(members, results):
+            stats["members"] += 1
+            if error:
+                stats["failed"] += 1
+                logger.warning("SEC bulk: failed to parse %s: %s", name, error)
+                continue
+            for inst_id in instruments_by_cik[cik]:
+                stats["inserted"] += store_sec_facts(session, inst_id, records)
+            stats["records"] += len(records)
+            if stats["members"] % commit_every == 0:
+                session.commit()
+                logger.info("SEC bulk: %d/%d members", stats["members"], len(members))
+    session.commit()
+    return stats
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m app.services.sec_bulk_service",
+        description="Load us-gaap facts from a local SEC companyfacts.zip (no network access).",
+    )
+    parser.add_argument("archive", type=Path, help="path to companyfacts.zip")
+    parser.add_argument("--workers", type=int, default=None, help="parser processes (default: CPU count)")
+    parser.add_argument(
+        "--concept",
+        action="append",
+        dest="concepts",
+        help="us-gaap concept to load; repeatable (default: shareholders' equity concepts)",
+    )
+    parser.add_argument("--commit-every", type=int, default=200, help="members per transaction")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    init_db()
+    concepts = tuple(dict.fromkeys(args.concepts)) if args.concepts else EQUITY_CONCEPTS
+    with Session(get_engine()) as session:
+        try:
+            stats = ingest_companyfacts_zip(
+                session,
+                args.archive,
+                concepts=concepts,
+                workers=args.workers,
+                commit_every=max(1, args.commit_every),
+            )
+        except (OSError, zipfile.BadZipFile, ValueError) as e:
+            logger.error("SEC bulk: %s", e)
+            return 1
+    logger.info("SEC bulk: done %s", stats)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,24 +1,41 @@
 """
 SEC EDGAR integration: companyfacts API for shareholders' equity and optional notes.
 
-- company_tickers.json: ticker -> CIK (10-digit zero-padded).
+- company_tickers.json: ticker -> CIK (10-digit zero-padded), persisted in `sec_ciks`
+  and refreshed at most every SEC_CIK_MAX_AGE_DAYS.
 - companyfacts: us-gaap StockholdersEquity (and related) -> shareholders_equity_statements.
+  The nightly bulk archive of the same JSON is loaded offline by sec_bulk_service.
+
+All requests go through one pooled `requests.Session`, throttled to
+SEC_MAX_REQUESTS_PER_SECOND across threads. Responses are cached gzipped under
+SEC_CACHE_DIR with their ETag/Last-Modified and revalidated with conditional
+GETs, so an unchanged filing costs a 304 instead of a multi-megabyte download.
 """
 
 from __future__ import annotations
 
+import gzip
+import json
 import logging
+import os
 import re
+import threading
 import time
-from datetime import date, datetime, timezone
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
 from typing import Any, Optional
 
 import requests
-from sqlmodel import Session, select
+from requests.adapters import HTTPAdapter
+from sqlalchemy import insert, update
+from sqlmodel import Session, func, select
 
 from app.core.config import get_settings
-from app.models.financials import ShareholdersEquity
+from app.db.upsert import bulk_upsert
+from app.models.financials import SecCik, ShareholdersEquity
 from app.models.instrument import Instrument
+from app.services.fundamentals_service import STATEMENT_NAMES, statement_facts, upsert_facts
 from app.services.instrument_service import get_or_create_instrument
 
 logger = logging.getLogger(__name__)
@@ -26,8 +43,9 @@ logger = logging.getLogger(__name__)
 SEC_TICKERS_URL = "https://www.sec.gov/files/company_tickers.json"
 SEC_COMPANYFACTS_URL = "https://data.sec.gov/api/xbrl/companyfacts/CIK{cik}.json"
 
-# In-memory cache: ticker -> CIK (str, 10-digit). Refreshed when None or on first use.
-_ticker_to_cik_cache: Optional[dict[str, str]] = None
+# Process-level copy of sec_ciks: (ticker -> CIK, monotonic load time).
+_ticker_to_cik_cache: Optional[tuple[dict[str, str], float]] = None
+_CIK_MEMORY_TTL_S = 3600.0
 
 
 def _cik_to_10(cik: int | str) -> str:
@@ -39,38 +57,173 @@ def _headers() -> dict[str, str]:
     return {"User-Agent": get_settings().sec_user_agent}
 
 
-def fetch_companyfacts(cik: str) -> dict[str, Any]:
+class _RateLimiter:
+    """Spaces calls at least 1/rate seconds apart across threads."""
+
+    def __init__(self, rate: float) -> None:
+        self._interval = 1.0 / max(rate, 0.1)
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + self._interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+_http: Optional[requests.Session] = None
+_limiter: Optional[_RateLimiter] = None
+_http_lock = threading.Lock()
+
+
+def _client() -> tuple[requests.Session, _RateLimiter]:
+    global _http, _limiter
+    with _http_lock:
+        if _http is None:
+            settings = get_settings()
+            _http = requests.Session()
+            _http.headers.update(_headers())
+            _http.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=16))
+            _limiter = _RateLimiter(settings.sec_max_requests_per_second)
+        return _http, _limiter
+
+
+@dataclass
+class CachedResponse:
+    data: Any
+    changed: bool  # False when SEC answered 304 and the cached copy was used
+    etag: Optional[str] = None  # ETag, else Last-Modified, of the body now in the cache
+
+
+def _cache_paths(key: str) -> tuple[Path, Path]:
+    root = Path(get_settings().sec_cache_dir)
+    return root / f"{key}.json.gz", root / f"{key}.meta.json"
+
+
+def _read_meta(meta_path: Path) -> dict[str, Any]:
+    try:
+        return json.loads(meta_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_atomic(path: Path, payload: bytes) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_bytes(payload)
+    os.replace(tmp, path)
+
+
+def fetch_cached_json(url: str, key: str, *, skip_etag: Optional[str] = None) -> CachedResponse:
     """
-    Fetch companyfacts JSON for a given CIK (10-digit zero-padded string).
-    Raises on HTTP errors; returns raw JSON.
+    GET `url` through the disk cache under `key`. Sends If-None-Match / If-Modified-Since
+    when a cached copy exists; on 304 the cached body is returned, or None data when the
+    cached copy's ETag equals `skip_etag` (the caller already ingested it, so decompressing
+    and parsing are skipped). Raises on HTTP errors.
     """
-    url = SEC_COMPANYFACTS_URL.format(cik=_cik_to_10(cik) if cik.isdigit() else cik)
-    r = requests.get(url, headers=_headers(), timeout=30)
+    body_path, meta_path = _cache_paths(key)
+    meta = _read_meta(meta_path) if body_path.exists() else {}
+    headers: dict[str, str] = {}
+    if meta.get("etag"):
+        headers["If-None-Match"] = meta["etag"]
+    if meta.get("last_modified"):
+        headers["If-Modified-Since"] = meta["last_modified"]
+
+    http, limiter = _client()
+    limiter.wait()
+    r = http.get(url, headers=headers, timeout=30)
+    if r.status_code == 304 and meta:
+        etag = meta.get("etag") or meta.get("last_modified")
+        if skip_etag and etag == skip_etag:
+            return CachedResponse(data=None, changed=False, etag=etag)
+        with gzip.open(body_path, "rb") as f:
+            return CachedResponse(data=json.loads(f.read()), changed=False, etag=etag)
     r.raise_for_status()
-    return r.json()
+
+    _write_atomic(body_path, gzip.compress(r.content, compresslevel=6))
+    _write_atomic(
+        meta_path,
+        json.dumps(
+            {
+                "url": url,
+                "etag": r.headers.get("ETag"),
+                "last_modified": r.headers.get("Last-Modified"),
+                "fetched_at": datetime.now(timezone.utc).isoformat(),
+            }
+        ).encode("utf-8"),
+    )
+    return CachedResponse(
+        data=r.json(), changed=True, etag=r.headers.get("ETag") or r.headers.get("Last-Modified")
+    )
 
 
-def ticker_to_cik(refresh: bool = False) -> dict[str, str]:
+def fetch_companyfacts(cik: str, *, skip_etag: Optional[str] = None) -> CachedResponse:
     """
-    Return mapping ticker -> CIK (10-digit str). Uses SEC company_tickers.json.
-    Cached in memory; pass refresh=True to force refetch.
+    Fetch companyfacts JSON for a given CIK (10-digit zero-padded string), revalidating
+    the on-disk copy. Raises on HTTP errors; `.data` is the raw JSON, or None when SEC
+    reports it unchanged and its ETag equals `skip_etag`.
     """
-    global _ticker_to_cik_cache
-    if _ticker_to_cik_cache is not None and not refresh:
-        return _ticker_to_cik_cache
-    r = requests.get(SEC_TICKERS_URL, headers=_headers(), timeout=30)
-    r.raise_for_status()
-    data = r.json()
+    cik10 = _cik_to_10(cik) if cik.isdigit() else cik
+    return fetch_cached_json(
+        SEC_COMPANYFACTS_URL.format(cik=cik10), f"companyfacts/CIK{cik10}", skip_etag=skip_etag
+    )
+
+
+def refresh_cik_map(session: Session) -> int:
+    """Refetch company_tickers.json (conditionally) and upsert it into sec_ciks (commits)."""
+    res = fetch_cached_json(SEC_TICKERS_URL, "company_tickers")
     # Format: {"0": {"cik_str": 320193, "ticker": "AAPL", "title": "..."}, ...}
-    out: dict[str, str] = {}
-    for v in data.values():
+    now = datetime.now(timezone.utc)
+    rows: dict[str, dict[str, Any]] = {}
+    for v in (res.data or {}).values():
         if isinstance(v, dict):
             ticker = (v.get("ticker") or "").strip().upper()
             cik = v.get("cik_str") or v.get("cik")
             if ticker and cik is not None:
-                out[ticker] = _cik_to_10(cik)
-    _ticker_to_cik_cache = out
-    return out
+                rows[ticker] = {
+                    "ticker": ticker[:32],
+                    "cik": _cik_to_10(cik),
+                    "title": str(v["title"])[:255] if v.get("title") else None,
+                    "updated_at": now,
+                }
+    bulk_upsert(
+        session, SecCik, list(rows.values()), conflict_cols=["ticker"], update_cols=["cik", "title", "updated_at"]
+    )
+    session.commit()
+    return len(rows)
+
+
+def ticker_to_cik(session: Session, refresh: bool = False) -> dict[str, str]:
+    """
+    Return mapping ticker -> CIK (10-digit str) from sec_ciks, refreshing the table from
+    SEC when it is empty, older than SEC_CIK_MAX_AGE_DAYS, or refresh=True.
+    Kept in memory for up to an hour per process.
+    """
+    global _ticker_to_cik_cache
+    if _ticker_to_cik_cache is not None and not refresh:
+        mapping, loaded_at = _ticker_to_cik_cache
+        if time.monotonic() - loaded_at < _CIK_MEMORY_TTL_S:
+            return mapping
+
+    newest = session.exec(select(func.max(SecCik.updated_at))).one()
+    max_age = timedelta(days=get_settings().sec_cik_max_age_days)
+    stale = newest is None or datetime.now(timezone.utc) - (
+        newest if newest.tzinfo else newest.replace(tzinfo=timezone.utc)
+    ) > max_age
+    if refresh or stale:
+        try:
+            refresh_cik_map(session)
+        except requests.RequestException as e:
+            if newest is None:
+                raise
+            logger.warning("SEC: company_tickers refresh failed, using stored map: %s", e)
+
+    mapping = dict(session.exec(select(SecCik.ticker, SecCik.cik)).all())
+    _ticker_to_cik_cache = (mapping, time.monotonic())
+    return mapping
 
 
 def _fp_to_quarter(fp: Optional[str]) -> Optional[int]:
@@ -93,22 +246,24 @@ EQUITY_CONCEPTS = (
 )
 
 
-def _extract_equity_facts(companyfacts: dict[str, Any]) -> list[dict[str, Any]]:
+# financial_facts statement label for us-gaap concepts outside EQUITY_CONCEPTS
+SEC_OTHER_STATEMENT = "us_gaap"
+
+
+def extract_concept_facts(us_gaap: dict[str, Any], concepts: tuple[str, ...]) -> list[dict[str, Any]]:
     """
-    From companyfacts JSON, extract us-gaap equity facts into a list of records
-    with keys: end (date str), fy, fp, val, form, concept.
+    Flatten the given us-gaap concept objects (companyfacts["facts"]["us-gaap"]) into
+    records with keys: period_end, fiscal_year, fiscal_quarter, val, form, concept, unit.
+    Concepts are visited in order; within one concept the first record per
+    (end, fy, quarter) wins.
     """
-    facts = companyfacts.get("facts", {}) or {}
-    us_gaap = facts.get("us-gaap") or {}
     out: list[dict[str, Any]] = []
-    seen: set[tuple[str, Optional[int], Optional[int]]] = set()
-
-    for concept in EQUITY_CONCEPTS:
+    for concept in concepts:
         if concept not in us_gaap:
             continue
-        concept_data = us_gaap[concept]
-        units = concept_data.get("units") or {}
-        # Prefer USD; fallback to "USD/shares" or first key
+        units = (us_gaap[concept] or {}).get("units") or {}
+        seen: set[tuple[date, Optional[int], Optional[int]]] = set()
+        # Prefer USD; fallback to "USD/shares" or "shares"
         for unit_key in ("USD", "USD/shares", "shares"):
             if unit_key not in units:
                 continue
@@ -118,15 +273,14 @@ def _extract_equity_facts(companyfacts: dict[str, Any]) -> list[dict[str, Any]]:
                 end_str = item.get("end")
                 val = item.get("val")
                 fy = item.get("fy")
-                fp = item.get("fp")
                 if not end_str or val is None:
                     continue
                 try:
                     period_end = date.fromisoformat(end_str)
                 except Exception:
                     continue
-                fq = _fp_to_quarter(fp)
-                key = (end_str, fy, fq)
+                fq = _fp_to_quarter(item.get("fp"))
+                key = (period_end, fy, fq)
                 if key in seen:
                     continue
                 seen.add(key)
@@ -143,63 +297,119 @@ def _extract_equity_facts(companyfacts: dict[str, Any]) -> list[dict[str, Any]]:
     return out
 
 
-def sync_sec_equity_for_ticker(session: Session, ticker: str) -> int:
+def _extract_equity_facts(companyfacts: dict[str, Any]) -> list[dict[str, Any]]:
+    """Records for every EQUITY_CONCEPTS entry in companyfacts JSON, in concept priority order."""
+    us_gaap = (companyfacts.get("facts", {}) or {}).get("us-gaap") or {}
+    return extract_concept_facts(us_gaap, EQUITY_CONCEPTS)
+
+
+def store_sec_facts(session: Session, instrument_id: int, records: list[dict[str, Any]]) -> int:
+    """
+    Write extract_concept_facts records for one instrument (does not commit): every record
+    becomes a financial_facts row, and the first equity concept per period is upserted into
+    shareholders_equity_statements. Existing periods are prefetched in one query.
+    Returns the number of shareholders_equity_statements rows inserted.
+    """
+    equity: dict[tuple[date, Optional[int], Optional[int]], dict[str, Any]] = {}
+    facts: dict[tuple[str, str, date, bool], dict[str, Any]] = {}
+    for rec in records:
+        concept = rec["concept"]
+        key = (rec["period_end"], rec.get("fiscal_year"), rec.get("fiscal_quarter"))
+        if concept in EQUITY_CONCEPTS:
+            equity.setdefault(key, rec)
+            statement = STATEMENT_NAMES[ShareholdersEquity]
+        else:
+            statement = SEC_OTHER_STATEMENT
+        for row in statement_facts(
+            instrument_id=instrument_id,
+            statement=statement,
+            period_end=rec["period_end"],
+            fiscal_year=rec.get("fiscal_year"),
+            fiscal_quarter=rec.get("fiscal_quarter"),
+            data={concept: rec.get("val")},
+            source="sec",
+        ):
+            # Comparative periods recur across filings; keep one row per conflict key.
+            facts[(row["statement"], row["concept"], row["period_end"], row["is_annual"])] = row
+
+    inserts: list[dict[str, Any]] = []
+    updates: list[dict[str, Any]] = []
+    if equity:
+        existing: dict[tuple[date, Optional[int], Optional[int]], int] = {}
+        for row_id, period_end, fy, fq in session.exec(
+            select(
+                ShareholdersEquity.id,
+                ShareholdersEquity.period_end,
+                ShareholdersEquity.fiscal_year,
+                ShareholdersEquity.fiscal_quarter,
+            ).where(ShareholdersEquity.instrument_id == instrument_id)
+        ).all():
+            existing.setdefault((period_end, fy, fq), row_id)
+        now = datetime.now(timezone.utc)
+        for key, rec in equity.items():
+            data = {
+                "value": rec.get("val"),
+                "concept": rec.get("concept"),
+                "unit": rec.get("unit"),
+                "form": rec.get("form"),
+            }
+            row_id = existing.get(key)
+            if row_id is not None:
+                updates.append({"id": row_id, "data": data})
+            else:
+                inserts.append(
+                    {
+                        "instrument_id": instrument_id,
+                        "period_start": None,
+                        "period_end": key[0],
+                        "fiscal_year": key[1],
+                        "fiscal_quarter": key[2],
+                        "currency": "USD",
+                        "filed_at": None,
+                        "data": data,
+                        "created_at": now,
+                    }
+                )
+    if inserts:
+        session.execute(insert(ShareholdersEquity), inserts)
+    if updates:
+        session.execute(update(ShareholdersEquity), updates)
+    upsert_facts(session, list(facts.values()))
+    return len(inserts)
+
+
+def sync_sec_equity_for_ticker(session: Session, ticker: str, *, force: bool = False) -> int:
     """
     For a given ticker: resolve CIK, fetch companyfacts, parse us-gaap equity concepts,
-    upsert into shareholders_equity_statements. Returns number of rows upserted.
+    upsert into shareholders_equity_statements. Returns number of rows inserted.
+    Skips parsing when SEC reports the filing unchanged since the version this ticker last
+    committed (sec_ciks.facts_etag), unless force=True; a failed ingest is retried next sync.
     """
     inst = get_or_create_instrument(session, ticker)
-    cik_map = ticker_to_cik()
-    cik = cik_map.get(inst.ticker)
+    try:
+        cik = ticker_to_cik(session).get(inst.ticker)
+    except requests.RequestException as e:
+        logger.warning("SEC: ticker map unavailable: %s", e)
+        return 0
     if not cik:
         logger.warning("SEC: no CIK for ticker %s", inst.ticker)
         return 0
 
+    sec_row = session.exec(select(SecCik).where(SecCik.ticker == inst.ticker)).first()
     try:
-        companyfacts = fetch_companyfacts(cik)
+        res = fetch_companyfacts(cik, skip_etag=None if force or sec_row is None else sec_row.facts_etag)
     except requests.RequestException as e:
         logger.warning("SEC companyfacts failed for %s (CIK %s): %s", inst.ticker, cik, e)
         return 0
+    if res.data is None:
+        return 0  # this ticker already ingested the unchanged filing
 
-    facts_list = _extract_equity_facts(companyfacts)
-    if not facts_list:
-        return 0
-
-    inserted = 0
-    for rec in facts_list:
-        period_end = rec["period_end"]
-        fy = rec.get("fiscal_year")
-        fq = rec.get("fiscal_quarter")
-        data = {
-            "value": rec.get("val"),
-            "concept": rec.get("concept"),
-            "unit": rec.get("unit"),
-            "form": rec.get("form"),
-        }
-        existing = session.exec(
-            select(ShareholdersEquity).where(
-                ShareholdersEquity.instrument_id == inst.id,
-                ShareholdersEquity.period_end == period_end,
-                ShareholdersEquity.fiscal_year == fy,
-                ShareholdersEquity.fiscal_quarter == fq,
-            )
-        ).first()
-        if existing:
-            existing.data = data
-            session.add(existing)
-        else:
-            row = ShareholdersEquity(
-                instrument_id=inst.id,
-                period_start=None,
-                period_end=period_end,
-                fiscal_year=fy,
-                fiscal_quarter=fq,
-                currency="USD",
-                filed_at=None,
-                data=data,
-            )
-            session.add(row)
-            inserted += 1
+    records = _extract_equity_facts(res.data)
+    inserted = store_sec_facts(session, inst.id, records) if records else 0
+    if sec_row is not None:
+        # Recorded in the same transaction as the facts, so it only sticks if they do.
+        sec_row.facts_etag = res.etag
+        session.add(sec_row)
     session.commit()
     return inserted
 
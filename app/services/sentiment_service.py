@@ -1,69 +1,294 @@
+"""
+Rule-based headline sentiment.
+
+A versioned lexicon of weighted words and phrases is compiled into a token-level
+Aho-Corasick automaton, so each headline is scanned once regardless of lexicon
+size. Hits within NEGATION_WINDOW tokens after a negator ("not", "fails to", ...)
+flip sign; "no" only negates the token right after it ("no growth", but not
+"No. 1 chipmaker rallies"). Scores are memoized by (lexicon version, normalized-title hash), and
+`rescore_news` re-scores stored articles in bulk when the version changes.
+
+The lexicon can be extended without code changes via SENTIMENT_LEXICON_PATH:
+a JSON file {"positive": {"term": weight}, "negative": {...}, "negators": [...]}.
+"""
+
 from __future__ import annotations
 
+import hashlib
+import json
+import logging
 import re
+from collections import deque
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+
+from sqlalchemy import update
+from sqlmodel import Session, select
+
+from app.core.config import get_settings
+from app.models.news import NewsItem
+from app.services.cache import TTLCache
 
+logger = logging.getLogger(__name__)
 
-_POS = {
-    "beat",
-    "beats",
-    "surge",
-    "surges",
-    "soar",
-    "soars",
-    "record",
-    "upgrade",
-    "upgraded",
-    "growth",
-    "profit",
-    "profits",
-    "strong",
-    "rise",
-    "rises",
-    "gain",
-    "gains",
-    "bull",
+NEGATION_WINDOW = 3
+LABEL_THRESHOLD = 0.2
+
+_POS: dict[str, float] = {
+    "beat": 1.0,
+    "beats": 1.0,
+    "surge": 1.0,
+    "surges": 1.0,
+    "soar": 1.0,
+    "soars": 1.0,
+    "record": 1.0,
+    "upgrade": 1.0,
+    "upgraded": 1.0,
+    "growth": 1.0,
+    "profit": 1.0,
+    "profits": 1.0,
+    "strong": 1.0,
+    "rise": 1.0,
+    "rises": 1.0,
+    "gain": 1.0,
+    "gains": 1.0,
+    "bull": 1.0,
+    "rally": 1.0,
+    "rallies": 1.0,
+    "jump": 1.0,
+    "jumps": 1.0,
+    "beats estimates": 1.5,
+    "tops estimates": 1.5,
+    "raises guidance": 1.5,
+    "price target raised": 1.5,
+    "record high": 1.5,
+    "all time high": 1.5,
+    "buyback": 1.0,
 }
 
-_NEG = {
-    "miss",
-    "misses",
-    "plunge",
-    "plunges",
-    "drop",
-    "drops",
-    "fall",
-    "falls",
-    "downgrade",
-    "downgraded",
-    "lawsuit",
-    "probe",
-    "investigation",
-    "weak",
-    "warning",
-    "cuts",
-    "cut",
-    "decline",
-    "declines",
-    "bear",
-    "delay",
-    "delays",
+_NEG: dict[str, float] = {
+    "miss": 1.0,
+    "misses": 1.0,
+    "plunge": 1.0,
+    "plunges": 1.0,
+    "drop": 1.0,
+    "drops": 1.0,
+    "fall": 1.0,
+    "falls": 1.0,
+    "downgrade": 1.0,
+    "downgraded": 1.0,
+    "lawsuit": 1.0,
+    "probe": 1.0,
+    "investigation": 1.0,
+    "weak": 1.0,
+    "warning": 1.0,
+    "cuts": 1.0,
+    "cut": 1.0,
+    "decline": 1.0,
+    "declines": 1.0,
+    "bear": 1.0,
+    "delay": 1.0,
+    "delays": 1.0,
+    "slump": 1.0,
+    "slumps": 1.0,
+    "misses estimates": 1.5,
+    "cuts guidance": 1.5,
+    "lowers guidance": 1.5,
+    "price target cut": 1.5,
+    "recall": 1.0,
+    "layoffs": 1.0,
 }
 
+_NEGATORS: tuple[str, ...] = ("not", "never", "without", "fail to", "fails to", "failed to", "isn t", "doesn t", "didn t")
+# Negators too common in other senses ("No. 1") to reach further than the next token.
+_ADJACENT_NEGATORS: tuple[str, ...] = ("no",)
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+_NEGATE = "negate"
+_NEGATE_NEXT = "negate-next"
+
+
+def _tokens(text: str) -> list[str]:
+    return _TOKEN.findall(text.lower())
+
+
+class _TokenAutomaton:
+    """Aho-Corasick over token sequences; `scan` yields (end index, phrase length, payload)."""
+
+    def __init__(self, phrases: dict[tuple[str, ...], object]) -> None:
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._out: list[list[tuple[int, object]]] = [[]]
+        for phrase, payload in phrases.items():
+            node = 0
+            for tok in phrase:
+                nxt = self._goto[node].get(tok)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[node][tok] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                node = nxt
+            self._out[node].append((len(phrase), payload))
+
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for tok, child in self._goto[node].items():
+                queue.append(child)
+                f = self._fail[node]
+                while f and tok not in self._goto[f]:
+                    f = self._fail[f]
+                # Depth-1 nodes fail to the root, never to themselves.
+                self._fail[child] = self._goto[f].get(tok, 0) if node else 0
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+
+    def scan(self, tokens: list[str]):
+        node = 0
+        for i, tok in enumerate(tokens):
+            while node and tok not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(tok, 0)
+            for length, payload in self._out[node]:
+                yield i, length, payload
+
+
+@dataclass(frozen=True)
+class SentimentLexicon:
+    positive: dict[str, float]
+    negative: dict[str, float]
+    negators: tuple[str, ...]
+
+    @property
+    def version(self) -> str:
+        raw = json.dumps(
+            [self.positive, self.negative, list(self.negators), list(_ADJACENT_NEGATORS), NEGATION_WINDOW],
+            sort_keys=True,
+        )
+        return "lexicon-" + hashlib.sha1(raw.encode("utf-8")).hexdigest()[:12]
+
+    def compile(self) -> _TokenAutomaton:
+        phrases: dict[tuple[str, ...], object] = {}
+        for term, w in self.positive.items():
+            phrases[tuple(_tokens(term))] = float(w)
+        for term, w in self.negative.items():
+            phrases[tuple(_tokens(term))] = -float(w)
+        for term in self.negators:
+            phrases[tuple(_tokens(term))] = _NEGATE
+        for term in _ADJACENT_NEGATORS:
+            phrases[tuple(_tokens(term))] = _NEGATE_NEXT
+        return _TokenAutomaton({k: v for k, v in phrases.items() if k})
+
+
+def _load_lexicon() -> SentimentLexicon:
+    pos, neg, negators = dict(_POS), dict(_NEG), list(_NEGATORS)
+    path = get_settings().sentiment_lexicon_path
+    if path:
+        try:
+            extra = json.loads(Path(path).read_text(encoding="utf-8"))
+            pos.update({k.lower(): float(v) for k, v in (extra.get("positive") or {}).items()})
+            neg.update({k.lower(): float(v) for k, v in (extra.get("negative") or {}).items()})
+            negators.extend(t.lower() for t in extra.get("negators") or [])
+        except (OSError, ValueError, AttributeError) as e:
+            logger.warning("ignoring sentiment lexicon %s: %s", path, e)
+    return SentimentLexicon(positive=pos, negative=neg, negators=tuple(dict.fromkeys(negators)))
+
+
+@lru_cache(maxsize=1)
+def _engine() -> tuple[str, _TokenAutomaton]:
+    lex = _load_lexicon()
+    return lex.version, lex.compile()
+
+
+def lexicon_version() -> str:
+    return _engine()[0]
+
+
+_memo: TTLCache[tuple[str, float]] = TTLCache(maxsize=50_000, ttl_s=24 * 3600.0)
+
+
+def _score_tokens(automaton: _TokenAutomaton, tokens: list[str]) -> tuple[str, float]:
+    hits: list[tuple[int, int, float]] = []
+    negated = [False] * len(tokens)
+    for end, length, payload in automaton.scan(tokens):
+        if payload == _NEGATE or payload == _NEGATE_NEXT:
+            window = NEGATION_WINDOW if payload == _NEGATE else 1
+            for i in range(end + 1, min(end + 1 + window, len(tokens))):
+                negated[i] = True
+            continue
+        hits.append((end - length + 1, length, float(payload)))
+
+    # Prefer longest phrases: "beats estimates" shouldn't also count "beats".
+    hits.sort(key=lambda h: (-h[1], h[0]))
+    taken: set[int] = set()
+    total = 0.0
+    magnitude = 0.0
+    for start, length, w in hits:
+        span = range(start, start + length)
+        if any(i in taken for i in span):
+            continue
+        taken.update(span)
+        if negated[start]:
+            w = -w
+        total += w
+        magnitude += abs(w)
+
+    score = total / max(1.0, magnitude)
+    if score >= LABEL_THRESHOLD:
+        return "POS", float(score)
+    if score <= -LABEL_THRESHOLD:
+        return "NEG", float(score)
+    return "NEU", float(score)
+
+
+def score_sentiment_batch(texts: list[str]) -> list[tuple[str, float, str]]:
+    """Score many headlines; returns (label, score in [-1,1], model_name) per input."""
+    version, automaton = _engine()
+    out: list[tuple[str, float, str]] = []
+    for text in texts:
+        tokens = _tokens(text)
+        key = (version, hashlib.sha1(" ".join(tokens).encode("utf-8")).hexdigest())
+        hit = _memo.get(key)
+        if hit is None:
+            hit = _score_tokens(automaton, tokens) if tokens else ("NEU", 0.0)
+            _memo.set(key, hit)
+        out.append((hit[0], hit[1], version))
+    return out
+
 
 def score_sentiment(text: str) -> tuple[str, float, str]:
     """
     Tiny rule-based sentiment for headlines.
     Returns: (label, score in [-1,1], model_name)
     """
-    tokens = re.findall(r"[a-zA-Z']+", text.lower())
-    if not tokens:
-        return "NEU", 0.0, "lexicon_v1"
-    pos = sum(1 for t in tokens if t in _POS)
-    neg = sum(1 for t in tokens if t in _NEG)
-    score = (pos - neg) / max(1, pos + neg)
-    if score >= 0.2:
-        return "POS", float(score), "lexicon_v1"
-    if score <= -0.2:
-        return "NEG", float(score), "lexicon_v1"
-    return "NEU", float(score), "lexicon_v1"
+    return score_sentiment_batch([text])[0]
+
 
+def rescore_news(session: Session, *, chunk_size: int = 1000, force: bool = False) -> int:
+    """
+    Re-score stored articles whose sentiment_model isn't the current lexicon version
+    (all articles with force=True). Bulk-updates by primary key, one commit per chunk.
+    """
+    version = lexicon_version()
+    updated = 0
+    last_id = 0
+    while True:
+        stmt = select(NewsItem.id, NewsItem.title).where(NewsItem.id > last_id)
+        if not force:
+            stmt = stmt.where((NewsItem.sentiment_model.is_(None)) | (NewsItem.sentiment_model != version))
+        rows = session.exec(stmt.order_by(NewsItem.id).limit(chunk_size)).all()
+        if not rows:
+            return updated
+        scores = score_sentiment_batch([title for _, title in rows])
+        session.execute(
+            update(NewsItem),
+            [
+                {"id": news_id, "sentiment_label": label, "sentiment_score": score, "sentiment_model": model}
+                for (news_id, _), (label, score, model) in zip(rows, scores)
+            ],
+        )
+        session.commit()
+        updated += len(rows)
+        last_id = rows[-1][0]
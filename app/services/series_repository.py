@@ -0,0 +1,148 @@
+"""
+Read-only time-series access for chart/history endpoints.
+
+Bars and indicator features are fetched with a single LEFT JOIN that selects
+plain column tuples (no ORM entities), and responses are encoded directly with
+orjson instead of validating one pydantic model per point.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Any, Sequence
+
+import orjson
+from sqlalchemy import and_
+from sqlmodel import Session, select
+
+from app.models.market import MarketBar, TechnicalFeature
+
+BAR_COLUMNS: tuple[str, ...] = ("ts", "open", "high", "low", "close", "volume")
+FEATURE_COLUMNS: tuple[str, ...] = ("ma20", "ma200", "rsi14", "macd", "macd_signal")
+CHART_COLUMNS: tuple[str, ...] = BAR_COLUMNS + FEATURE_COLUMNS
+
+_JSON_OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_SERIALIZE_NUMPY
+
+
+def dumps(obj: Any) -> bytes:
+    return orjson.dumps(obj, option=_JSON_OPTIONS)
+
+
+_COLUMN_EXPR = {
+    "ts": MarketBar.ts,
+    "open": MarketBar.open,
+    "high": MarketBar.high,
+    "low": MarketBar.low,
+    "close": MarketBar.close,
+    "volume": MarketBar.volume,
+    "ma20": TechnicalFeature.ma20,
+    "ma200": TechnicalFeature.ma200,
+    "rsi14": TechnicalFeature.rsi14,
+    "macd": TechnicalFeature.macd,
+    "macd_signal": TechnicalFeature.macd_signal,
+}
+
+
+def project_columns(fields: str | None, available: Sequence[str]) -> tuple[str, ...]:
+    """
+    Parse a comma-separated `fields=` projection against `available` columns.
+    `ts` is always included first; unknown names raise ValueError.
+    """
+    if not fields or not fields.strip():
+        return tuple(available)
+    wanted = {f.strip().lower() for f in fields.split(",") if f.strip()}
+    unknown = sorted(wanted - set(available))
+    if unknown:
+        raise ValueError(f"Unknown field(s): {', '.join(unknown)}. Allowed: {', '.join(available)}")
+    wanted.add("ts")
+    return tuple(c for c in available if c in wanted)
+
+
+def _series_stmt(columns: Sequence[str], *, leading: Sequence = ()):
+    stmt = select(*leading, *[_COLUMN_EXPR[c] for c in columns]).select_from(MarketBar)
+    if any(c in FEATURE_COLUMNS for c in columns):
+        stmt = stmt.outerjoin(
+            TechnicalFeature,
+            and_(
+                TechnicalFeature.instrument_id == MarketBar.instrument_id,
+                TechnicalFeature.timeframe == MarketBar.timeframe,
+                TechnicalFeature.ts == MarketBar.ts,
+            ),
+        )
+    return stmt
+
+
+def read_series_rows(
+    session: Session,
+    *,
+    instrument_id: int,
+    timeframe: str,
+    start: datetime,
+    end: datetime,
+    columns: Sequence[str] = CHART_COLUMNS,
+) -> Sequence[tuple]:
+    """
+    Tuples of `columns` ordered by ts. Feature columns come from a LEFT JOIN on
+    (instrument, timeframe, ts) and are None where no feature row exists; the join
+    is skipped entirely when only bar columns are requested.
+    """
+    stmt = _series_stmt(columns).where(
+        MarketBar.instrument_id == instrument_id,
+        MarketBar.timeframe == timeframe,
+        MarketBar.ts >= start,
+        MarketBar.ts <= end,
+    ).order_by(MarketBar.ts.asc())
+    rows = session.exec(stmt).all()
+    # A single selected column comes back as scalars.
+    return [(r,) for r in rows] if len(columns) == 1 else rows
+
+
+def read_series_rows_multi(
+    session: Session,
+    *,
+    instrument_ids: Sequence[int],
+    timeframe: str,
+    start: datetime,
+    end: datetime,
+    columns: Sequence[str] = CHART_COLUMNS,
+) -> dict[int, list[tuple]]:
+    """Like read_series_rows for many instruments in one `instrument_id IN (...)` range scan."""
+    out: dict[int, list[tuple]] = {i: [] for i in instrument_ids}
+    if not instrument_ids:
+        return out
+    stmt = (
+        _series_stmt(columns, leading=(MarketBar.instrument_id,))
+        .where(
+            MarketBar.instrument_id.in_(list(instrument_ids)),
+            MarketBar.timeframe == timeframe,
+            MarketBar.ts >= start,
+            MarketBar.ts <= end,
+        )
+        .order_by(MarketBar.instrument_id.asc(), MarketBar.ts.asc())
+    )
+    for row in session.exec(stmt):
+        out[row[0]].append(tuple(row[1:]))
+    return out
+
+
+def points_payload(ticker: str, timeframe: str, columns: Sequence[str], rows: Sequence[tuple]) -> dict:
+    return {"ticker": ticker, "timeframe": timeframe, "points": [dict(zip(columns, row)) for row in rows]}
+
+
+def columnar_payload(ticker: str, timeframe: str, columns: Sequence[str], rows: Sequence[tuple]) -> dict:
+    arrays = list(zip(*rows)) if rows else [() for _ in columns]
+    return {
+        "ticker": ticker,
+        "timeframe": timeframe,
+        "columns": {name: list(values) for name, values in zip(columns, arrays)},
+    }
+
+
+def encode_points(ticker: str, timeframe: str, columns: Sequence[str], rows: Sequence[tuple]) -> bytes:
+    """Serialize rows as {"ticker", "timeframe", "points": [{column: value, ...}, ...]}."""
+    return dumps(points_payload(ticker, timeframe, columns, rows))
+
+
+def encode_columnar(ticker: str, timeframe: str, columns: Sequence[str], rows: Sequence[tuple]) -> bytes:
+    """Serialize rows as one array per column: {"ticker", "timeframe", "columns": {column: [...]}}."""
+    return dumps(columnar_payload(ticker, timeframe, columns, rows))
@@ -0,0 +1,147 @@
+"""
+Rolling per-instrument statistics derived from stored daily bars.
+
+`update_instrument_stats` is called from bar ingest and recomputes one compact
+`instrument_stats` row from the trailing year of bars (~252 rows), so overview
+reads need no yfinance `.info` call for the 52-week range, previous close,
+average volume or period returns.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+from sqlmodel import Session, select
+
+from app.db.upsert import bulk_upsert
+from app.models.financials import IncomeStatement
+from app.models.instrument import Instrument
+from app.models.market import InstrumentStats, MarketBar
+
+STATS_TIMEFRAME = "1d"
+AVG_VOLUME_BARS = 63  # ~3 months of sessions
+
+_RETURN_WINDOWS: dict[str, timedelta] = {
+    "return_1w": timedelta(days=7),
+    "return_1m": timedelta(days=30),
+    "return_3m": timedelta(days=91),
+}
+
+
+def _now_utc() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _as_utc(dt: datetime) -> datetime:
+    return dt.astimezone(timezone.utc) if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+
+
+def _pct(last: float, base: float | None) -> float | None:
+    if base is None or not np.isfinite(base) or base == 0.0:
+        return None
+    return 100.0 * (last - base) / base
+
+
+def _close_at_or_before(ts: np.ndarray, close: np.ndarray, cutoff: datetime) -> float | None:
+    i = int(np.searchsorted(ts, np.datetime64(cutoff.replace(tzinfo=None), "us"), side="right")) - 1
+    return float(close[i]) if i >= 0 else None
+
+
+def compute_stats(rows: list[tuple[datetime, float, float, float, float]]) -> dict | None:
+    """Aggregate (ts, high, low, close, volume) rows sorted by ts ascending."""
+    if not rows:
+        return None
+    as_of = _as_utc(rows[-1][0])
+    ts = np.array([_as_utc(r[0]).replace(tzinfo=None) for r in rows], dtype="datetime64[us]")
+    high = np.array([r[1] for r in rows], dtype=float)
+    low = np.array([r[2] for r in rows], dtype=float)
+    close = np.array([r[3] for r in rows], dtype=float)
+    volume = np.array([r[4] for r in rows], dtype=float)
+
+    last = float(close[-1])
+    year = ts > np.datetime64((as_of - timedelta(days=365)).replace(tzinfo=None), "us")
+    stats = {
+        "as_of": as_of,
+        "last_close": last,
+        "prev_close": float(close[-2]) if len(close) > 1 else None,
+        "high_52w": float(np.nanmax(high[year])),
+        "low_52w": float(np.nanmin(low[year])),
+        "avg_volume_3m": float(np.nanmean(volume[-AVG_VOLUME_BARS:])),
+    }
+    for name, window in _RETURN_WINDOWS.items():
+        stats[name] = _pct(last, _close_at_or_before(ts, close, as_of - window))
+    year_start = datetime(as_of.year, 1, 1, tzinfo=timezone.utc)
+    stats["return_ytd"] = _pct(last, _close_at_or_before(ts, close, year_start - timedelta(microseconds=1)))
+    return stats
+
+
+def update_instrument_stats(session: Session, *, instrument_id: int) -> InstrumentStats | None:
+    """Recompute and upsert the stats row for one instrument (commits)."""
+    last_ts = session.exec(
+        select(MarketBar.ts)
+        .where(MarketBar.instrument_id == instrument_id, MarketBar.timeframe == STATS_TIMEFRAME)
+        .order_by(MarketBar.ts.desc())
+        .limit(1)
+    ).first()
+    if last_ts is None:
+        return None
+    # A year plus slack so YTD (prior year's last close) always has a base bar.
+    since = _as_utc(last_ts) - timedelta(days=380)
+    rows = session.exec(
+        select(MarketBar.ts, MarketBar.high, MarketBar.low, MarketBar.close, MarketBar.volume)
+        .where(
+            MarketBar.instrument_id == instrument_id,
+            MarketBar.timeframe == STATS_TIMEFRAME,
+            MarketBar.ts >= since,
+        )
+        .order_by(MarketBar.ts.asc())
+    ).all()
+    stats = compute_stats([tuple(r) for r in rows])
+    if stats is None:
+        return None
+
+    row = {"instrument_id": instrument_id, "timeframe": STATS_TIMEFRAME, "updated_at": _now_utc(), **stats}
+    bulk_upsert(
+        session,
+        InstrumentStats,
+        [row],
+        conflict_cols=["instrument_id", "timeframe"],
+        update_cols=[k for k in row if k not in ("instrument_id", "timeframe")],
+    )
+    session.commit()
+    return get_instrument_stats(session, instrument_id=instrument_id)
+
+
+def get_instrument_stats(session: Session, *, instrument_id: int) -> InstrumentStats | None:
+    return session.exec(
+        select(InstrumentStats).where(
+            InstrumentStats.instrument_id == instrument_id,
+            InstrumentStats.timeframe == STATS_TIMEFRAME,
+        )
+    ).first()
+
+
+def get_stats_by_ticker(session: Session, ticker: str) -> tuple[Instrument, InstrumentStats] | None:
+    row = session.exec(
+        select(Instrument, InstrumentStats)
+        .join(InstrumentStats, InstrumentStats.instrument_id == Instrument.id)
+        .where(Instrument.ticker == ticker, InstrumentStats.timeframe == STATS_TIMEFRAME)
+    ).first()
+    return (row[0], row[1]) if row is not None else None
+
+
+def trailing_eps(session: Session, *, instrument_id: int) -> float | None:
+    """Sum of diluted EPS over the last four stored quarters, or None if any is missing."""
+    rows = session.exec(
+        select(IncomeStatement.data)
+        .where(IncomeStatement.instrument_id == instrument_id, IncomeStatement.fiscal_quarter.is_not(None))
+        .order_by(IncomeStatement.period_end.desc())
+        .limit(4)
+    ).all()
+    if len(rows) < 4:
+        return None
+    eps = [(d or {}).get("Diluted EPS") for d in rows]
+    if any(not isinstance(v, (int, float)) for v in eps):
+        return None
+    return float(sum(eps))
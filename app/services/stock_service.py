@@ -1,13 +1,43 @@
 from __future__ import annotations
 
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from datetime import datetime, timedelta, timezone
+import time
+from typing import Sequence
 
 import yfinance as yf
+from sqlalchemy import func
 from sqlmodel import Session, select
+from app.core.config import get_settings
 from app.models.instrument import Instrument
-from app.models.market import MarketBar, TechnicalFeature
-from app.models.news import NewsItem
-from app.schemas.stock import ChartPoint, ChartResponse, HistoryResponse, NewsItemOut, NewsListResponse, OhlcPoint, StockOverview
+from app.models.market import StockQuote
+from app.models.news import NewsInstrument, NewsItem
+from app.schemas.stock import (
+    NewsBatchResponse,
+    NewsItemOut,
+    NewsListResponse,
+    NewsSearchResponse,
+    StockOverview,
+)
+from app.services.cache import SingleFlight, TTLCache
+from app.services.downsample import downsample_rows
+from app.services.market_calendar import EXCHANGE_TZ
+from app.services.instrument_resolver import InstrumentRef
+from app.services.instrument_service import resolve_instrument_ids
+from app.services.news_search_index import news_search_index
+from app.services.series_repository import (
+    BAR_COLUMNS,
+    CHART_COLUMNS,
+    columnar_payload,
+    dumps,
+    encode_columnar,
+    encode_points,
+    points_payload,
+    read_series_rows,
+    read_series_rows_multi,
+)
+from app.services.stats_service import get_stats_by_ticker, trailing_eps
 
 
 def _now_utc() -> datetime:
@@ -55,10 +85,169 @@ def get_stock_overview(ticker: str) -> StockOverview:
     )
 
 
-def get_stock_overviews_batch(tickers: list[str], max_workers: int = 8) -> list[StockOverview | None]:
+_overview_cache: TTLCache[StockOverview] = TTLCache(
+    maxsize=get_settings().overview_cache_size,
+    ttl_s=get_settings().overview_cache_ttl_seconds,
+)
+_overview_flight = SingleFlight()
+
+
+def _overview_from_stored_quote(session: Session, ticker: str) -> StockOverview | None:
+    row = session.exec(
+        select(Instrument, StockQuote)
+        .join(StockQuote, StockQuote.instrument_id == Instrument.id)
+        .where(Instrument.ticker == ticker)
+    ).first()
+    if row is None:
+        return None
+    inst, quote = row
+    prev_close = None
+    if quote.last is not None and quote.change is not None:
+        prev_close = quote.last - quote.change
+    return StockOverview(
+        ticker=inst.ticker,
+        exchange=inst.exchange,
+        currency=quote.currency,
+        last_price=quote.last,
+        prev_close=prev_close,
+        change=quote.change,
+        change_percent=quote.change_percent,
+        market_cap=quote.market_cap,
+        updated_at=quote.updated_at,
+    )
+
+
+def get_stock_overview_from_stats(session: Session, ticker: str, *, live: bool = True) -> StockOverview | None:
+    """
+    Overview from the stored `instrument_stats` row plus at most one `fast_info` lookup
+    (skipped when live=False). Without a live price, price and market cap come from the
+    stored `stock_quotes` row, and only failing that from the last daily close.
+    Returns None if no stats exist yet.
+    """
+    t = ticker.strip().upper()
+    found = get_stats_by_ticker(session, t)
+    if found is None:
+        return None
+    inst, st = found
+
+    quote = None
+    if live:
+        try:
+            quote = get_stock_quote_fast(t)
+        except Exception:
+            quote = None
+
+    stored = quote is None or quote.last_price is None
+    if stored:
+        quote = _overview_from_stored_quote(session, inst.ticker)
+
+    if quote is not None and quote.last_price is not None:
+        last_price = float(quote.last_price)
+        prev_close = quote.prev_close
+        if not prev_close:
+            # A bar for today's session is still forming; otherwise the last bar is the previous close.
+            today = _now_utc().astimezone(EXCHANGE_TZ).date()
+            as_of = st.as_of if st.as_of.tzinfo else st.as_of.replace(tzinfo=timezone.utc)
+            prev_close = st.prev_close if as_of.astimezone(EXCHANGE_TZ).date() == today else st.last_close
+    else:
+        last_price = st.last_close
+        prev_close = st.prev_close
+
+    change = None
+    change_pct = None
+    if last_price is not None and prev_close:
+        change = float(last_price) - float(prev_close)
+        change_pct = 100.0 * change / float(prev_close)
+
+    eps = trailing_eps(session, instrument_id=inst.id)
+    pe_ratio = float(last_price) / eps if last_price is not None and eps and eps > 0 else None
+
+    return StockOverview(
+        ticker=inst.ticker,
+        exchange=(quote.exchange if quote else None) or inst.exchange,
+        currency=quote.currency if quote else None,
+        last_price=last_price,
+        prev_close=prev_close,
+        change=change,
+        change_percent=change_pct,
+        market_cap=quote.market_cap if quote else None,
+        pe_ratio=pe_ratio,
+        fifty_two_week_high=st.high_52w,
+        fifty_two_week_low=st.low_52w,
+        avg_volume=st.avg_volume_3m,
+        return_1w=st.return_1w,
+        return_1m=st.return_1m,
+        return_3m=st.return_3m,
+        return_ytd=st.return_ytd,
+        updated_at=quote.updated_at if stored and quote is not None else _now_utc(),
+    )
+
+
+def get_stock_overview_cached(session: Session, ticker: str) -> StockOverview:
+    """
+    Overview through a per-ticker TTL/LRU cache. Concurrent misses for one ticker share a
+    single upstream fetch; if upstream fails, the stored stock_quotes row is served instead.
+    """
+    t = ticker.strip().upper()
+    cached = _overview_cache.get(t)
+    if cached is not None:
+        return cached
+
+    try:
+        # Stored stats avoid the `.info` scrape; tickers without ingested bars still use it.
+        ov = _overview_flight.do(t, lambda: get_stock_overview_from_stats(session, t) or get_stock_overview(t))
+    except Exception:
+        ov = None
+    if ov is None or ov.last_price is None:
+        ov = _overview_from_stored_quote(session, t) or ov or StockOverview(ticker=t, updated_at=_now_utc())
+    # Failures are cached too, so an unreachable or unknown symbol isn't re-fetched on every request.
+    _overview_cache.set(t, ov)
+    return ov
+
+
+def get_stock_quote_fast(ticker: str) -> StockOverview:
+    """
+    Price-only overview from yfinance `fast_info` (no `.info` scrape).
+    PE ratios and 52-week range are left empty.
+    """
+    t = ticker.strip().upper()
+    fast = getattr(yf.Ticker(t), "fast_info", None) or {}
+
+    last_price = fast.get("last_price") or fast.get("lastPrice")
+    prev_close = fast.get("previous_close") or fast.get("previousClose")
+    market_cap = fast.get("market_cap") or fast.get("marketCap")
+    change = None
+    change_pct = None
+    if last_price is not None and prev_close:
+        change = float(last_price) - float(prev_close)
+        change_pct = 100.0 * change / float(prev_close)
+
+    return StockOverview(
+        ticker=t,
+        exchange=fast.get("exchange"),
+        currency=fast.get("currency"),
+        last_price=last_price,
+        prev_close=prev_close,
+        change=change,
+        change_percent=change_pct,
+        market_cap=float(market_cap) if market_cap is not None else None,
+        updated_at=_now_utc(),
+    )
+
+
+def get_stock_overviews_batch(
+    tickers: list[str],
+    max_workers: int = 8,
+    *,
+    timeout_s: float = 10.0,
+    include_info: bool = True,
+) -> list[StockOverview | None]:
     """
-    Fetch overviews for multiple tickers **sequentially** using yfinance only.
-    Returns one entry per ticker in same order; None where fetch failed.
+    Fetch overviews for multiple tickers concurrently, at most `max_workers` at a time.
+    Each fetch gets `timeout_s` from its start; one that overruns is abandoned and its
+    slot goes to the next ticker. With include_info=False only `fast_info` is used
+    (price fields only). Returns one entry per ticker in same order; None where the
+    fetch failed or timed out.
     """
     if not tickers:
         return []
@@ -66,47 +255,69 @@ def get_stock_overviews_batch(tickers: list[str], max_workers: int = 8) -> list[
     if not tickers:
         return []
 
-    results: list[StockOverview | None] = []
-    for t in tickers:
-        try:
-            results.append(get_stock_overview(t))
-        except Exception:
-            results.append(None)
-    return results
+    fetch = get_stock_overview if include_info else get_stock_quote_fast
+    workers = max(1, min(max_workers, len(tickers)))
+    results: list[StockOverview | None] = [None] * len(tickers)
+    queued = deque(enumerate(tickers))
+    running: dict[Future, tuple[int, float]] = {}  # future -> (index, monotonic deadline)
+
+    # Sized for every ticker so an abandoned (hung) thread never blocks a new submission;
+    # threads are only started as fetches are submitted, at most `workers` live at once.
+    pool = ThreadPoolExecutor(max_workers=len(tickers), thread_name_prefix="quotes")
+    try:
+        while queued or running:
+            while queued and len(running) < workers:
+                i, t = queued.popleft()
+                running[pool.submit(fetch, t)] = (i, time.monotonic() + timeout_s)
+            next_deadline = min(deadline for _, deadline in running.values())
+            wait(running, timeout=max(0.0, next_deadline - time.monotonic()), return_when=FIRST_COMPLETED)
+            now = time.monotonic()
+            for fut, (i, deadline) in list(running.items()):
+                if fut.done():
+                    del running[fut]
+                    if fut.exception() is None:
+                        results[i] = fut.result()
+                elif now >= deadline:
+                    del running[fut]  # timed out; result stays None
+        return results
+    finally:
+        # Don't block on hung upstream calls; abandoned threads finish in the background.
+        pool.shutdown(wait=False, cancel_futures=True)
 
 
-def get_history(session: Session, *, instrument: Instrument, days: int = 60, timeframe: str = "1d") -> HistoryResponse:
+def series_window(days: int) -> tuple[datetime, datetime]:
+    """(start, end) covering the last `days` days, shared by payload reads and ETag markers."""
     end = _now_utc()
-    start = end - timedelta(days=max(1, days))
-    bars = session.exec(
-        select(MarketBar)
-        .where(
-            MarketBar.instrument_id == instrument.id,
-            MarketBar.timeframe == timeframe,
-            MarketBar.ts >= start,
-            MarketBar.ts <= end,
-        )
-        .order_by(MarketBar.ts.asc())
-    ).all()
-    points = [
-        OhlcPoint(
-            ts=b.ts,
-            open=b.open,
-            high=b.high,
-            low=b.low,
-            close=b.close,
-            volume=b.volume,
-        )
-        for b in bars
-    ]
-    return HistoryResponse(ticker=instrument.ticker, timeframe=timeframe, points=points)
+    return end - timedelta(days=max(1, days)), end
+
 
+def get_history_json(
+    session: Session,
+    *,
+    instrument: InstrumentRef,
+    days: int = 60,
+    timeframe: str = "1d",
+    columns: Sequence[str] = BAR_COLUMNS,
+    columnar: bool = False,
+    max_points: int | None = None,
+    window: tuple[datetime, datetime] | None = None,
+) -> bytes:
+    """History payload (HistoryResponse shape, or columnar) encoded straight from row tuples."""
+    start, end = window or series_window(days)
+    rows = read_series_rows(
+        session, instrument_id=instrument.id, timeframe=timeframe, start=start, end=end, columns=columns
+    )
+    rows = downsample_rows(columns, rows, max_points)
+    encode = encode_columnar if columnar else encode_points
+    return encode(instrument.ticker, timeframe, columns, rows)
 
-def get_news_list(session: Session, *, instrument: Instrument, limit: int = 20) -> NewsListResponse:
+
+def get_news_list(session: Session, *, instrument: InstrumentRef, limit: int = 20) -> NewsListResponse:
     items = session.exec(
         select(NewsItem)
-        .where(NewsItem.instrument_id == instrument.id)
-        .order_by(NewsItem.published_at.desc())
+        .join(NewsInstrument, NewsInstrument.news_id == NewsItem.id)
+        .where(NewsInstrument.instrument_id == instrument.id)
+        .order_by(NewsInstrument.published_at.desc())
         .limit(limit)
     ).all()
     return NewsListResponse(
@@ -125,56 +336,131 @@ def get_news_list(session: Session, *, instrument: Instrument, limit: int = 20)
     )
 
 
-def get_chart_data(
+def search_news(
     session: Session,
+    query: str,
     *,
-    instrument: Instrument,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    limit: int = 20,
+    offset: int = 0,
+) -> NewsSearchResponse:
+    """Full-text headline search via the in-memory index; rows are fetched by primary key."""
+    news_search_index.ensure_fresh(session)
+    ids, total = news_search_index.search(query, start=start, end=end, limit=limit, offset=offset)
+    rows = {n.id: n for n in session.exec(select(NewsItem).where(NewsItem.id.in_(ids))).all()} if ids else {}
+    return NewsSearchResponse(
+        query=query,
+        total=total,
+        items=[
+            NewsItemOut(
+                published_at=n.published_at,
+                source=n.source,
+                title=n.title,
+                url=n.url,
+                sentiment_label=n.sentiment_label,
+                sentiment_score=n.sentiment_score,
+            )
+            for n in (rows.get(i) for i in ids)
+            if n is not None
+        ],
+    )
+
+
+def get_chart_json(
+    session: Session,
+    *,
+    instrument: InstrumentRef,
     days: int = 120,
     timeframe: str = "1d",
-) -> ChartResponse:
-    end = _now_utc()
-    start = end - timedelta(days=max(1, days))
-
-    bars = session.exec(
-        select(MarketBar)
-        .where(
-            MarketBar.instrument_id == instrument.id,
-            MarketBar.timeframe == timeframe,
-            MarketBar.ts >= start,
-            MarketBar.ts <= end,
-        )
-        .order_by(MarketBar.ts.asc())
-    ).all()
-    feats = session.exec(
-        select(TechnicalFeature)
-        .where(
-            TechnicalFeature.instrument_id == instrument.id,
-            TechnicalFeature.timeframe == timeframe,
-            TechnicalFeature.ts >= start,
-            TechnicalFeature.ts <= end,
+    columns: Sequence[str] = CHART_COLUMNS,
+    columnar: bool = False,
+    max_points: int | None = None,
+    window: tuple[datetime, datetime] | None = None,
+) -> bytes:
+    """Chart payload (ChartResponse shape, or columnar) encoded straight from joined row tuples."""
+    start, end = window or series_window(days)
+    rows = read_series_rows(
+        session, instrument_id=instrument.id, timeframe=timeframe, start=start, end=end, columns=columns
+    )
+    rows = downsample_rows(columns, rows, max_points)
+    encode = encode_columnar if columnar else encode_points
+    return encode(instrument.ticker, timeframe, columns, rows)
+
+
+def get_series_batch_json(
+    session: Session,
+    *,
+    tickers: list[str],
+    days: int,
+    timeframe: str = "1d",
+    columns: Sequence[str] = CHART_COLUMNS,
+    columnar: bool = False,
+    max_points: int | None = None,
+) -> bytes:
+    """
+    Chart/history payloads for many tickers: one instrument lookup and one IN (...) range
+    scan over bars (+ features), grouped per ticker. Shape: {"items": [...], "missing": [...]}.
+    """
+    found, missing = resolve_instrument_ids(session, tickers)
+    start, end = series_window(days)
+    rows_by_id = read_series_rows_multi(
+        session,
+        instrument_ids=[inst_id for inst_id, _ in found],
+        timeframe=timeframe,
+        start=start,
+        end=end,
+        columns=columns,
+    )
+    build = columnar_payload if columnar else points_payload
+    items = [
+        build(ticker, timeframe, columns, downsample_rows(columns, rows_by_id[inst_id], max_points))
+        for inst_id, ticker in found
+    ]
+    return dumps({"items": items, "missing": missing})
+
+
+def get_news_batch(session: Session, *, tickers: list[str], limit: int = 20) -> NewsBatchResponse:
+    """Latest `limit` news items per ticker in one windowed (ROW_NUMBER) query."""
+    found, missing = resolve_instrument_ids(session, tickers)
+    by_id: dict[int, list[NewsItemOut]] = {inst_id: [] for inst_id, _ in found}
+    if found:
+        rn = (
+            func.row_number()
+            .over(partition_by=NewsInstrument.instrument_id, order_by=NewsInstrument.published_at.desc())
+            .label("rn")
         )
-        .order_by(TechnicalFeature.ts.asc())
-    ).all()
-    feat_by_ts = {f.ts: f for f in feats}
-
-    points: list[ChartPoint] = []
-    for b in bars:
-        f = feat_by_ts.get(b.ts)
-        points.append(
-            ChartPoint(
-                ts=b.ts,
-                open=b.open,
-                high=b.high,
-                low=b.low,
-                close=b.close,
-                volume=b.volume,
-                ma20=f.ma20 if f else None,
-                ma200=f.ma200 if f else None,
-                rsi14=f.rsi14 if f else None,
-                macd=f.macd if f else None,
-                macd_signal=f.macd_signal if f else None,
+        ranked = (
+            select(
+                NewsInstrument.instrument_id,
+                NewsItem.published_at,
+                NewsItem.source,
+                NewsItem.title,
+                NewsItem.url,
+                NewsItem.sentiment_label,
+                NewsItem.sentiment_score,
+                rn,
             )
+            .select_from(NewsInstrument)
+            .join(NewsItem, NewsItem.id == NewsInstrument.news_id)
+            .where(NewsInstrument.instrument_id.in_(list(by_id)))
+            .subquery()
         )
-
-    return ChartResponse(ticker=instrument.ticker, timeframe=timeframe, points=points)
-
+        rows = session.exec(
+            select(*ranked.c).where(ranked.c.rn <= limit).order_by(ranked.c.instrument_id, ranked.c.rn)
+        )
+        for inst_id, published_at, source, title, url, label, score, _ in rows:
+            by_id[inst_id].append(
+                NewsItemOut(
+                    published_at=published_at,
+                    source=source,
+                    title=title,
+                    url=url,
+                    sentiment_label=label,
+                    sentiment_score=score,
+                )
+            )
+    return NewsBatchResponse(
+        items=[NewsListResponse(ticker=ticker, items=by_id[inst_id]) for inst_id, ticker in found],
+        missing=missing,
+    )
@@ -6,6 +6,8 @@ import httpx
 from sqlmodel import Session, select
 
 from app.models.instrument import Instrument
+from app.services.instrument_resolver import instrument_resolver
+from app.services.search_index import instrument_search_index
 
 
 NASDAQ_LISTED_URL = "https://www.nasdaqtrader.com/dynamic/SymDir/nasdaqlisted.txt"
@@ -133,5 +135,7 @@ def sync_universe(session: Session) -> tuple[int, int, int]:
             updated += 1
 
     session.commit()
+    instrument_search_index.refresh(session)
+    instrument_resolver.refresh(session)
     return inserted, updated, len(rows)
 
@@ -15,7 +15,6 @@ import {
 } from "recharts";
 
 const API_BASE = process.env.NEXT_PUBLIC_API_BASE || "http://localhost:8000";
-const fetcher = (url: string) => fetch(url).then((r) => r.json());
 
 interface ChartPoint {
   ts: string;
@@ -37,6 +36,34 @@ interface ChartResponse {
   points: ChartPoint[];
 }
 
+interface ColumnarChartResponse {
+  ticker: string;
+  timeframe: string;
+  columns: Record<string, (string | number | null)[]>;
+}
+
+// Charts request `format=columnar` (one array per field) and rebuild point objects for recharts.
+const columnarFetcher = (url: string): Promise<ChartResponse> =>
+  fetch(url)
+    .then((r) => r.json())
+    .then((body: ColumnarChartResponse) => {
+      const names = Object.keys(body.columns);
+      const n = body.columns.ts?.length ?? 0;
+      const points = Array.from({ length: n }, (_, i) => {
+        const p: Record<string, string | number | null> = {};
+        for (const name of names) p[name] = body.columns[name][i];
+        return p as unknown as ChartPoint;
+      });
+      return { ticker: body.ticker, timeframe: body.timeframe, points };
+    });
+
+function chartUrl(ticker: string, fields: string[]) {
+  return (
+    `${API_BASE}/v1/stock/chart?ticker=${encodeURIComponent(ticker)}&days=180&timeframe=1d` +
+    `&format=columnar&fields=${fields.join(",")}`
+  );
+}
+
 function formatDateLabel(iso: string) {
   const d = new Date(iso);
   return `${d.getMonth() + 1}/${d.getDate()}`;
@@ -44,8 +71,8 @@ function formatDateLabel(iso: string) {
 
 export function PriceChartCard({ ticker }: { ticker: string }) {
   const { data, error, isLoading } = useSWR<ChartResponse>(
-    `${API_BASE}/v1/stock/chart?ticker=${encodeURIComponent(ticker)}&days=180&timeframe=1d`,
-    fetcher,
+    chartUrl(ticker, ["close", "ma20", "ma200"]),
+    columnarFetcher,
     { refreshInterval: 60_000 }
   );
 
@@ -111,8 +138,8 @@ export function PriceChartCard({ ticker }: { ticker: string }) {
 
 export function IndicatorChartCard({ ticker }: { ticker: string }) {
   const { data, error, isLoading } = useSWR<ChartResponse>(
-    `${API_BASE}/v1/stock/chart?ticker=${encodeURIComponent(ticker)}&days=180&timeframe=1d`,
-    fetcher,
+    chartUrl(ticker, ["rsi14", "macd", "macd_signal"]),
+    columnarFetcher,
     { refreshInterval: 60_000 }
   );
 
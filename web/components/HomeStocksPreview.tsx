@@ -3,7 +3,7 @@
 import useSWR from "swr";
 import Link from "next/link";
 import { useRouter } from "next/navigation";
-import { useState, useMemo } from "react";
+import { useEffect, useState, useMemo } from "react";
 
 const API_BASE = process.env.NEXT_PUBLIC_API_BASE || "http://localhost:8000";
 const fetcher = (url: string) => fetch(url).then((r) => r.json());
@@ -31,8 +31,34 @@ type SearchInstrument = {
   name?: string | null;
 };
 
+type QuoteUpdate = {
+  ticker: string;
+  last?: number | null;
+  change?: number | null;
+  change_percent?: number | null;
+  market_cap?: number | null;
+};
+
 const limit = 20;
 
+/** Subscribe to server-sent quote updates for the given tickers. */
+function useLiveQuotes(tickers: string[]) {
+  const [quotes, setQuotes] = useState<Record<string, QuoteUpdate>>({});
+  const key = tickers.join(",");
+
+  useEffect(() => {
+    if (!key || typeof EventSource === "undefined") return;
+    const es = new EventSource(`${API_BASE}/v1/stream/quotes?tickers=${encodeURIComponent(key)}`);
+    es.addEventListener("quote", (ev) => {
+      const q = JSON.parse((ev as MessageEvent).data) as QuoteUpdate;
+      setQuotes((prev) => ({ ...prev, [q.ticker]: q }));
+    });
+    return () => es.close();
+  }, [key]);
+
+  return quotes;
+}
+
 function fmt(n?: number | null, digits = 2) {
   if (n === undefined || n === null) return "-";
   return n.toFixed(digits);
@@ -143,11 +169,22 @@ export function HomeStocksPreview() {
 
   const { data, error, isLoading } = useSWR<Page>(
     `${API_BASE}/v1/stocks/summary?${queryParams}`,
-    fetcher,
-    { refreshInterval: 120_000 }
+    fetcher
   );
 
-  const items = data?.items ?? [];
+  const live = useLiveQuotes((data?.items ?? []).map((s) => s.ticker));
+  const items = (data?.items ?? []).map((s) => {
+    const q = live[s.ticker];
+    return q
+      ? {
+          ...s,
+          last: q.last ?? s.last,
+          change: q.change ?? s.change,
+          change_percent: q.change_percent ?? s.change_percent,
+          market_cap: q.market_cap ?? s.market_cap,
+        }
+      : s;
+  });
   const total = data?.total ?? 0;
   const totalPages = Math.max(1, Math.ceil(total / limit));
   const from = total === 0 ? 0 : offset + 1;